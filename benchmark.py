@@ -0,0 +1,284 @@
+"""Benchmark script for ticket system hot paths.
+
+Usage: python benchmark.py [name ...]
+Runs every benchmark when no name is given.
+"""
+
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+# Add src to path for imports
+sys.path.insert(0, str(Path(__file__).parent / "src"))
+
+from src.adapter.discord.ticket.database.models import DatabaseManager
+from src.adapter.discord.ticket.repository.ticket_repository import TicketRepository
+from src.adapter.discord.ticket.use_case.ticket_service import TicketService
+from src.adapter.discord.bot import gateway_options
+from src.adapter.discord.ticket.utils.form_dispatcher import FormAnswerDispatcher
+
+
+def _report(label: str, seconds: float, operations: int) -> None:
+    """Print the average time per operation."""
+    per_op_us = seconds / operations * 1_000_000
+    print(f"  {label:<40} {per_op_us:>10.1f} µs/op  ({operations} ops, {seconds:.3f}s)")
+
+
+async def _time_lookups(repository: TicketRepository, channel_ids, guild_ids) -> dict:
+    """Time the lookups that run on every close-button press."""
+    timings = {}
+
+    started = time.perf_counter()
+    for channel_id in channel_ids:
+        await repository.get_ticket_by_channel(channel_id)
+    timings['get_ticket_by_channel'] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    for guild_id in guild_ids:
+        await repository.is_co_owner(guild_id, 42)
+    timings['is_co_owner'] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    for guild_id in guild_ids:
+        await repository.get_ticket_roles(guild_id)
+    timings['get_ticket_roles'] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    for channel_id in channel_ids:
+        await repository.get_form_responses(channel_id)
+    timings['get_form_responses'] = time.perf_counter() - started
+
+    return timings
+
+
+async def benchmark_indexes(ticket_count: int = 1_000_000, lookups: int = 200):
+    """Compare lookup time before and after the index migrations."""
+    print(f"\n📈 Index benchmark ({ticket_count:,} tickets)")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_manager = DatabaseManager(os.path.join(tmp, "bench.db"))
+        repository = TicketRepository(db_manager)
+
+        # Schema without any indexes
+        await db_manager.migrate(target=1)
+
+        guild_count = 1000
+        await db_manager.execute_many(
+            """INSERT INTO tickets (guild_id, user_id, channel_id, ticket_type, status)
+               VALUES (?, ?, ?, 'simple', ?)""",
+            (
+                (i % guild_count, i, 10_000_000 + i, 'open' if i % 10 == 0 else 'closed')
+                for i in range(ticket_count)
+            )
+        )
+        await db_manager.execute_many(
+            "INSERT INTO form_responses (ticket_id, question_order, question_text, response_text) VALUES (?, 1, 'q', 'a')",
+            ((i,) for i in range(0, ticket_count, 10))
+        )
+        await db_manager.execute_many(
+            "INSERT INTO co_owners (guild_id, user_id, assigned_by) VALUES (?, ?, 1)",
+            ((i, 100 + i) for i in range(guild_count))
+        )
+        await db_manager.execute_many(
+            "INSERT INTO ticket_roles (guild_id, role_id) VALUES (?, ?)",
+            ((i, 200 + i) for i in range(guild_count))
+        )
+
+        rng = random.Random(1)
+        channel_ids = [10_000_000 + rng.randrange(ticket_count) for _ in range(lookups)]
+        guild_ids = [rng.randrange(guild_count) for _ in range(lookups)]
+
+        before = await _time_lookups(repository, channel_ids, guild_ids)
+
+        started = time.perf_counter()
+        await db_manager.migrate()
+        print(f"  Index migrations took {time.perf_counter() - started:.2f}s")
+
+        after = await _time_lookups(repository, channel_ids, guild_ids)
+
+        for name in before:
+            _report(f"{name} (before)", before[name], lookups)
+            _report(f"{name} (after)", after[name], lookups)
+            print(f"  {'':<40} {before[name] / after[name]:>10.1f}x faster")
+
+        await db_manager.close()
+
+
+async def benchmark_ticket_index(ticket_count: int = 300_000, lookups: int = 10_000):
+    """Measure warm-up time, memory and lookup speed of the open ticket index."""
+    print(f"\n🗂️ Open ticket index benchmark ({ticket_count:,} open tickets)")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_manager = DatabaseManager(os.path.join(tmp, "bench.db"))
+        await db_manager.initialize()
+        repository = TicketRepository(db_manager)
+        service = TicketService(repository)
+
+        await db_manager.execute_many(
+            """INSERT INTO tickets (guild_id, user_id, channel_id, ticket_type, status)
+               VALUES (?, ?, ?, 'simple', 'open')""",
+            ((i % 1000, 10**17 + i, 10**18 + i) for i in range(ticket_count))
+        )
+
+        tracemalloc.start()
+        started = time.perf_counter()
+        loaded = await service.load_ticket_index()
+        elapsed = time.perf_counter() - started
+        memory, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print(f"  Loaded {loaded:,} tickets in {elapsed:.2f}s, {memory / loaded:.0f} bytes/ticket")
+
+        rng = random.Random(1)
+        channel_ids = [10**18 + rng.randrange(ticket_count) for _ in range(lookups)]
+
+        started = time.perf_counter()
+        for channel_id in channel_ids:
+            await service.get_ticket_by_channel(channel_id)
+        _report("get_ticket_by_channel (index)", time.perf_counter() - started, lookups)
+
+        started = time.perf_counter()
+        for channel_id in channel_ids[:lookups // 10]:
+            await repository.get_ticket_by_channel(channel_id)
+        _report("get_ticket_by_channel (database)", time.perf_counter() - started, lookups // 10)
+
+        await db_manager.close()
+
+
+def _member_payload(user_id: int) -> dict:
+    """Gateway payload of a guild member."""
+    return {
+        'user': {'id': str(user_id), 'username': f"user{user_id}", 'discriminator': '0',
+                 'avatar': None, 'global_name': None},
+        'roles': [],
+        'joined_at': '2024-01-01T00:00:00+00:00',
+        'deaf': False,
+        'mute': False,
+        'flags': 0
+    }
+
+
+async def benchmark_gateway_profiles(member_count: int = 100_000, chunk_size: int = 1000):
+    """Compare member cache memory and readiness time of the gateway profiles."""
+    import discord
+    from discord.state import ChunkRequest
+
+    print(f"\n📡 Gateway profile benchmark (guild with {member_count:,} members)")
+
+    bot_id = 1
+    guild_id = 10**17
+    guild_payload = {
+        'id': str(guild_id), 'name': 'bench', 'owner_id': '2', 'features': [],
+        'roles': [{'id': str(guild_id), 'name': '@everyone', 'permissions': '0', 'position': 0,
+                   'color': 0, 'hoist': False, 'managed': False, 'mentionable': False}],
+        'channels': [], 'emojis': [], 'stickers': [],
+        # Large guilds only send the bot's own member in GUILD_CREATE
+        'members': [_member_payload(bot_id)], 'member_count': member_count, 'large': True
+    }
+    chunks = [
+        [_member_payload(10**17 + i) for i in range(start, min(start + chunk_size, member_count))]
+        for start in range(0, member_count, chunk_size)
+    ]
+
+    for profile in ('full', 'lean'):
+        options = gateway_options(profile)
+        client = discord.Client(**options)
+        state = client._connection
+        state.user = discord.ClientUser(state=state, data=_member_payload(bot_id)['user'])
+
+        tracemalloc.start()
+        started = time.perf_counter()
+        guild = state._add_guild_from_data(guild_payload)
+        if options.get('chunk_guilds_at_startup', True):
+            # What chunking at startup receives before the guild is ready
+            request = ChunkRequest(guild.id, 0, asyncio.get_running_loop(), state._get_guild, cache=True)
+            state._chunk_requests[request.nonce] = request
+            for index, members in enumerate(chunks):
+                state.parse_guild_members_chunk({
+                    'guild_id': str(guild.id), 'members': members, 'nonce': request.nonce,
+                    'chunk_index': index, 'chunk_count': len(chunks)
+                })
+        elapsed = time.perf_counter() - started
+        memory, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        print(f"  {profile:<5} cached {len(guild.members):>7,} members in {elapsed:6.2f}s, "
+              f"{memory / 1024 / 1024:7.1f} MiB")
+        await client.close()
+
+
+async def benchmark_form_dispatch(sessions: int = 1000, messages: int = 5000):
+    """Compare per-message cost of bot.wait_for checks and the form answer dispatcher."""
+    import discord
+    from types import SimpleNamespace
+
+    print(f"\n📨 Form answer dispatch benchmark ({sessions:,} concurrent sessions)")
+
+    # Unrelated chatter: none of these messages answers a form
+    traffic = [
+        SimpleNamespace(author=SimpleNamespace(id=10**6 + i), channel=SimpleNamespace(id=i % 50))
+        for i in range(messages)
+    ]
+
+    client = discord.Client(intents=discord.Intents.none())
+    await client._async_setup_hook()  # Binds the client to this loop without logging in
+    waits = [
+        asyncio.ensure_future(client.wait_for(
+            'message',
+            check=lambda m, user_id=user_id: m.author.id == user_id and m.channel.id == user_id,
+            timeout=600
+        ))
+        for user_id in range(sessions)
+    ]
+    await asyncio.sleep(0)
+    started = time.perf_counter()
+    for message in traffic:
+        client.dispatch('message', message)
+    wait_for_time = time.perf_counter() - started
+    _report("bot.wait_for checks", wait_for_time, messages)
+    for wait in waits:
+        wait.cancel()
+    await asyncio.gather(*waits, return_exceptions=True)
+    await client.close()
+
+    dispatcher = FormAnswerDispatcher()
+    waits = [asyncio.ensure_future(dispatcher.wait(user_id, user_id, timeout=600)) for user_id in range(sessions)]
+    await asyncio.sleep(0)
+    started = time.perf_counter()
+    for message in traffic:
+        dispatcher.dispatch(message)
+    dispatcher_time = time.perf_counter() - started
+    _report("FormAnswerDispatcher", dispatcher_time, messages)
+    print(f"  {'':<40} {wait_for_time / dispatcher_time:>10.1f}x faster")
+    for wait in waits:
+        wait.cancel()
+    await asyncio.gather(*waits, return_exceptions=True)
+
+
+BENCHMARKS = {
+    'indexes': benchmark_indexes,
+    'ticket_index': benchmark_ticket_index,
+    'gateway': benchmark_gateway_profiles,
+    'form_dispatch': benchmark_form_dispatch,
+}
+
+
+async def main():
+    """Run the selected benchmarks."""
+    names = sys.argv[1:] or list(BENCHMARKS)
+    for name in names:
+        if name not in BENCHMARKS:
+            print(f"Unknown benchmark '{name}'. Available: {', '.join(BENCHMARKS)}")
+            return
+
+    print("🚀 Starting Discord Ticket Bot Benchmarks")
+    for name in names:
+        await BENCHMARKS[name]()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
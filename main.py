@@ -5,6 +5,8 @@ except ImportError:
     raise ImportError("Missing 'python-dotenv'. Install with 'pip install python-dotenv'.")
 try:
     from src.adapter.discord.bot import DiscordBot
+    from src.adapter.discord.cluster import ClusterLauncher
+    from src.adapter.discord.ticket.config.settings import Settings
 except ImportError as e:
     raise ImportError(f"Could not import DiscordBot: {e}\nCheck your project structure and dependencies.")
 
@@ -16,8 +18,11 @@ def main():
     if not token:
         raise ValueError("DISCORD_TOKEN not found in environment variables. Please set it in your .env file.")
     try:
-        bot = DiscordBot()
-        bot.run(token)
+        if Settings.CLUSTER_COUNT > 1:
+            ClusterLauncher(token).start()
+        else:
+            bot = DiscordBot()
+            bot.run(token)
     except Exception as e:
         print(f"Error starting Discord bot: {e}")
         raise
@@ -1,46 +1,191 @@
 """Main Discord bot class."""
 
+import asyncio
+from typing import Any, Dict, List, Optional
+
 import discord
 from discord.ext import commands
 from src.adapter.discord.ticket.cogs.bot_settings_commands import setup as setup_bot_settings
 import logging
 from .ticket.database.models import DatabaseManager
 from .ticket.repository.ticket_repository import TicketRepository
+from .ticket.repository.bot_settings_repository import BotSettingsRepository
+from .ticket.repository.command_sync_repository import CommandSyncRepository
+from .ticket.repository.blob_repository import BlobRepository
 from .ticket.use_case.ticket_service import TicketService
+from .ticket.use_case.channel_pool import TicketChannelPool
+from .ticket.use_case.category_resolver import TicketCategoryResolver
+from .ticket.use_case.deletion_queue import ChannelDeletionQueue
+from .ticket.use_case.command_sync import CommandSyncer
+from .ticket.use_case.form_sessions import FormSessionStore
+from .ticket.use_case.transcripts import TranscriptExporter
+from .ticket.use_case.blob_store import BlobStore
+from .ticket.use_case.idle_closer import IdleTicketCloser
+from .ticket.use_case.activity_tracker import ActivityTracker
 from .ticket.config.settings import Settings
+from .ticket.utils.rest_scheduler import RestScheduler
+from .ticket.utils.member_resolver import MemberResolver
+from .ticket.utils.form_dispatcher import FormAnswerDispatcher
+from .cluster import ClusterClient, shard_for_guild
 
 
-class DiscordBot(commands.Bot):
-    """Main Discord bot class."""
+def gateway_options(profile: str = Settings.GATEWAY_PROFILE) -> Dict[str, Any]:
+    """Intents and cache options of a gateway profile.
     
-    def __init__(self):
-        intents = discord.Intents.default()
-        intents.message_content = True
-        intents.guilds = True
-        intents.members = True
-        
+    The lean profile drops the members intent, member caching, startup
+    chunking and the message cache. Ticket flows get the invoking member
+    from the interaction payload and resolve others on demand.
+    """
+    intents = discord.Intents.default()
+    intents.message_content = True
+    intents.guilds = True
+    
+    if profile == 'lean':
+        intents.members = False
+        return {
+            'intents': intents,
+            'member_cache_flags': discord.MemberCacheFlags.none(),
+            'chunk_guilds_at_startup': False,
+            'max_messages': None
+        }
+    
+    intents.members = True
+    return {'intents': intents}
+
+
+class DiscordBot(commands.AutoShardedBot):
+    """Main Discord bot class.
+    
+    Runs every shard by default. In a cluster, it runs only shard_ids and
+    talks to the other clusters through the given ClusterClient.
+    """
+    
+    def __init__(
+        self,
+        shard_ids: Optional[List[int]] = None,
+        shard_count: Optional[int] = None,
+        cluster: Optional[ClusterClient] = None
+    ):
         super().__init__(
             command_prefix='!',  # Fallback prefix, we'll use slash commands
-            intents=intents,
-            help_command=None
+            **gateway_options(),
+            help_command=None,
+            shard_ids=shard_ids,
+            shard_count=shard_count,
+            # Long rate-limit sleeps surface as RateLimited so the REST scheduler can requeue
+            max_ratelimit_timeout=Settings.REST_MAX_RATELIMIT_TIMEOUT
         )
         
+        self.cluster = cluster
+        
         # Initialize services
         self.db_manager = DatabaseManager(Settings.get_database_path())
         self.ticket_repository = TicketRepository(self.db_manager)
-        self.ticket_service = TicketService(self.ticket_repository)
+        self.rest = RestScheduler(Settings.REST_GLOBAL_RATE)
+        self.member_resolver = MemberResolver(
+            self.rest,
+            Settings.MEMBER_RESOLVER_CACHE_SIZE,
+            Settings.MEMBER_RESOLVER_CACHE_TTL
+        )
+        self.category_resolver = TicketCategoryResolver(self.ticket_repository, self.rest)
+        self.channel_pool = TicketChannelPool(self.rest, category_resolver=self.category_resolver)
+        self.ticket_service = TicketService(
+            self.ticket_repository, self.rest, self.channel_pool, self.category_resolver
+        )
+        self._channel_pool_task = None
+        self.blobs = BlobStore(BlobRepository(self.db_manager))
+        self.transcripts = TranscriptExporter(self.ticket_repository, self.rest, self, blobs=self.blobs)
+        # Transcripts are written before the channel they come from is deleted
+        self.deletion_queue = ChannelDeletionQueue(
+            self.ticket_repository, self.rest, self.http,
+            before_delete=self.transcripts.export_channel if Settings.TRANSCRIPTS_ENABLED else None
+        )
+        self.bot_settings = BotSettingsRepository(self.db_manager)
+        self.idle_closer = IdleTicketCloser(
+            self.ticket_service, self.ticket_repository, self.bot_settings,
+            self.deletion_queue, self.rest, self
+        )
+        self.ticket_service.ticket_opened_hook = self.idle_closer.track
+        self.activity_tracker = ActivityTracker(self.ticket_service, self.ticket_repository)
+        self.activity_tracker.activity_hook = self.idle_closer.touch
+        self.form_answers = FormAnswerDispatcher()
+        self.form_sessions = FormSessionStore(self.ticket_repository)
+        self.command_syncer = CommandSyncer(self.tree, CommandSyncRepository(self.db_manager))
+        if cluster is not None:
+            self._connect_cluster(cluster)
         
         # Setup logging
         logging.basicConfig(level=logging.INFO)
         self.logger = logging.getLogger(__name__)
         # Cog registration moved to setup_hook
     
+    def _connect_cluster(self, cluster: ClusterClient) -> None:
+        """Keep caches consistent with other clusters and report metrics to the launcher."""
+        self.bot_settings.invalidation_hook = lambda guild_id: cluster.publish_invalidation('bot_settings', guild_id)
+        self.ticket_service.invalidation_hook = lambda guild_id: cluster.publish_invalidation('guild_config', guild_id)
+        cluster.on_invalidate('bot_settings', self.bot_settings.invalidate)
+        cluster.on_invalidate(
+            'guild_config',
+            lambda guild_id: self.ticket_service.invalidate_guild_config(guild_id, publish=False)
+        )
+        cluster.stats_provider = self.cluster_stats
+        cluster.on_shutdown = self.close
+    
+    def owns_guild(self, guild_id: Optional[int]) -> bool:
+        """Check whether one of this process's shards receives a guild's events."""
+        if self.shard_ids is None:
+            return True
+        # Rows without a guild are handled by the cluster owning shard 0
+        shard_id = 0 if guild_id is None else shard_for_guild(guild_id, self.shard_count)
+        return shard_id in self.shard_ids
+    
+    def cluster_stats(self) -> Dict[str, Any]:
+        """Metrics of this process, summed across clusters by the launcher."""
+        return {
+            'shards': len(self.shards),
+            'guilds': len(self.guilds),
+            'latency_ms': self.latency * 1000 if self.is_ready() else 0.0,
+            'open_tickets': len(self.ticket_service.ticket_index),
+            'rest_queue_depth': self.rest.stats()['queue_depth'],
+            'pending_deletions': len(self.deletion_queue),
+            'pooled_channels': len(self.channel_pool),
+            'activity_seen': self.activity_tracker.seen,
+            'activity_rows_written': self.activity_tracker.rows_written
+        }
+    
     async def setup_hook(self):
         """Setup hook called when bot is starting."""
+        if self.cluster is not None:
+            self.cluster.start()
+        
         # Initialize database
         await self.db_manager.initialize()
         self.logger.info("Database initialized")
         
+        # Warm the settings cache so ticket handlers don't touch the database
+        await self.bot_settings.load_all()
+        
+        # Index open tickets so channel lookups are served from memory
+        open_tickets = await self.ticket_service.load_ticket_index(self.owns_guild)
+        self.logger.info(f"Indexed {open_tickets} open ticket(s)")
+        
+        # Resume channel deletions scheduled before a restart
+        pending_deletions = await self.deletion_queue.start(self.owns_guild)
+        self.logger.info(f"Resumed {pending_deletions} pending channel deletion(s)")
+        
+        # Schedule idle checks of open tickets
+        idle_tickets = await self.idle_closer.start(self.owns_guild)
+        self.logger.info(f"Watching {idle_tickets} open ticket(s) for inactivity")
+        self.activity_tracker.start()
+        
+        # Blobs are shared by all clusters, so one of them collects the unreferenced ones
+        if self.owns_guild(None):
+            await self.blobs.start()
+        
+        # Restore settings panel forms that were in progress before a restart
+        resumed_forms = await self.form_sessions.start(self.owns_guild)
+        self.logger.info(f"Resumed {resumed_forms} form session(s)")
+        
         # Load cogs
         await self.load_extension('src.adapter.discord.ticket.cogs.ticket_commands')
         await self.load_extension('src.adapter.discord.ticket.cogs.setup_commands')
@@ -49,18 +194,53 @@ class DiscordBot(commands.Bot):
         # Register new bot settings cog
         await setup_bot_settings(self)
         
-        # Sync slash commands
+        # Sync slash commands, skipping scopes whose definitions did not change.
+        # Commands are per application, so only the first cluster syncs them.
+        if self.cluster is not None and self.cluster.cluster_id != 0:
+            return
         try:
-            synced = await self.tree.sync()
-            self.logger.info(f"Synced {len(synced)} command(s)")
+            results = await self.command_syncer.sync_all(
+                Settings.COMMAND_SYNC_GUILDS,
+                force=Settings.COMMAND_SYNC_FORCE
+            )
+            for result in results:
+                if result.synced:
+                    self.logger.info(
+                        f"Synced {result.command_count} command(s) to {result.scope} in {result.seconds:.2f}s"
+                    )
+                else:
+                    self.logger.info(
+                        f"Commands of {result.scope} unchanged, skipped sync (saved ~{result.saved_seconds:.2f}s)"
+                    )
         except Exception as e:
             self.logger.error(f"Failed to sync commands: {e}")
     
+    async def close(self):
+        """Close the Discord connection and release database resources."""
+        await super().close()
+        await self.channel_pool.close()
+        await self.category_resolver.close()
+        await self.activity_tracker.close()
+        await self.idle_closer.close()
+        await self.deletion_queue.close()
+        self.transcripts.close()
+        await self.blobs.close()
+        await self.form_sessions.close()
+        await self.rest.close()
+        await self.db_manager.close()
+        self.logger.info("Database closed")
+        if self.cluster is not None:
+            self.cluster.close()
+    
     async def on_ready(self):
         """Called when bot is ready."""
         self.logger.info(f'{self.user} has connected to Discord!')
         self.logger.info(f'Bot is in {len(self.guilds)} guilds')
         
+        # on_ready fires again after reconnects; reconcile the channel pool only once
+        if self._channel_pool_task is None:
+            self._channel_pool_task = asyncio.create_task(self.channel_pool.start(self.guilds))
+        
         # Set bot status
         await self.change_presence(
             activity=discord.Activity(
@@ -69,6 +249,26 @@ class DiscordBot(commands.Bot):
             )
         )
     
+    async def on_message(self, message):
+        """Record ticket activity, then route form answers to their sessions before any command processing."""
+        self.activity_tracker.record(message)
+        if self.form_answers.dispatch(message):
+            return
+        await self.process_commands(message)
+    
+    async def on_interaction(self, interaction):
+        """Keep the member that arrived with an interaction, so commands need not fetch it."""
+        if isinstance(interaction.user, discord.Member):
+            self.member_resolver.remember(interaction.user)
+    
+    async def on_member_update(self, before, after):
+        """Replace a cached member that changed."""
+        self.member_resolver.remember(after)
+    
+    async def on_raw_member_remove(self, payload):
+        """Drop a member that left the guild."""
+        self.member_resolver.forget(payload.guild_id, payload.user.id)
+    
     async def on_guild_join(self, guild):
         """Called when bot joins a guild."""
         self.logger.info(f"Joined guild: {guild.name} (ID: {guild.id})")
@@ -76,6 +276,20 @@ class DiscordBot(commands.Bot):
     async def on_guild_remove(self, guild):
         """Called when bot leaves a guild."""
         self.logger.info(f"Left guild: {guild.name} (ID: {guild.id})")
+        self.channel_pool.forget(guild.id)
+        self.category_resolver.forget(guild.id)
+    
+    async def on_guild_channel_create(self, channel):
+        """Keep ticket category channel counts current."""
+        self.category_resolver.channel_created(channel)
+    
+    async def on_guild_channel_delete(self, channel):
+        """Keep ticket category channel counts current."""
+        self.category_resolver.channel_deleted(channel)
+    
+    async def on_guild_channel_update(self, before, after):
+        """Follow channels moved between ticket categories."""
+        self.category_resolver.channel_updated(before, after)
     
     async def on_command_error(self, ctx, error):
         """Global error handler."""
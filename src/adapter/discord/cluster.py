@@ -0,0 +1,350 @@
+"""Multi-process cluster launcher and the IPC between clusters."""
+
+import asyncio
+import logging
+import multiprocessing
+from multiprocessing.connection import Connection
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import discord
+
+from .ticket.config.settings import Settings
+
+
+logger = logging.getLogger(__name__)
+
+# Entry point of a cluster process: (token, cluster_id, shard_ids, shard_count, cluster_count, conn)
+ClusterTarget = Callable[[str, int, List[int], int, int, Connection], None]
+
+
+def shard_ranges(shard_count: int, clusters: int) -> List[List[int]]:
+    """Split shard ids into contiguous ranges, one per cluster."""
+    clusters = max(1, min(clusters, shard_count))
+    base, extra = divmod(shard_count, clusters)
+    ranges = []
+    start = 0
+    for cluster_id in range(clusters):
+        size = base + (1 if cluster_id < extra else 0)
+        ranges.append(list(range(start, start + size)))
+        start += size
+    return ranges
+
+
+def shard_for_guild(guild_id: int, shard_count: int) -> int:
+    """Shard that receives a guild's gateway events."""
+    return (guild_id >> 22) % shard_count
+
+
+def aggregate_stats(clusters: Sequence[Dict[str, Any]]) -> Dict[str, Any]:
+    """Sum the numeric metrics reported by each cluster."""
+    totals: Dict[str, Any] = {'clusters': len(clusters)}
+    for stats in clusters:
+        for key, value in stats.items():
+            if key != 'cluster_id' and isinstance(value, (int, float)) and not isinstance(value, bool):
+                totals[key] = totals.get(key, 0) + value
+    return totals
+
+
+class ClusterClient:
+    """A cluster's end of the pipe to the launcher.
+
+    Messages are plain dicts with an 'op' key:
+    - invalidate: a cache entry changed in another cluster
+    - stats_query / stats_reply: the launcher collecting metrics
+    - stats_request / stats_result: this cluster asking for every cluster's metrics
+    - shutdown: the launcher stopping the cluster
+    """
+
+    def __init__(self, conn: Connection, cluster_id: int, cluster_count: int = 1):
+        self.conn = conn
+        self.cluster_id = cluster_id
+        self.cluster_count = cluster_count
+        self.stats_provider: Optional[Callable[[], Dict[str, Any]]] = None
+        self.on_shutdown: Optional[Callable[[], Any]] = None
+        self._invalidation_handlers: Dict[str, List[Callable[[Optional[int]], None]]] = {}
+        self._waiters: Dict[int, asyncio.Future] = {}
+        self._nonce = 0
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+        self.sent = 0
+        self.received = 0
+
+    def start(self) -> None:
+        """Start handling messages from the launcher on the running event loop."""
+        self._loop = asyncio.get_running_loop()
+        self._loop.add_reader(self.conn.fileno(), self._on_readable)
+
+    def _send(self, message: Dict[str, Any]) -> None:
+        try:
+            self.conn.send(message)
+            self.sent += 1
+        except (BrokenPipeError, OSError) as e:
+            logger.warning(f"Cluster {self.cluster_id} lost the launcher connection: {e}")
+
+    def _on_readable(self) -> None:
+        try:
+            while self.conn.poll():
+                message = self.conn.recv()
+                self.received += 1
+                self._dispatch(message)
+        except (EOFError, OSError):
+            # The launcher went away
+            self._loop.remove_reader(self.conn.fileno())
+
+    def _dispatch(self, message: Dict[str, Any]) -> None:
+        op = message.get('op')
+        if op == 'invalidate':
+            for handler in self._invalidation_handlers.get(message['cache'], ()):
+                handler(message.get('guild_id'))
+        elif op == 'stats_query':
+            stats = self.stats_provider() if self.stats_provider else {}
+            self._send({'op': 'stats_reply', 'nonce': message['nonce'], 'stats': stats})
+        elif op == 'stats_result':
+            waiter = self._waiters.pop(message['nonce'], None)
+            if waiter is not None and not waiter.done():
+                waiter.set_result(message['clusters'])
+        elif op == 'shutdown':
+            if self.on_shutdown is not None:
+                result = self.on_shutdown()
+                if asyncio.iscoroutine(result):
+                    asyncio.ensure_future(result)
+
+    def on_invalidate(self, cache: str, handler: Callable[[Optional[int]], None]) -> None:
+        """Call handler(guild_id) when another cluster invalidates an entry of a cache."""
+        self._invalidation_handlers.setdefault(cache, []).append(handler)
+
+    def publish_invalidation(self, cache: str, guild_id: Optional[int] = None) -> None:
+        """Tell every other cluster that a cached entry changed."""
+        self._send({'op': 'invalidate', 'cache': cache, 'guild_id': guild_id})
+
+    async def cluster_stats(self, timeout: float = 5.0) -> List[Dict[str, Any]]:
+        """Collect the metrics of every running cluster, this one included."""
+        self._nonce += 1
+        nonce = self._nonce
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters[nonce] = waiter
+        self._send({'op': 'stats_request', 'nonce': nonce})
+        try:
+            return await asyncio.wait_for(waiter, timeout)
+        finally:
+            self._waiters.pop(nonce, None)
+
+    def close(self) -> None:
+        """Stop handling messages and close the pipe."""
+        if self._loop is not None:
+            self._loop.remove_reader(self.conn.fileno())
+            self._loop = None
+        self.conn.close()
+
+
+class ClusterHub:
+    """The launcher's side of the cluster pipes.
+
+    Relays cache invalidations from one cluster to all others and gathers
+    metrics from every cluster, answering after all replied or after
+    stats_timeout with whatever arrived.
+    """
+
+    def __init__(self, stats_timeout: float = 5.0):
+        self.stats_timeout = stats_timeout
+        self._conns: Dict[int, Connection] = {}
+        self._pending: Dict[int, Tuple[Dict[int, Dict[str, Any]], Any]] = {}
+        self._nonce = 0
+        self.relayed = 0
+
+    def __len__(self) -> int:
+        return len(self._conns)
+
+    def attach(self, cluster_id: int, conn: Connection) -> None:
+        """Start relaying messages of a cluster."""
+        self._conns[cluster_id] = conn
+        asyncio.get_running_loop().add_reader(conn.fileno(), self._on_readable, cluster_id)
+
+    def detach(self, cluster_id: int) -> None:
+        """Stop relaying messages of a cluster that exited."""
+        conn = self._conns.pop(cluster_id, None)
+        if conn is None:
+            return
+        asyncio.get_running_loop().remove_reader(conn.fileno())
+        conn.close()
+        # Pending stats requests no longer wait for it
+        for nonce in list(self._pending):
+            self._maybe_finish(nonce)
+
+    def _send(self, cluster_id: int, message: Dict[str, Any]) -> None:
+        conn = self._conns.get(cluster_id)
+        if conn is None:
+            return
+        try:
+            conn.send(message)
+        except (BrokenPipeError, OSError):
+            self.detach(cluster_id)
+
+    def broadcast(self, message: Dict[str, Any], exclude: Optional[int] = None) -> None:
+        """Send a message to every cluster except exclude."""
+        for cluster_id in list(self._conns):
+            if cluster_id != exclude:
+                self._send(cluster_id, message)
+
+    def _on_readable(self, cluster_id: int) -> None:
+        conn = self._conns.get(cluster_id)
+        try:
+            while conn is not None and conn.poll():
+                self._handle(cluster_id, conn.recv())
+                conn = self._conns.get(cluster_id)
+        except (EOFError, OSError):
+            self.detach(cluster_id)
+
+    def _handle(self, cluster_id: int, message: Dict[str, Any]) -> None:
+        op = message.get('op')
+        if op == 'invalidate':
+            self.relayed += 1
+            self.broadcast(message, exclude=cluster_id)
+        elif op == 'stats_request':
+            self._query_stats((cluster_id, message['nonce']))
+        elif op == 'stats_reply':
+            pending = self._pending.get(message['nonce'])
+            if pending is not None:
+                pending[0][cluster_id] = {'cluster_id': cluster_id, **message['stats']}
+                self._maybe_finish(message['nonce'])
+
+    def _query_stats(self, requester: Any) -> int:
+        """Ask every cluster for metrics; requester is a (cluster_id, nonce) pair or a future."""
+        self._nonce += 1
+        nonce = self._nonce
+        self._pending[nonce] = ({}, requester)
+        asyncio.get_running_loop().call_later(self.stats_timeout, self._finish, nonce)
+        self.broadcast({'op': 'stats_query', 'nonce': nonce})
+        self._maybe_finish(nonce)
+        return nonce
+
+    def _maybe_finish(self, nonce: int) -> None:
+        pending = self._pending.get(nonce)
+        if pending is not None and set(self._conns) <= set(pending[0]):
+            self._finish(nonce)
+
+    def _finish(self, nonce: int) -> None:
+        pending = self._pending.pop(nonce, None)
+        if pending is None:
+            return
+        replies, requester = pending
+        clusters = [replies[cluster_id] for cluster_id in sorted(replies)]
+        if isinstance(requester, asyncio.Future):
+            if not requester.done():
+                requester.set_result(clusters)
+        else:
+            cluster_id, request_nonce = requester
+            self._send(cluster_id, {'op': 'stats_result', 'nonce': request_nonce, 'clusters': clusters})
+
+    async def collect_stats(self) -> List[Dict[str, Any]]:
+        """Collect the metrics of every attached cluster."""
+        waiter = asyncio.get_running_loop().create_future()
+        self._query_stats(waiter)
+        return await waiter
+
+    def shutdown(self) -> None:
+        """Ask every cluster to stop."""
+        self.broadcast({'op': 'shutdown'})
+
+
+def run_cluster(
+    token: str,
+    cluster_id: int,
+    shard_ids: List[int],
+    shard_count: int,
+    cluster_count: int,
+    conn: Connection
+) -> None:
+    """Entry point of a cluster process: run one bot owning a range of shards."""
+    from .bot import DiscordBot
+
+    logging.basicConfig(level=logging.INFO, format=f"[cluster {cluster_id}] %(levelname)s:%(name)s:%(message)s")
+    client = ClusterClient(conn, cluster_id, cluster_count)
+    bot = DiscordBot(shard_ids=shard_ids, shard_count=shard_count, cluster=client)
+    bot.run(token, log_handler=None)
+
+
+class ClusterLauncher:
+    """Starts one process per cluster, each owning a contiguous range of shards."""
+
+    def __init__(
+        self,
+        token: str,
+        clusters: int = Settings.CLUSTER_COUNT,
+        shard_count: int = Settings.SHARD_COUNT,
+        target: ClusterTarget = run_cluster,
+        start_method: str = 'spawn',
+        stats_interval: float = Settings.CLUSTER_STATS_INTERVAL
+    ):
+        self.token = token
+        self.clusters = max(1, clusters)
+        self.shard_count = shard_count
+        self.target = target
+        self.stats_interval = stats_interval
+        self.hub = ClusterHub()
+        self._context = multiprocessing.get_context(start_method)
+        self._processes: Dict[int, multiprocessing.Process] = {}
+
+    async def recommended_shard_count(self) -> int:
+        """Ask Discord how many shards the bot should run."""
+        client = discord.Client(intents=discord.Intents.none())
+        try:
+            await client.login(self.token)
+            shards, _, _ = await client.http.get_bot_gateway()
+            return shards
+        finally:
+            await client.close()
+
+    async def run(self) -> None:
+        """Start every cluster and relay their messages until all of them exit."""
+        if self.shard_count <= 0:
+            self.shard_count = await self.recommended_shard_count()
+
+        ranges = shard_ranges(self.shard_count, self.clusters)
+        logger.info(f"Starting {len(ranges)} cluster(s) for {self.shard_count} shard(s)")
+
+        for cluster_id, shard_ids in enumerate(ranges):
+            parent_conn, child_conn = self._context.Pipe()
+            process = self._context.Process(
+                target=self.target,
+                args=(self.token, cluster_id, shard_ids, self.shard_count, len(ranges), child_conn),
+                name=f"cluster-{cluster_id}"
+            )
+            process.start()
+            child_conn.close()
+            self.hub.attach(cluster_id, parent_conn)
+            self._processes[cluster_id] = process
+            logger.info(f"Cluster {cluster_id} started with shards {shard_ids[0]}-{shard_ids[-1]}")
+
+        reporter = asyncio.create_task(self._report_stats()) if self.stats_interval > 0 else None
+        try:
+            await asyncio.gather(*(self._wait(cluster_id) for cluster_id in self._processes))
+        finally:
+            if reporter is not None:
+                reporter.cancel()
+            self.stop()
+
+    async def _wait(self, cluster_id: int) -> None:
+        process = self._processes[cluster_id]
+        await asyncio.get_running_loop().run_in_executor(None, process.join)
+        self.hub.detach(cluster_id)
+        logger.info(f"Cluster {cluster_id} exited with code {process.exitcode}")
+
+    async def _report_stats(self) -> None:
+        while True:
+            await asyncio.sleep(self.stats_interval)
+            totals = aggregate_stats(await self.hub.collect_stats())
+            logger.info(f"Cluster stats: {totals}")
+
+    def stop(self) -> None:
+        """Ask every cluster to shut down."""
+        self.hub.shutdown()
+
+    def start(self) -> None:
+        """Run the launcher until every cluster exits."""
+        try:
+            asyncio.run(self.run())
+        except KeyboardInterrupt:
+            for process in self._processes.values():
+                if process.is_alive():
+                    process.terminate()
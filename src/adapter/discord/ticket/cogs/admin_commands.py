@@ -87,7 +87,7 @@ class AdminCommands(commands.Cog):
         
         try:
             # Check if already co-owner
-            is_co_owner = await self.ticket_service.repository.is_co_owner(
+            is_co_owner = await self.ticket_service.is_co_owner(
                 interaction.guild.id, 
                 user.id
             )
@@ -200,8 +200,11 @@ class AdminCommands(commands.Cog):
         if not await self._check_owner_authorization(interaction):
             return
         
+        # Members may have to be fetched when the member cache is disabled
+        await interaction.response.defer()
+        
         try:
-            co_owners = await self.ticket_service.repository.get_co_owners(interaction.guild.id)
+            co_owners = await self.ticket_service.get_co_owners(interaction.guild.id)
             
             if not co_owners:
                 embed = create_embed(
@@ -209,11 +212,15 @@ class AdminCommands(commands.Cog):
                     "No co-owners have been added to this server."
                 )
             else:
+                members = await self.bot.member_resolver.resolve_many(
+                    interaction.guild,
+                    [user_id for co_owner in co_owners for user_id in (co_owner.user_id, co_owner.assigned_by)]
+                )
                 co_owner_list = []
                 for co_owner in co_owners:
-                    user = interaction.guild.get_member(co_owner.user_id)
+                    user = members[co_owner.user_id]
                     if user:
-                        assigned_by = interaction.guild.get_member(co_owner.assigned_by)
+                        assigned_by = members[co_owner.assigned_by]
                         assigned_by_name = assigned_by.display_name if assigned_by else "Unknown"
                         co_owner_list.append(
                             f"• {user.mention} (added by {assigned_by_name})"
@@ -226,10 +233,10 @@ class AdminCommands(commands.Cog):
                     f"**Total:** {len(co_owners)}\n\n" + "\n".join(co_owner_list)
                 )
             
-            await interaction.response.send_message(embed=embed)
+            await interaction.followup.send(embed=embed)
             
         except Exception as e:
-            await interaction.response.send_message(
+            await interaction.followup.send(
                 embed=create_error_embed(
                     "Operation Failed",
                     f"An error occurred: {str(e)}"
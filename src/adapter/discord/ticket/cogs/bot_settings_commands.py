@@ -1,7 +1,6 @@
 import discord
 from discord import app_commands, Interaction
 from discord.ext import commands
-from src.adapter.discord.ticket.database.models import save_bot_settings, get_bot_settings
 
 class BotSettings(commands.Cog):
     def __init__(self, bot):
@@ -11,8 +10,8 @@ class BotSettings(commands.Cog):
     @app_commands.describe(channel="Channel for bot settings")
     async def settings_command(self, interaction: Interaction, channel: discord.TextChannel):
         # Save the settings channel in the database
-        save_bot_settings(channel_id=channel.id)
-        settings = get_bot_settings()
+        await self.bot.bot_settings.save_settings(interaction.guild.id, channel_id=channel.id)
+        settings = await self.bot.bot_settings.get_settings(interaction.guild.id)
         embed = discord.Embed(title="Bot Settings", description="Configure the bot using the buttons below.")
         # Add current settings to embed
         for key, value in settings.items():
@@ -40,7 +39,7 @@ class TicketTypeDropdown(discord.ui.Select):
         super().__init__(placeholder="Choose ticket type...", min_values=1, max_values=1, options=options)
 
     async def callback(self, interaction: Interaction):
-        save_bot_settings(ticket_type=self.values[0])
+        await interaction.client.bot_settings.save_settings(interaction.guild.id, ticket_type=self.values[0])
         await interaction.response.send_message(f"Ticket type set to: {self.values[0]}", ephemeral=True)
 
 class WelcomeMessageModal(discord.ui.Modal, title="Edit Welcome Message"):
@@ -52,7 +51,7 @@ class WelcomeMessageModal(discord.ui.Modal, title="Edit Welcome Message"):
 
     async def on_submit(self, interaction: Interaction):
         # Save new welcome message to database
-        save_bot_settings(welcome_message=self.welcome_message.value)
+        await interaction.client.bot_settings.save_settings(interaction.guild.id, welcome_message=self.welcome_message.value)
         await interaction.response.send_message("Welcome message updated!", ephemeral=True)
 
 async def setup(bot):
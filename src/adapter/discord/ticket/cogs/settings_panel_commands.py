@@ -1,7 +1,6 @@
 import discord
 from discord import app_commands, Interaction
 from discord.ext import commands
-from src.adapter.discord.ticket.database.models import save_bot_settings, get_bot_settings
 
 SETTINGS_CATEGORIES = [
     ("Тикеты", "ticket")
@@ -34,10 +33,10 @@ class SettingsCategoryButton(discord.ui.Button):
 
     async def callback(self, interaction: Interaction):
         # Открытие каталога настроек тикетов
-        await interaction.response.send_message(embed=ticket_settings_embed(), ephemeral=True, view=TicketSettingsView())
+        settings = await interaction.client.bot_settings.get_settings(interaction.guild.id)
+        await interaction.response.send_message(embed=ticket_settings_embed(settings), ephemeral=True, view=TicketSettingsView())
 
-def ticket_settings_embed():
-    settings = get_bot_settings()
+def ticket_settings_embed(settings):
     embed = discord.Embed(title="Настройки тикетов", description="Измените параметры тикетов.")
     embed.add_field(name="Формат тикета", value=settings.get("ticket_format", "text"), inline=False)
     embed.add_field(name="Тип тикета", value=settings.get("ticket_type", "simple"), inline=False)
@@ -63,14 +62,20 @@ class QuestionsModal(discord.ui.Modal, title="Вопросы для формы")
     questions = discord.ui.TextInput(
         label="Вопросы (через ;)",
         style=discord.TextStyle.long,
-        placeholder="Пример: Как вас зовут?;Опишите проблему;Когда это произошло?"
+        placeholder="Пример: Как вас зовут? [short, 2-32];Опишите проблему [long, 20-1000];Скриншот [optional]"
     )
 
     async def on_submit(self, interaction: Interaction):
-        from src.adapter.discord.ticket.database.models import save_bot_settings
         # Ограничение: максимум 10 вопросов
         questions_list = [q.strip() for q in self.questions.value.split(';') if q.strip()][:10]
-        save_bot_settings(form_questions=';'.join(questions_list))
+        try:
+            # Вопросы с параметрами хранятся в form_questions
+            await interaction.client.ticket_service.setup_form_questions(interaction.guild.id, questions_list)
+        except ValueError as e:
+            await interaction.response.send_message(f"Ошибка в вопросах: {e}", ephemeral=True)
+            return
+        # Старый список вопросов в настройках больше не используется
+        await interaction.client.bot_settings.save_settings(interaction.guild.id, form_questions="")
         await interaction.response.send_message("Вопросы формы обновлены!", ephemeral=True)
 class TicketFormatDropdown(discord.ui.Select):
     def __init__(self):
@@ -81,7 +86,7 @@ class TicketFormatDropdown(discord.ui.Select):
         super().__init__(placeholder="Выберите формат тикета...", min_values=1, max_values=1, options=options)
 
     async def callback(self, interaction: Interaction):
-        save_bot_settings(ticket_format=self.values[0])
+        await interaction.client.bot_settings.save_settings(interaction.guild.id, ticket_format=self.values[0])
         await interaction.response.send_message(f"Формат тикета изменён на: {self.values[0]}", ephemeral=True)
 class EditWelcomeButton(discord.ui.Button):
     def __init__(self):
@@ -99,7 +104,7 @@ class TicketTypeDropdown(discord.ui.Select):
         super().__init__(placeholder="Выберите тип тикета...", min_values=1, max_values=1, options=options)
 
     async def callback(self, interaction: Interaction):
-        save_bot_settings(ticket_type=self.values[0])
+        await interaction.client.bot_settings.save_settings(interaction.guild.id, ticket_type=self.values[0])
         await interaction.response.send_message(f"Тип тикета изменён на: {self.values[0]}", ephemeral=True)
 
 class WelcomeMessageModal(discord.ui.Modal, title="Изменить приветствие"):
@@ -110,7 +115,7 @@ class WelcomeMessageModal(discord.ui.Modal, title="Изменить привет
     )
 
     async def on_submit(self, interaction: Interaction):
-        save_bot_settings(welcome_message=self.welcome_message.value)
+        await interaction.client.bot_settings.save_settings(interaction.guild.id, welcome_message=self.welcome_message.value)
         await interaction.response.send_message("Приветствие обновлено!", ephemeral=True)
 
 async def setup(bot):
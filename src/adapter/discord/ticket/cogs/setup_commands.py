@@ -9,6 +9,8 @@ from ..utils.helpers import (
     create_success_embed, create_error_embed, create_embed,
     validate_channel_permissions
 )
+from ..utils.form_pages import format_question_spec
+from ..use_case.idle_closer import IDLE_HOURS_SETTING
 
 
 class SetupCommands(commands.Cog):
@@ -27,7 +29,7 @@ class SetupCommands(commands.Cog):
             )
             return False
         
-        is_authorized = await self.ticket_service.is_authorized(
+        is_authorized = await self.ticket_service.can_manage(
             interaction.guild, 
             interaction.user
         )
@@ -142,7 +144,7 @@ class SetupCommands(commands.Cog):
         description="Set up form questions for form-type tickets"
     )
     @app_commands.describe(
-        questions="Questions separated by semicolons (;). Max 10 questions."
+        questions="Questions separated by semicolons (;), each optionally with [short|long, min-max, optional]. Max 10."
     )
     async def ticket_questions(
         self,
@@ -175,7 +177,7 @@ class SetupCommands(commands.Cog):
             
             # Create response embed
             questions_text = "\n".join([
-                f"{i}. {q.text}" 
+                f"{i}. {format_question_spec(q)}" 
                 for i, q in enumerate(form_questions, 1)
             ])
             
@@ -275,8 +277,9 @@ class SetupCommands(commands.Cog):
             return
         
         try:
-            # Get settings
-            settings = await self.ticket_service.get_guild_settings(interaction.guild.id)
+            # Get settings, roles and questions in one lookup
+            config = await self.ticket_service.get_guild_config(interaction.guild.id)
+            settings = config.settings
             
             if not settings:
                 await interaction.response.send_message(
@@ -289,9 +292,8 @@ class SetupCommands(commands.Cog):
                 )
                 return
             
-            # Get additional info
-            ticket_roles = await self.ticket_service.get_ticket_roles(interaction.guild.id)
-            form_questions = await self.ticket_service.get_form_questions(interaction.guild.id)
+            ticket_roles = config.ticket_roles
+            form_questions = config.form_questions
             
             # Create status embed
             embed = create_embed(
@@ -347,6 +349,13 @@ class SetupCommands(commands.Cog):
                     inline=True
                 )
             
+            idle_seconds = await self.bot.idle_closer.threshold(interaction.guild.id)
+            embed.add_field(
+                name="Auto-close",
+                value=f"After {idle_seconds / 3600:g} hours without activity" if idle_seconds else "Disabled",
+                inline=True
+            )
+            
             await interaction.response.send_message(embed=embed)
             
         except Exception as e:
@@ -358,6 +367,37 @@ class SetupCommands(commands.Cog):
                 ephemeral=True
             )
 
+    @app_commands.command(
+        name="ticket-idle",
+        description="Close tickets automatically after a period without activity"
+    )
+    @app_commands.describe(
+        hours="Hours without activity before a ticket is closed, 0 to disable"
+    )
+    async def ticket_idle(
+        self,
+        interaction: discord.Interaction,
+        hours: app_commands.Range[float, 0, 8760]
+    ):
+        """Set the inactivity threshold of the server's tickets."""
+        if not await self._check_authorization(interaction):
+            return
+        
+        await self.bot.bot_settings.save_settings(interaction.guild.id, **{IDLE_HOURS_SETTING: hours})
+        tickets = self.bot.idle_closer.reschedule_guild(interaction.guild.id)
+        
+        if hours:
+            description = (
+                f"Tickets without activity for {hours:g} hours will be closed.\n"
+                f"A warning is posted in the ticket before it closes. {tickets} open ticket(s) affected."
+            )
+        else:
+            description = "Inactive tickets will no longer be closed automatically."
+        await interaction.response.send_message(
+            embed=create_success_embed("Auto-close Updated", description),
+            ephemeral=True
+        )
+
     @ticket_setup.autocomplete('ticket_type')
     async def ticket_type_autocomplete(
         self,
@@ -1,219 +1,123 @@
+"""Ticket commands for users and staff."""
 import discord
 from discord import app_commands, Interaction
 from discord.ext import commands
 import asyncio
-from src.adapter.discord.ticket.database.models import get_bot_settings
-    return discord.Embed(title=title, description=description, color=discord.Color.red())
+from ..config.settings import Settings
+from typing import List
+from ..domain.entities import TicketType, FormQuestion, FormResponse, FormSession
+from ..utils.form_pages import (
+    FIELDS_PER_PAGE, LABEL_MAX_LENGTH, PLACEHOLDER_MAX_LENGTH,
+    answers_text, check_answer, format_question_spec, page_count, paginate, parse_questions
+)
+from ..utils.helpers import (
+    create_embed, create_success_embed, create_error_embed,
+    create_form_responses_embed, send_dm_safely
+)
+
+
+class TicketCommands(commands.Cog):
+    """Commands for creating and closing tickets."""
+
+    def __init__(self, bot):
         self.bot = bot
+        self.ticket_service = bot.ticket_service
+        self.rest = bot.rest
         self.active_forms = {}
+        # Settings panel forms in progress, keyed by (guild_id, user_id)
+        self.form_sessions = bot.form_sessions
 
     @app_commands.command(name="ticket", description="Создать новый тикет")
     async def ticket(self, interaction: Interaction):
-        settings = get_bot_settings()
+        """Create a ticket using the server's configuration."""
+        if not interaction.guild:
+            await interaction.response.send_message(
+                embed=create_error_embed("Error", "This command can only be used in a server."),
+                ephemeral=True
+            )
+            return
+
+        # Servers configured with /ticket-setup use the ticket service
+        guild_settings = await self.ticket_service.get_guild_settings(interaction.guild.id)
+        if guild_settings:
+            await self._create_configured_ticket(interaction, guild_settings)
+            return
+
+        # Otherwise fall back to the settings panel configuration
+        settings = await self.bot.bot_settings.get_settings(interaction.guild.id)
         ticket_format = settings.get("ticket_format", "text")
         welcome_message = settings.get("welcome_message", "Добро пожаловать в тикет!")
         ticket_type = settings.get("ticket_type", "simple")
         forum_channel_id = int(settings.get("target_channel", 0))
-        form_questions = settings.get("form_questions", "")
+        questions = await self.panel_form_questions(interaction.guild.id, settings) if ticket_type == "form" else []
 
-        if ticket_type == "form" and form_questions:
+        if questions:
             # Запуск формы: отправить вопросы пользователю
-            questions = [q.strip() for q in form_questions.split(';') if q.strip()]
-            await interaction.response.send_message(embed=create_embed("Форма тикета", "Ответьте на вопросы ниже."), ephemeral=True, view=TicketFormView(questions, ticket_format, forum_channel_id, welcome_message))
+            specs = [format_question_spec(question) for question in questions]
+            session = self.form_sessions.get(interaction.guild.id, interaction.user.id)
+            if session is None or session.questions != specs:
+                session = FormSession(interaction.guild.id, interaction.user.id, specs, ticket_format, forum_channel_id, welcome_message)
+                self.form_sessions.put(session)
+            # Страница формы открывается сразу; начатая форма продолжается с первого неотвеченного вопроса
+            await interaction.response.send_modal(FormPageModal(session, questions))
             return
 
         # Обычный тикет
         await self.create_ticket(interaction, ticket_format, forum_channel_id, welcome_message)
 
-    async def create_ticket(self, interaction, ticket_format, forum_channel_id, welcome_message, form_answers=None):
-        if ticket_format == "forum":
-            forum_channel = interaction.guild.get_channel(forum_channel_id)
-            if forum_channel and isinstance(forum_channel, discord.ForumChannel):
-                thread = await forum_channel.create_thread(name=f"Тикет от {interaction.user.display_name}", content=welcome_message)
-                if form_answers:
-                    await thread.send(embed=create_embed("Ответы пользователя", form_answers))
-                await interaction.followup.send(embed=create_success_embed("Тикет создан", f"Ваш тикет: {thread.mention}"), ephemeral=True)
-            else:
-                await interaction.followup.send(embed=create_error_embed("Ошибка", "Канал форума не найден или не задан."), ephemeral=True)
-        else:
-            overwrites = {
-                interaction.guild.default_role: discord.PermissionOverwrite(view_channel=False),
-                interaction.user: discord.PermissionOverwrite(view_channel=True, send_messages=True)
-            }
-            category = None
-            for cat in interaction.guild.categories:
-                if cat.name.lower() == "tickets":
-                    category = cat
-                    break
-            channel = await interaction.guild.create_text_channel(
-                name=f"ticket-{interaction.user.display_name}",
-                overwrites=overwrites,
-                category=category
-            )
-            await channel.send(embed=create_embed("Добро пожаловать!", welcome_message))
-            if form_answers:
-                await channel.send(embed=create_embed("Ответы пользователя", form_answers))
-            await interaction.followup.send(embed=create_success_embed("Тикет создан", f"Ваш тикет: {channel.mention}"), ephemeral=True)
-
-    @app_commands.command(name="close-ticket", description="Закрыть текущий тикет")
-    async def close_ticket(self, interaction: Interaction):
-        # Проверка: команда вызывается в тикет-канале или треде
-        channel = interaction.channel
-        if isinstance(channel, discord.TextChannel) and channel.name.startswith("ticket-"):
-            await interaction.response.send_message(embed=create_embed("Подтверждение", "Вы уверены, что хотите закрыть тикет?"), view=CloseTicketView(channel), ephemeral=True)
-        elif isinstance(channel, discord.Thread) and channel.parent and isinstance(channel.parent, discord.ForumChannel):
-            await interaction.response.send_message(embed=create_embed("Подтверждение", "Вы уверены, что хотите закрыть тикет?"), view=CloseTicketView(channel), ephemeral=True)
-        else:
-            await interaction.response.send_message(embed=create_error_embed("Ошибка", "Эта команда доступна только в тикет-канале или треде."), ephemeral=True)
-
-class TicketFormView(discord.ui.View):
-    def __init__(self, questions, ticket_format, forum_channel_id, welcome_message):
-        super().__init__(timeout=None)
-        self.questions = questions
-        self.ticket_format = ticket_format
-        self.forum_channel_id = forum_channel_id
-        self.welcome_message = welcome_message
-        self.answers = {}
-        self.current = 0
-        self.add_item(NextQuestionButton(self))
-
-class NextQuestionButton(discord.ui.Button):
-    def __init__(self, form_view):
-        super().__init__(label="Ответить", style=discord.ButtonStyle.primary)
-        self.form_view = form_view
+    async def panel_form_questions(self, guild_id: int, settings=None) -> List[FormQuestion]:
+        """Get the questions of the settings panel form from form_questions.
 
-    async def callback(self, interaction: Interaction):
-        if self.form_view.current < len(self.form_view.questions):
-            question = self.form_view.questions[self.form_view.current]
-            await interaction.response.send_modal(FormAnswerModal(self.form_view, question))
-        else:
-            # Все вопросы заданы, создать тикет
-            answers_text = "\n".join([f"**{q}**\n{self.form_view.answers.get(i, '')}" for i, q in enumerate(self.form_view.questions)])
-            cog = interaction.client.get_cog("TicketCommands")
-            if cog:
-                await cog.create_ticket(interaction, self.form_view.ticket_format, self.form_view.forum_channel_id, self.form_view.welcome_message, answers_text)
-            else:
-                await interaction.response.send_message(embed=create_error_embed("Ошибка", "Команда тикетов не найдена."), ephemeral=True)
+        Panels saved before questions were stored there keep them as specs
+        in the bot settings; those are parsed as a fallback.
+        """
+        questions = await self.ticket_service.get_form_questions(guild_id)
+        if questions:
+            return questions
+        if settings is None:
+            settings = await self.bot.bot_settings.get_settings(guild_id)
+        return parse_questions([q.strip() for q in settings.get("form_questions", "").split(';') if q.strip()])
 
-class FormAnswerModal(discord.ui.Modal):
-    def __init__(self, form_view, question):
-        super().__init__(title="Ответ на вопрос")
-        self.form_view = form_view
-        self.question = question
-        self.answer = discord.ui.TextInput(label=question, style=discord.TextStyle.long)
-        self.add_item(self.answer)
-
-    async def on_submit(self, interaction: Interaction):
-        self.form_view.answers[self.form_view.current] = self.answer.value
-        self.form_view.current += 1
-        if self.form_view.current < len(self.form_view.questions):
-            await interaction.response.send_message(embed=create_embed("Следующий вопрос", self.form_view.questions[self.form_view.current]), view=self.form_view, ephemeral=True)
-        else:
-            answers_text = "\n".join([f"**{q}**\n{self.form_view.answers.get(i, '')}" for i, q in enumerate(self.form_view.questions)])
-            cog = interaction.client.get_cog("TicketCommands")
-            if cog:
-                await cog.create_ticket(interaction, self.form_view.ticket_format, self.form_view.forum_channel_id, self.form_view.welcome_message, answers_text)
-            else:
-                await interaction.response.send_message(embed=create_error_embed("Ошибка", "Команда тикетов не найдена."), ephemeral=True)
-
-class CloseTicketView(discord.ui.View):
-    def __init__(self, channel):
-        super().__init__(timeout=None)
-        self.channel = channel
-        self.add_item(CloseTicketButton(self))
-
-class CloseTicketButton(discord.ui.Button):
-    def __init__(self, close_view):
-        super().__init__(label="Закрыть тикет", style=discord.ButtonStyle.danger)
-        self.close_view = close_view
-
-    async def callback(self, interaction: Interaction):
-        try:
-            await self.close_view.channel.delete()
-            await interaction.response.send_message(embed=create_success_embed("Тикет закрыт", "Канал удалён."), ephemeral=True)
-        except Exception as e:
-            await interaction.response.send_message(embed=create_error_embed("Ошибка", f"Не удалось закрыть тикет: {str(e)}"), ephemeral=True)
-
-async def setup(bot):
-    await bot.add_cog(TicketCommands(bot))
-"""Ticket commands for users and staff."""
-import discord
-from discord import app_commands, Interaction
-from discord.ext import commands
-import asyncio
-from src.adapter.discord.ticket.database.models import get_bot_settings
-# --- Embed helpers ---
-def create_embed(title, description, color=discord.Color.blurple()):
-    return discord.Embed(title=title, description=description, color=color)
-
-class TicketCommands(commands.Cog):
-    def __init__(self, bot):
-        self.bot = bot
-        ticket_type = settings.get("ticket_type", "simple")
-        forum_channel_id = int(settings.get("target_channel", 0))
+    async def create_ticket(self, interaction, ticket_format, forum_channel_id, welcome_message, form_answers=None):
+        """Create a ticket channel or forum thread from the settings panel configuration."""
+        if not interaction.response.is_done():
+            await interaction.response.defer(ephemeral=True)
 
         try:
             if ticket_format == "forum":
                 forum_channel = interaction.guild.get_channel(forum_channel_id)
                 if forum_channel and isinstance(forum_channel, discord.ForumChannel):
-                    thread = await forum_channel.create_thread(name=f"Тикет от {interaction.user.display_name}", content=welcome_message)
-                    await interaction.response.send_message(
-                        embed=create_success_embed("Тикет создан", f"Ваш тикет: {thread.mention}"), ephemeral=True)
+                    created = await self.rest.run(
+                        'thread_create', forum_channel.id,
+                        lambda: forum_channel.create_thread(name=f"Тикет от {interaction.user.display_name}", content=welcome_message)
+                    )
+                    thread = created.thread
+                    await self.ticket_service.register_channel_ticket(interaction.guild.id, interaction.user.id, thread.id)
+                    if form_answers:
+                        await self.rest.send(thread, embed=create_embed("Ответы пользователя", form_answers))
+                    await self.rest.followup(interaction, embed=create_success_embed("Тикет создан", f"Ваш тикет: {thread.mention}"), ephemeral=True)
                 else:
-                    await interaction.response.send_message(
-                        embed=create_error_embed("Ошибка", "Канал форума не найден или не задан."), ephemeral=True)
+                    await self.rest.followup(interaction, embed=create_error_embed("Ошибка", "Канал форума не найден или не задан."), ephemeral=True)
             else:
                 overwrites = {
                     interaction.guild.default_role: discord.PermissionOverwrite(view_channel=False),
                     interaction.user: discord.PermissionOverwrite(view_channel=True, send_messages=True)
                 }
-                category = None
-                for cat in interaction.guild.categories:
-                    if cat.name.lower() == "tickets":
-                        category = cat
-                        break
-                channel = await interaction.guild.create_text_channel(
-                    name=f"ticket-{interaction.user.display_name}",
-                    overwrites=overwrites,
-                    category=category
+                channel = await self.ticket_service.open_ticket_channel(
+                    interaction.guild,
+                    f"ticket-{interaction.user.display_name}",
+                    overwrites
                 )
-                await channel.send(embed=create_embed("Добро пожаловать!", welcome_message))
-                await interaction.response.send_message(
-                    embed=create_success_embed("Тикет создан", f"Ваш тикет: {channel.mention}"), ephemeral=True)
+                await self.ticket_service.register_channel_ticket(interaction.guild.id, interaction.user.id, channel.id)
+                await self.rest.send(channel, embed=create_embed("Добро пожаловать!", welcome_message))
+                if form_answers:
+                    await self.rest.send(channel, embed=create_embed("Ответы пользователя", form_answers))
+                await self.rest.followup(interaction, embed=create_success_embed("Тикет создан", f"Ваш тикет: {channel.mention}"), ephemeral=True)
         except Exception as e:
-            await interaction.response.send_message(
-                embed=create_error_embed("Ошибка", f"Не удалось создать тикет: {str(e)}"), ephemeral=True)
-
-    @app_commands.command(name="ticket-setup", description="Панель создания тикета через кнопку")
-    async def ticket_setup(self, interaction: Interaction):
-        embed = discord.Embed(title="Создать тикет", description="Нажмите кнопку ниже для создания тикета.")
-        view = TicketCreateView()
-        await interaction.response.send_message(embed=embed, view=view, ephemeral=True)
-
-class TicketCreateView(discord.ui.View):
-    def __init__(self):
-        super().__init__(timeout=None)
-        self.add_item(TicketCreateButton())
-
-class TicketCreateButton(discord.ui.Button):
-    def __init__(self):
-        super().__init__(label="Создать тикет", style=discord.ButtonStyle.success)
+            await self.rest.followup(interaction, embed=create_error_embed("Ошибка", f"Не удалось создать тикет: {str(e)}"), ephemeral=True)
 
-    async def callback(self, interaction: Interaction):
-        cog = interaction.client.get_cog("TicketCommands")
-        if cog:
-            await cog.ticket(interaction)
-        else:
-            await interaction.response.send_message(
-                embed=create_error_embed("Ошибка", "Команда тикетов не найдена."), ephemeral=True)
-
-async def setup(bot):
-    await bot.add_cog(TicketCommands(bot))
-                ),
-                ephemeral=True
-            )
-            return
-        
+    async def _create_configured_ticket(self, interaction, settings):
+        """Create a ticket for a server configured with /ticket-setup."""
         # Check if user already has an active ticket
         user_id = interaction.user.id
         if user_id in self.active_forms:
@@ -225,33 +129,34 @@ async def setup(bot):
                 ephemeral=True
             )
             return
-        
+
         try:
             if settings.ticket_type == TicketType.SIMPLE:
                 await self._create_simple_ticket(interaction, settings)
             else:  # FORM
                 await self._create_form_ticket(interaction, settings)
-                
+
         except Exception as e:
-            await interaction.followup.send(
+            await self.rest.followup(
+                interaction,
                 embed=create_error_embed(
                     "Ticket Creation Failed",
                     f"An error occurred while creating your ticket: {str(e)}"
                 ),
                 ephemeral=True
             )
-    
+
     async def _create_simple_ticket(self, interaction, settings):
         """Create a simple ticket with a private channel."""
         await interaction.response.defer(ephemeral=True)
-        
+
         try:
             channel, ticket = await self.ticket_service.create_simple_ticket(
                 interaction.guild,
                 interaction.user,
                 settings
             )
-            
+
             # Send welcome message to ticket channel
             welcome_embed = create_embed(
                 "🎫 Ticket Created",
@@ -264,22 +169,24 @@ async def setup(bot):
                       f"**Created:** <t:{int(discord.utils.utcnow().timestamp())}:F>",
                 inline=False
             )
-            
+
             # Add close button
-            view = TicketCloseView(self.ticket_service)
-            await channel.send(embed=welcome_embed, view=view)
-            
+            view = TicketCloseView(ticket.id)
+            await self.rest.send(channel, embed=welcome_embed, view=view)
+
             # Notify user
-            await interaction.followup.send(
+            await self.rest.followup(
+                interaction,
                 embed=create_success_embed(
                     "Ticket Created",
                     f"Your ticket has been created: {channel.mention}"
                 ),
                 ephemeral=True
             )
-            
+
         except discord.Forbidden:
-            await interaction.followup.send(
+            await self.rest.followup(
+                interaction,
                 embed=create_error_embed(
                     "Permission Error",
                     "I don't have permission to create channels in this server."
@@ -288,7 +195,7 @@ async def setup(bot):
             )
         except Exception as e:
             raise e
-    
+
     async def _create_form_ticket(self, interaction, settings):
         """Create a form ticket by collecting responses."""
         # Get form questions
@@ -302,7 +209,7 @@ async def setup(bot):
                 ephemeral=True
             )
             return
-        
+
         await interaction.response.send_message(
             embed=create_embed(
                 "📝 Ticket Form",
@@ -311,71 +218,73 @@ async def setup(bot):
             ),
             ephemeral=True
         )
-        
+
         # Mark user as having active form
         self.active_forms[interaction.user.id] = True
-        
+
         try:
             responses = []
-            
+
             for question in questions:
                 # Ask question
+                question_text = question.text if question.required else f"{question.text}\n*Optional, answer `-` to skip.*"
                 question_embed = create_embed(
                     f"Question {question.order}/{len(questions)}",
-                    question.text
+                    question_text
                 )
-                
-                await interaction.followup.send(embed=question_embed, ephemeral=True)
-                
-                # Wait for response
-                def check(m):
-                    return (m.author.id == interaction.user.id and 
-                           isinstance(m.channel, discord.DMChannel))
-                
+
+                await self.rest.followup(interaction, embed=question_embed, ephemeral=True)
+
                 try:
                     # Try to get response via DM first
                     dm_sent = await send_dm_safely(
                         interaction.user,
                         create_embed(
                             f"Question {question.order}/{len(questions)}",
-                            f"{question.text}\n\n*Please respond to this message.*"
+                            f"{question_text}\n\n*Please respond to this message.*"
                         )
                     )
-                    
+
                     if dm_sent:
-                        response_msg = await self.bot.wait_for(
-                            'message',
-                            check=check,
-                            timeout=Settings.FORM_TIMEOUT_SECONDS
-                        )
+                        # Already open after the DM above, so this makes no request
+                        answer_channel_id = (await interaction.user.create_dm()).id
                     else:
-                        # Fallback: wait for response in any channel
-                        def fallback_check(m):
-                            return m.author.id == interaction.user.id
-                        
-                        await interaction.followup.send(
+                        # Fallback: wait for response in the channel the form was started from
+                        await self.rest.followup(
+                            interaction,
                             embed=create_embed(
                                 "DM Failed",
                                 "I couldn't send you a DM. Please respond here."
                             ),
                             ephemeral=True
                         )
-                        
-                        response_msg = await self.bot.wait_for(
-                            'message',
-                            check=fallback_check,
+                        answer_channel_id = interaction.channel_id
+
+                    while True:
+                        response_msg = await self.bot.form_answers.wait(
+                            interaction.user.id,
+                            answer_channel_id,
                             timeout=Settings.FORM_TIMEOUT_SECONDS
                         )
-                    
+                        answer, error = check_answer(question, response_msg.content)
+                        if error is None:
+                            break
+                        await self.rest.followup(
+                            interaction,
+                            embed=create_error_embed("Invalid Answer", f"{error} Please answer again."),
+                            ephemeral=True
+                        )
+
                     # Store response
                     responses.append(FormResponse(
                         question_order=question.order,
                         question_text=question.text,
-                        response_text=response_msg.content
+                        response_text=answer
                     ))
-                    
+
                 except asyncio.TimeoutError:
-                    await interaction.followup.send(
+                    await self.rest.followup(
+                        interaction,
                         embed=create_error_embed(
                             "Form Timeout",
                             "You took too long to respond. Please start over."
@@ -383,7 +292,7 @@ async def setup(bot):
                         ephemeral=True
                     )
                     return
-            
+
             # Create ticket and save responses
             ticket = await self.ticket_service.create_form_ticket(
                 interaction.guild,
@@ -391,7 +300,7 @@ async def setup(bot):
                 settings,
                 responses
             )
-            
+
             # Send responses to target channel
             if settings.target_channel_id:
                 target_channel = interaction.guild.get_channel(settings.target_channel_id)
@@ -402,20 +311,22 @@ async def setup(bot):
                         value=str(ticket.id),
                         inline=True
                     )
-                    
-                    await target_channel.send(embed=response_embed)
-            
+
+                    await self.rest.send(target_channel, embed=response_embed)
+
             # Notify user
-            await interaction.followup.send(
+            await self.rest.followup(
+                interaction,
                 embed=create_success_embed(
                     "Form Submitted",
                     f"Your ticket form has been submitted successfully!\n**Ticket ID:** {ticket.id}"
                 ),
                 ephemeral=True
             )
-            
+
         except Exception as e:
-            await interaction.followup.send(
+            await self.rest.followup(
+                interaction,
                 embed=create_error_embed(
                     "Form Error",
                     f"An error occurred while processing your form: {str(e)}"
@@ -425,7 +336,7 @@ async def setup(bot):
         finally:
             # Remove from active forms
             self.active_forms.pop(interaction.user.id, None)
-    
+
     @app_commands.command(
         name="close-ticket",
         description="Close the current ticket (staff only)"
@@ -438,31 +349,28 @@ async def setup(bot):
                 ephemeral=True
             )
             return
-        
+
         # Check if this is a ticket channel
         ticket = await self.ticket_service.get_ticket_by_channel(interaction.channel.id)
         if not ticket:
-            await interaction.response.send_message(
-                embed=create_error_embed(
-                    "Not a Ticket",
-                    "This command can only be used in ticket channels."
-                ),
-                ephemeral=True
-            )
+            # Panel tickets created before they were recorded have no database record
+            channel = interaction.channel
+            if isinstance(channel, discord.TextChannel) and channel.name.startswith("ticket-"):
+                await interaction.response.send_message(embed=create_embed("Подтверждение", "Вы уверены, что хотите закрыть тикет?"), view=CloseTicketView(), ephemeral=True)
+            elif isinstance(channel, discord.Thread) and channel.parent and isinstance(channel.parent, discord.ForumChannel):
+                await interaction.response.send_message(embed=create_embed("Подтверждение", "Вы уверены, что хотите закрыть тикет?"), view=CloseTicketView(), ephemeral=True)
+            else:
+                await interaction.response.send_message(
+                    embed=create_error_embed(
+                        "Not a Ticket",
+                        "This command can only be used in ticket channels."
+                    ),
+                    ephemeral=True
+                )
             return
-        
-        # Check permissions (staff roles or ticket owner)
-        is_authorized = await self.ticket_service.is_authorized(interaction.guild, interaction.user)
-        ticket_roles = await self.ticket_service.get_ticket_roles(interaction.guild.id)
-        
-        has_ticket_role = any(
-            role.id in [tr.role_id for tr in ticket_roles]
-            for role in interaction.user.roles
-        )
-        
-        is_ticket_owner = ticket.user_id == interaction.user.id
-        
-        if not (is_authorized or has_ticket_role or is_ticket_owner):
+
+        # Check permissions (owner, co-owners, staff roles or ticket owner)
+        if not await self.ticket_service.can_manage(interaction.guild, interaction.user, ticket):
             await interaction.response.send_message(
                 embed=create_error_embed(
                     "Access Denied",
@@ -471,7 +379,7 @@ async def setup(bot):
                 ephemeral=True
             )
             return
-        
+
         # Close ticket
         view = TicketCloseConfirmView(self.ticket_service, ticket)
         await interaction.response.send_message(
@@ -483,41 +391,208 @@ async def setup(bot):
             ephemeral=True
         )
 
+    @app_commands.command(name="ticket-panel", description="Панель создания тикета через кнопку")
+    async def ticket_panel(self, interaction: Interaction):
+        embed = discord.Embed(title="Создать тикет", description="Нажмите кнопку ниже для создания тикета.")
+        view = TicketCreateView()
+        await interaction.response.send_message(embed=embed, view=view, ephemeral=True)
 
-class TicketCloseView(discord.ui.View):
-    """View with close ticket button."""
-    
-    def __init__(self, ticket_service):
+
+# Every button below is a DynamicItem: its state lives in the custom_id, so the
+# buttons keep working after a restart and no View object is stored per message.
+
+class TicketCreateButton(discord.ui.DynamicItem[discord.ui.Button], template=r"ticket:create"):
+    """Button on the ticket panel that runs /ticket."""
+
+    def __init__(self):
+        super().__init__(discord.ui.Button(
+            label="Создать тикет",
+            style=discord.ButtonStyle.success,
+            custom_id="ticket:create"
+        ))
+
+    @classmethod
+    async def from_custom_id(cls, interaction, item, match):
+        return cls()
+
+    async def callback(self, interaction: Interaction):
+        cog = interaction.client.get_cog("TicketCommands")
+        if cog:
+            await cog.ticket.callback(cog, interaction)
+        else:
+            await interaction.response.send_message(
+                embed=create_error_embed("Ошибка", "Команда тикетов не найдена."), ephemeral=True)
+
+
+class TicketCreateView(discord.ui.View):
+    def __init__(self):
         super().__init__(timeout=None)
-        self.ticket_service = ticket_service
-    
-    @discord.ui.button(
-        label="Close Ticket",
-        style=discord.ButtonStyle.danger,
-        emoji="🔒"
-    )
-    async def close_ticket(self, interaction: discord.Interaction, button: discord.ui.Button):
+        self.add_item(TicketCreateButton())
+
+
+class NextQuestionButton(discord.ui.DynamicItem[discord.ui.Button], template=r"ticket:form:next"):
+    """Button that opens the next page of the form.
+
+    Discord does not allow answering a modal submit with another modal, so
+    the pages are chained with this button.
+    """
+
+    def __init__(self, label: str = "Продолжить"):
+        super().__init__(discord.ui.Button(
+            label=label,
+            style=discord.ButtonStyle.primary,
+            custom_id="ticket:form:next"
+        ))
+
+    @classmethod
+    async def from_custom_id(cls, interaction, item, match):
+        return cls()
+
+    async def callback(self, interaction: Interaction):
+        cog = interaction.client.get_cog("TicketCommands")
+        session = cog.form_sessions.get(interaction.guild_id, interaction.user.id) if cog else None
+        if session is None:
+            await interaction.response.send_message(
+                embed=create_error_embed("Форма устарела", "Начните заново командой /ticket."), ephemeral=True)
+            return
+
+        questions = await cog.panel_form_questions(session.guild_id)
+        if [format_question_spec(question) for question in questions] != session.questions:
+            # Вопросы изменились, пока форма заполнялась
+            cog.form_sessions.complete(session.guild_id, session.user_id)
+            await interaction.response.send_message(
+                embed=create_error_embed("Форма устарела", "Начните заново командой /ticket."), ephemeral=True)
+        elif not session.finished:
+            await interaction.response.send_modal(FormPageModal(session, questions))
+        else:
+            # Все вопросы заданы, создать тикет
+            await _finish_form(cog, interaction, session, questions)
+
+
+class TicketFormView(discord.ui.View):
+    def __init__(self, label: str = "Продолжить"):
+        super().__init__(timeout=None)
+        self.add_item(NextQuestionButton(label))
+
+
+async def _finish_form(cog, interaction: Interaction, session: FormSession, questions: List[FormQuestion]):
+    """Complete a settings panel form and open its ticket."""
+    cog.form_sessions.complete(session.guild_id, session.user_id)
+    answers = answers_text(questions, session.answers)
+    await cog.create_ticket(interaction, session.ticket_format, session.forum_channel_id, session.welcome_message, answers)
+
+
+class FormPageModal(discord.ui.Modal):
+    """One page of a settings panel form: up to five questions at once.
+
+    The page starts at the session's first unanswered question. Questions
+    come from form_questions, as returned by panel_form_questions.
+    """
+
+    def __init__(self, session: FormSession, questions: List[FormQuestion]):
+        pages = page_count(len(questions))
+        page = session.current // FIELDS_PER_PAGE
+        title = "Форма тикета" if pages == 1 else f"Форма тикета ({page + 1}/{pages})"
+        super().__init__(title=title)
+        self.session = session
+        self.questions = questions
+        self.start = page * FIELDS_PER_PAGE
+        self.inputs = []
+        for question in paginate(questions)[page]:
+            text_input = discord.ui.TextInput(
+                label=question.text[:LABEL_MAX_LENGTH],
+                placeholder=question.text[:PLACEHOLDER_MAX_LENGTH] if len(question.text) > LABEL_MAX_LENGTH else None,
+                style=discord.TextStyle.short if question.style == "short" else discord.TextStyle.long,
+                min_length=question.min_length or None,
+                max_length=question.max_length,
+                required=question.required
+            )
+            self.inputs.append(text_input)
+            self.add_item(text_input)
+
+    async def on_submit(self, interaction: Interaction):
+        session = self.session
+        for offset, text_input in enumerate(self.inputs):
+            session.answers[self.start + offset] = text_input.value
+        session.current = self.start + len(self.inputs)
+
+        cog = interaction.client.get_cog("TicketCommands")
+        if cog is None:
+            await interaction.response.send_message(embed=create_error_embed("Ошибка", "Команда тикетов не найдена."), ephemeral=True)
+        elif not session.finished:
+            cog.form_sessions.update(session)
+            pages = page_count(len(session.questions))
+            page = session.current // FIELDS_PER_PAGE
+            await interaction.response.send_message(
+                embed=create_embed("Форма тикета", f"Страница {page}/{pages} сохранена. Нажмите кнопку, чтобы продолжить."),
+                view=TicketFormView(f"Продолжить ({page + 1}/{pages})"),
+                ephemeral=True
+            )
+        else:
+            await _finish_form(cog, interaction, session, self.questions)
+
+
+class CloseTicketButton(discord.ui.DynamicItem[discord.ui.Button], template=r"ticket:legacy-close"):
+    """Confirms closing a settings panel ticket that has no database record."""
+
+    def __init__(self):
+        super().__init__(discord.ui.Button(
+            label="Закрыть тикет",
+            style=discord.ButtonStyle.danger,
+            custom_id="ticket:legacy-close"
+        ))
+
+    @classmethod
+    async def from_custom_id(cls, interaction, item, match):
+        return cls()
+
+    async def callback(self, interaction: Interaction):
+        try:
+            await interaction.response.send_message(embed=create_success_embed("Тикет закрыт", "Канал удалён."), ephemeral=True)
+            await interaction.client.rest.delete_channel(interaction.channel)
+        except Exception as e:
+            await interaction.followup.send(embed=create_error_embed("Ошибка", f"Не удалось закрыть тикет: {str(e)}"), ephemeral=True)
+
+
+class CloseTicketView(discord.ui.View):
+    def __init__(self):
+        super().__init__(timeout=None)
+        self.add_item(CloseTicketButton())
+
+
+class TicketCloseButton(
+    discord.ui.DynamicItem[discord.ui.Button],
+    template=r"ticket:close:(?P<ticket_id>[0-9]+)"
+):
+    """Close button posted in a ticket channel; the ticket id is in the custom_id."""
+
+    def __init__(self, ticket_id: int):
+        super().__init__(discord.ui.Button(
+            label="Close Ticket",
+            style=discord.ButtonStyle.danger,
+            emoji="🔒",
+            custom_id=f"ticket:close:{ticket_id}"
+        ))
+        self.ticket_id = ticket_id
+
+    @classmethod
+    async def from_custom_id(cls, interaction, item, match):
+        return cls(int(match["ticket_id"]))
+
+    async def callback(self, interaction: discord.Interaction):
         """Close ticket button handler."""
+        ticket_service = interaction.client.ticket_service
+
         # Check permissions
-        ticket = await self.ticket_service.get_ticket_by_channel(interaction.channel.id)
-        if not ticket:
+        ticket = await ticket_service.get_ticket_by_channel(interaction.channel.id)
+        if not ticket or ticket.id != self.ticket_id:
             await interaction.response.send_message(
                 embed=create_error_embed("Error", "Ticket not found."),
                 ephemeral=True
             )
             return
-        
-        is_authorized = await self.ticket_service.is_authorized(interaction.guild, interaction.user)
-        ticket_roles = await self.ticket_service.get_ticket_roles(interaction.guild.id)
-        
-        has_ticket_role = any(
-            role.id in [tr.role_id for tr in ticket_roles]
-            for role in interaction.user.roles
-        )
-        
-        is_ticket_owner = ticket.user_id == interaction.user.id
-        
-        if not (is_authorized or has_ticket_role or is_ticket_owner):
+
+        if not await ticket_service.can_manage(interaction.guild, interaction.user, ticket):
             await interaction.response.send_message(
                 embed=create_error_embed(
                     "Access Denied",
@@ -526,9 +601,9 @@ class TicketCloseView(discord.ui.View):
                 ephemeral=True
             )
             return
-        
+
         # Confirm close
-        view = TicketCloseConfirmView(self.ticket_service, ticket)
+        view = TicketCloseConfirmView(ticket_service, ticket)
         await interaction.response.send_message(
             embed=create_embed(
                 "Close Ticket",
@@ -539,14 +614,22 @@ class TicketCloseView(discord.ui.View):
         )
 
 
+class TicketCloseView(discord.ui.View):
+    """View with the close button of a ticket."""
+
+    def __init__(self, ticket_id: int):
+        super().__init__(timeout=None)
+        self.add_item(TicketCloseButton(ticket_id))
+
+
 class TicketCloseConfirmView(discord.ui.View):
     """Confirmation view for closing tickets."""
-    
+
     def __init__(self, ticket_service, ticket):
         super().__init__(timeout=60)
         self.ticket_service = ticket_service
         self.ticket = ticket
-    
+
     @discord.ui.button(
         label="Yes, Close",
         style=discord.ButtonStyle.danger,
@@ -561,24 +644,29 @@ class TicketCloseConfirmView(discord.ui.View):
                     embed=create_success_embed(
                         "Ticket Closed",
                         f"This ticket has been closed by {interaction.user.mention}.\n"
-                        "The channel will be deleted in 10 seconds."
+                        f"The channel will be deleted in {Settings.CHANNEL_DELETE_DELAY:.0f} seconds."
                     )
                 )
-                
-                # Delete channel after delay
-                await asyncio.sleep(10)
-                await interaction.channel.delete(reason=f"Ticket closed by {interaction.user}")
+
+                # The deletion is stored and survives restarts; nothing waits here
+                await interaction.client.deletion_queue.schedule(
+                    interaction.channel.id,
+                    interaction.guild.id,
+                    reason=f"Ticket closed by {interaction.user}"
+                )
             else:
                 await interaction.response.send_message(
                     embed=create_error_embed("Error", "Failed to close ticket."),
                     ephemeral=True
                 )
         except Exception as e:
-            await interaction.response.send_message(
-                embed=create_error_embed("Error", f"An error occurred: {str(e)}"),
-                ephemeral=True
-            )
-    
+            embed = create_error_embed("Error", f"An error occurred: {str(e)}")
+            # The close may already have been answered when scheduling the deletion failed
+            if interaction.response.is_done():
+                await interaction.followup.send(embed=embed, ephemeral=True)
+            else:
+                await interaction.response.send_message(embed=embed, ephemeral=True)
+
     @discord.ui.button(
         label="Cancel",
         style=discord.ButtonStyle.secondary,
@@ -596,3 +684,5 @@ class TicketCloseConfirmView(discord.ui.View):
 async def setup(bot):
     """Setup function for the cog."""
     await bot.add_cog(TicketCommands(bot))
+    # Route ticket buttons by custom_id, including those sent before a restart
+    bot.add_dynamic_items(TicketCreateButton, NextQuestionButton, CloseTicketButton, TicketCloseButton)
@@ -1,7 +1,7 @@
 """Configuration settings for the ticket system."""
 
 import os
-from typing import Optional
+from typing import Any, Dict, List, Optional
 
 
 class Settings:
@@ -9,10 +9,77 @@ class Settings:
     
     # Database settings
     DATABASE_PATH: str = os.getenv('DATABASE_PATH', 'data/bot.db')
+    DATABASE_READERS: int = int(os.getenv('DATABASE_READERS', '4'))
+    DATABASE_EXECUTOR_QUEUE: int = int(os.getenv('DATABASE_EXECUTOR_QUEUE', '256'))
+    DATABASE_SYNCHRONOUS: str = os.getenv('DATABASE_SYNCHRONOUS', 'NORMAL')
+    DATABASE_CACHE_SIZE: int = int(os.getenv('DATABASE_CACHE_SIZE', '-16000'))  # negative = KiB
+    DATABASE_MMAP_SIZE: int = int(os.getenv('DATABASE_MMAP_SIZE', str(64 * 1024 * 1024)))
+    DATABASE_BUSY_TIMEOUT_MS: int = int(os.getenv('DATABASE_BUSY_TIMEOUT_MS', '5000'))
+    DATABASE_WRITE_BATCH_SIZE: int = int(os.getenv('DATABASE_WRITE_BATCH_SIZE', '64'))
+    DATABASE_WRITE_LATENCY_MS: float = float(os.getenv('DATABASE_WRITE_LATENCY_MS', '2'))
+    DATABASE_WRITE_QUEUE_LIMIT: int = int(os.getenv('DATABASE_WRITE_QUEUE_LIMIT', '1024'))
     
     # Ticket settings
     MAX_QUESTIONS_PER_FORM: int = 10
     TICKET_CHANNEL_PREFIX: str = "ticket-"
+    TICKET_CATEGORY_NAME: str = "tickets"
+    TICKET_CATEGORY_CAPACITY: int = int(os.getenv('TICKET_CATEGORY_CAPACITY', '50'))  # Discord's per-category limit
+    TICKET_CATEGORY_HEADROOM: int = int(os.getenv('TICKET_CATEGORY_HEADROOM', '5'))  # free slots left when the next is created
+    
+    # Warm pool of hidden, pre-created ticket channels
+    TICKET_POOL_SIZE: int = int(os.getenv('TICKET_POOL_SIZE', '3'))  # per guild, 0 disables
+    TICKET_POOL_REFILL_INTERVAL: float = float(os.getenv('TICKET_POOL_REFILL_INTERVAL', '2'))  # seconds per channel
+    TICKET_POOL_CHANNEL_PREFIX: str = "pooled-ticket-"
+    
+    # Guild configuration cache
+    GUILD_CONFIG_CACHE_SIZE: int = int(os.getenv('GUILD_CONFIG_CACHE_SIZE', '1024'))
+    GUILD_CONFIG_CACHE_TTL: float = float(os.getenv('GUILD_CONFIG_CACHE_TTL', '300'))
+    
+    # Outbound REST scheduling
+    REST_GLOBAL_RATE: float = float(os.getenv('REST_GLOBAL_RATE', '45'))  # requests per second
+    REST_MAX_RATELIMIT_TIMEOUT: float = float(os.getenv('REST_MAX_RATELIMIT_TIMEOUT', '30'))
+    
+    # Delayed channel deletion
+    CHANNEL_DELETE_DELAY: float = float(os.getenv('CHANNEL_DELETE_DELAY', '10'))  # seconds after closing
+    CHANNEL_DELETE_BATCH_SIZE: int = int(os.getenv('CHANNEL_DELETE_BATCH_SIZE', '10'))
+    CHANNEL_DELETE_MAX_ATTEMPTS: int = int(os.getenv('CHANNEL_DELETE_MAX_ATTEMPTS', '5'))
+    
+    # Closing of inactive tickets; guilds override the threshold with /ticket-idle
+    TICKET_IDLE_HOURS: float = float(os.getenv('TICKET_IDLE_HOURS', '0'))  # 0 disables
+    TICKET_IDLE_WARNING: float = float(os.getenv('TICKET_IDLE_WARNING', '3600'))  # seconds warned ahead
+    ACTIVITY_FLUSH_INTERVAL: float = float(os.getenv('ACTIVITY_FLUSH_INTERVAL', '5'))  # seconds between writes
+    
+    # Transcripts exported before a ticket channel is deleted
+    TRANSCRIPTS_ENABLED: bool = os.getenv('TRANSCRIPTS_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+    TRANSCRIPT_DIR: str = os.getenv('TRANSCRIPT_DIR', 'data/transcripts')
+    TRANSCRIPT_WORKERS: int = int(os.getenv('TRANSCRIPT_WORKERS', '2'))  # render processes, 0 renders in threads
+    TRANSCRIPT_PAGE_SIZE: int = int(os.getenv('TRANSCRIPT_PAGE_SIZE', '100'))  # messages per history request
+    TRANSCRIPT_COMPRESS_LEVEL: int = int(os.getenv('TRANSCRIPT_COMPRESS_LEVEL', '6'))
+    TRANSCRIPT_ATTACHMENTS: bool = os.getenv('TRANSCRIPT_ATTACHMENTS', 'true').lower() in ('1', 'true', 'yes')
+    TRANSCRIPT_ATTACHMENT_MAX_BYTES: int = int(os.getenv('TRANSCRIPT_ATTACHMENT_MAX_BYTES', str(8 * 1024 * 1024)))
+    
+    # Content-addressed storage of transcripts and attachments
+    BLOB_DIR: str = os.getenv('BLOB_DIR', 'data/blobs')
+    BLOB_COMPRESS_LEVEL: int = int(os.getenv('BLOB_COMPRESS_LEVEL', '6'))
+    BLOB_GC_INTERVAL: float = float(os.getenv('BLOB_GC_INTERVAL', '3600'))  # seconds, 0 disables
+    BLOB_GC_GRACE: float = float(os.getenv('BLOB_GC_GRACE', '3600'))  # seconds a blob stays after its last reference
+    
+    # Gateway profile: "full" caches and chunks every member, "lean" caches only the bot
+    # and resolves other members on demand
+    GATEWAY_PROFILE: str = os.getenv('GATEWAY_PROFILE', 'full').lower()
+    MEMBER_RESOLVER_CACHE_SIZE: int = int(os.getenv('MEMBER_RESOLVER_CACHE_SIZE', '1024'))
+    MEMBER_RESOLVER_CACHE_TTL: float = float(os.getenv('MEMBER_RESOLVER_CACHE_TTL', '300'))
+    
+    # Sharding; more than one cluster runs each range of shards in its own process
+    CLUSTER_COUNT: int = int(os.getenv('CLUSTER_COUNT', '1'))
+    SHARD_COUNT: int = int(os.getenv('SHARD_COUNT', '0'))  # 0 = Discord's recommendation
+    CLUSTER_STATS_INTERVAL: float = float(os.getenv('CLUSTER_STATS_INTERVAL', '300'))  # seconds, 0 disables
+    
+    # Application command sync; listing guild ids syncs only to those (staging) guilds
+    COMMAND_SYNC_GUILDS: List[int] = [
+        int(guild_id) for guild_id in os.getenv('COMMAND_SYNC_GUILDS', '').split(',') if guild_id.strip()
+    ]
+    COMMAND_SYNC_FORCE: bool = os.getenv('COMMAND_SYNC_FORCE', '').lower() in ('1', 'true', 'yes')
     
     # Embed colors
     COLOR_SUCCESS: int = 0x00ff00
@@ -23,9 +90,24 @@ class Settings:
     # Timeouts
     FORM_TIMEOUT_SECONDS: int = 300  # 5 minutes
     
+    # Settings panel form sessions
+    FORM_SESSION_TTL: float = float(os.getenv('FORM_SESSION_TTL', '1800'))  # seconds since the last answer
+    FORM_SESSION_MAX: int = int(os.getenv('FORM_SESSION_MAX', '10000'))
+    FORM_SESSION_FLUSH_INTERVAL: float = float(os.getenv('FORM_SESSION_FLUSH_INTERVAL', '2'))
+    
     @classmethod
     def get_database_path(cls) -> str:
         """Get the database path, creating directory if needed."""
         db_path = cls.DATABASE_PATH
         os.makedirs(os.path.dirname(db_path), exist_ok=True)
         return db_path
+    
+    @classmethod
+    def get_database_pragmas(cls) -> Dict[str, Any]:
+        """Get the pragmas applied to every pooled connection."""
+        return {
+            'synchronous': cls.DATABASE_SYNCHRONOUS,
+            'cache_size': cls.DATABASE_CACHE_SIZE,
+            'mmap_size': cls.DATABASE_MMAP_SIZE,
+            'busy_timeout': cls.DATABASE_BUSY_TIMEOUT_MS
+        }
@@ -0,0 +1,364 @@
+"""Versioned schema migrations for the ticket database."""
+
+import sqlite3
+import logging
+from dataclasses import dataclass
+from typing import Callable, List, Optional, Tuple
+
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class Migration:
+    """A single schema migration step.
+
+    Steps must be idempotent: databases created before versioning already
+    contain some of the objects a step creates.
+    """
+    version: int
+    description: str
+    statements: Tuple[str, ...] = ()
+    function: Optional[Callable[[sqlite3.Connection], None]] = None
+
+    def apply(self, conn: sqlite3.Connection) -> None:
+        """Run the step on a connection inside an open transaction."""
+        for statement in self.statements:
+            conn.execute(statement)
+        if self.function:
+            self.function(conn)
+
+
+def _table_exists(conn: sqlite3.Connection, name: str) -> bool:
+    """Check whether a table exists."""
+    row = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?",
+        (name,)
+    ).fetchone()
+    return row is not None
+
+
+def _move_legacy_bot_settings(conn: sqlite3.Connection) -> None:
+    """Move the global bot_settings rows into the per-guild defaults."""
+    if not _table_exists(conn, "bot_settings"):
+        return
+    # Guild 0 holds the defaults every guild inherits
+    conn.execute(
+        """INSERT OR IGNORE INTO guild_bot_settings (guild_id, key, value)
+           SELECT 0, key, value FROM bot_settings"""
+    )
+    conn.execute("DROP TABLE bot_settings")
+
+
+def _add_question_metadata(conn: sqlite3.Connection) -> None:
+    """Add input style, length and required columns to form_questions."""
+    existing = {row[1] for row in conn.execute("PRAGMA table_info(form_questions)")}
+    columns = (
+        ("style", "TEXT NOT NULL DEFAULT 'long'"),
+        ("min_length", "INTEGER NOT NULL DEFAULT 0"),
+        ("max_length", "INTEGER NOT NULL DEFAULT 1000"),
+        ("required", "INTEGER NOT NULL DEFAULT 1"),
+    )
+    for name, definition in columns:
+        if name not in existing:
+            conn.execute(f"ALTER TABLE form_questions ADD COLUMN {name} {definition}")
+
+
+def _add_ticket_activity(conn: sqlite3.Connection) -> None:
+    """Add last_activity to tickets tables created before it existed."""
+    existing = {row[1] for row in conn.execute("PRAGMA table_info(tickets)")}
+    if "last_activity" not in existing:
+        # ADD COLUMN does not accept CURRENT_TIMESTAMP as default; backfill instead
+        conn.execute("ALTER TABLE tickets ADD COLUMN last_activity TIMESTAMP")
+        conn.execute("UPDATE tickets SET last_activity = COALESCE(created_at, CURRENT_TIMESTAMP)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_tickets_status_activity ON tickets(status, last_activity)")
+
+
+def _add_category_partitions(conn: sqlite3.Connection) -> None:
+    """Map ticket categories to the Discord categories holding their channels."""
+    existing = {row[1] for row in conn.execute("PRAGMA table_info(ticket_categories)")}
+    columns = (
+        ("partition", "INTEGER"),
+        ("discord_category_id", "INTEGER"),
+    )
+    for name, definition in columns:
+        if name not in existing:
+            conn.execute(f"ALTER TABLE ticket_categories ADD COLUMN {name} {definition}")
+    # Rows without a partition never conflict, since NULLs are distinct
+    conn.execute(
+        """CREATE UNIQUE INDEX IF NOT EXISTS idx_ticket_categories_partition
+           ON ticket_categories(guild_id, name, partition)"""
+    )
+
+
+MIGRATIONS: List[Migration] = [
+    Migration(
+        version=1,
+        description="Initial schema",
+        statements=(
+            """CREATE TABLE IF NOT EXISTS guild_settings (
+                guild_id INTEGER PRIMARY KEY,
+                ticket_type TEXT DEFAULT 'simple',
+                welcome_message TEXT DEFAULT 'Welcome to your ticket!',
+                target_channel_id INTEGER,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )""",
+            """CREATE TABLE IF NOT EXISTS form_questions (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                guild_id INTEGER,
+                question_order INTEGER,
+                question_text TEXT NOT NULL,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                FOREIGN KEY (guild_id) REFERENCES guild_settings (guild_id)
+            )""",
+            """CREATE TABLE IF NOT EXISTS ticket_roles (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                guild_id INTEGER,
+                role_id INTEGER,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                FOREIGN KEY (guild_id) REFERENCES guild_settings (guild_id)
+            )""",
+            """CREATE TABLE IF NOT EXISTS tickets (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                guild_id INTEGER,
+                user_id INTEGER,
+                channel_id INTEGER,
+                ticket_type TEXT,
+                status TEXT DEFAULT 'open',
+                priority TEXT DEFAULT 'normal',
+                claimed_by INTEGER,
+                category TEXT,
+                custom_name TEXT,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                closed_at TIMESTAMP,
+                last_activity TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                FOREIGN KEY (guild_id) REFERENCES guild_settings (guild_id)
+            )""",
+            """CREATE TABLE IF NOT EXISTS form_responses (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                ticket_id INTEGER,
+                question_order INTEGER,
+                question_text TEXT,
+                response_text TEXT,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                FOREIGN KEY (ticket_id) REFERENCES tickets (id)
+            )""",
+            """CREATE TABLE IF NOT EXISTS co_owners (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                guild_id INTEGER,
+                user_id INTEGER,
+                assigned_by INTEGER,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                FOREIGN KEY (guild_id) REFERENCES guild_settings (guild_id)
+            )""",
+            """CREATE TABLE IF NOT EXISTS ticket_notes (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                ticket_id INTEGER,
+                user_id INTEGER,
+                note_text TEXT NOT NULL,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                FOREIGN KEY (ticket_id) REFERENCES tickets (id)
+            )""",
+            """CREATE TABLE IF NOT EXISTS ticket_participants (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                ticket_id INTEGER,
+                user_id INTEGER,
+                added_by INTEGER,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                FOREIGN KEY (ticket_id) REFERENCES tickets (id)
+            )""",
+            """CREATE TABLE IF NOT EXISTS ticket_transcripts (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                ticket_id INTEGER,
+                created_by INTEGER,
+                transcript_url TEXT,
+                message_count INTEGER DEFAULT 0,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                FOREIGN KEY (ticket_id) REFERENCES tickets (id)
+            )""",
+            """CREATE TABLE IF NOT EXISTS ticket_categories (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                guild_id INTEGER,
+                name TEXT NOT NULL,
+                description TEXT,
+                emoji TEXT,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                FOREIGN KEY (guild_id) REFERENCES guild_settings (guild_id)
+            )""",
+        )
+    ),
+    Migration(
+        version=2,
+        description="Indexes for ticket, form and role lookups",
+        statements=(
+            "CREATE INDEX IF NOT EXISTS idx_tickets_channel ON tickets (channel_id)",
+            "CREATE INDEX IF NOT EXISTS idx_tickets_guild_status ON tickets (guild_id, status)",
+            "CREATE INDEX IF NOT EXISTS idx_tickets_guild_user_status ON tickets (guild_id, user_id, status)",
+            "CREATE INDEX IF NOT EXISTS idx_form_responses_ticket ON form_responses (ticket_id, question_order)",
+            "CREATE INDEX IF NOT EXISTS idx_form_questions_guild ON form_questions (guild_id, question_order)",
+        )
+    ),
+    Migration(
+        version=3,
+        description="Unique co-owners and ticket roles",
+        statements=(
+            # Drop duplicates left behind while INSERT OR IGNORE had no constraint to hit
+            """DELETE FROM co_owners WHERE id NOT IN (
+                SELECT MIN(id) FROM co_owners GROUP BY guild_id, user_id
+            )""",
+            """DELETE FROM ticket_roles WHERE id NOT IN (
+                SELECT MIN(id) FROM ticket_roles GROUP BY guild_id, role_id
+            )""",
+            "CREATE UNIQUE INDEX IF NOT EXISTS idx_co_owners_guild_user ON co_owners (guild_id, user_id)",
+            "CREATE UNIQUE INDEX IF NOT EXISTS idx_ticket_roles_guild_role ON ticket_roles (guild_id, role_id)",
+        )
+    ),
+    Migration(
+        version=4,
+        description="Per-guild bot settings",
+        statements=(
+            """CREATE TABLE IF NOT EXISTS guild_bot_settings (
+                guild_id INTEGER NOT NULL,
+                key TEXT NOT NULL,
+                value TEXT,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                PRIMARY KEY (guild_id, key)
+            )""",
+        ),
+        function=_move_legacy_bot_settings
+    ),
+    Migration(
+        version=5,
+        description="Durable channel deletion queue",
+        statements=(
+            """CREATE TABLE IF NOT EXISTS channel_deletions (
+                channel_id INTEGER PRIMARY KEY,
+                guild_id INTEGER,
+                due_at REAL NOT NULL,
+                reason TEXT,
+                attempts INTEGER DEFAULT 0,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )""",
+        )
+    ),
+    Migration(
+        version=6,
+        description="Application command sync state",
+        statements=(
+            """CREATE TABLE IF NOT EXISTS command_sync_state (
+                scope TEXT PRIMARY KEY,
+                hash TEXT NOT NULL,
+                command_count INTEGER NOT NULL,
+                sync_seconds REAL NOT NULL,
+                synced_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )""",
+        )
+    ),
+    Migration(
+        version=7,
+        description="Persisted form sessions",
+        statements=(
+            """CREATE TABLE IF NOT EXISTS form_sessions (
+                guild_id INTEGER NOT NULL,
+                user_id INTEGER NOT NULL,
+                data TEXT NOT NULL,
+                expires_at REAL NOT NULL,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                PRIMARY KEY (guild_id, user_id)
+            )""",
+            "CREATE INDEX IF NOT EXISTS idx_form_sessions_expires ON form_sessions(expires_at)",
+        )
+    ),
+    Migration(
+        version=8,
+        description="Form question input metadata",
+        function=_add_question_metadata
+    ),
+    Migration(
+        version=9,
+        description="Transcript lookup by ticket",
+        statements=(
+            "CREATE INDEX IF NOT EXISTS idx_ticket_transcripts_ticket ON ticket_transcripts(ticket_id)",
+        )
+    ),
+    Migration(
+        version=10,
+        description="Content-addressed blob reference counts",
+        statements=(
+            """CREATE TABLE IF NOT EXISTS blobs (
+                hash TEXT PRIMARY KEY,
+                kind TEXT NOT NULL DEFAULT 'blob',
+                codec TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                stored_size INTEGER NOT NULL,
+                refs INTEGER NOT NULL DEFAULT 0,
+                released_at REAL,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )""",
+            "CREATE INDEX IF NOT EXISTS idx_blobs_released ON blobs(released_at) WHERE refs = 0",
+        )
+    ),
+    Migration(
+        version=11,
+        description="Idle ticket lookup",
+        function=_add_ticket_activity
+    ),
+    Migration(
+        version=12,
+        description="Ticket category overflow partitions",
+        function=_add_category_partitions
+    ),
+]
+
+
+def get_schema_version(conn: sqlite3.Connection) -> int:
+    """Get the highest applied migration version."""
+    conn.execute(
+        """CREATE TABLE IF NOT EXISTS schema_version (
+            version INTEGER PRIMARY KEY,
+            description TEXT,
+            applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )"""
+    )
+    row = conn.execute("SELECT MAX(version) FROM schema_version").fetchone()
+    return row[0] or 0
+
+
+def apply_migrations(conn: sqlite3.Connection, target: Optional[int] = None) -> List[int]:
+    """Apply pending migrations in order, each in its own transaction.
+
+    Several processes may migrate the same database at once, e.g. the
+    clusters of a fresh install. The version is therefore read again once
+    each step holds the write lock, and steps another process applied
+    meanwhile are skipped. Returns the versions that were applied.
+    """
+    current = get_schema_version(conn)
+    applied = []
+
+    for migration in sorted(MIGRATIONS, key=lambda m: m.version):
+        if migration.version <= current:
+            continue
+        if target is not None and migration.version > target:
+            break
+
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            if get_schema_version(conn) >= migration.version:
+                conn.execute("COMMIT")
+                continue  # Applied by another process
+            migration.apply(conn)
+            conn.execute(
+                "INSERT INTO schema_version (version, description) VALUES (?, ?)",
+                (migration.version, migration.description)
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            logger.error(f"Migration {migration.version} ({migration.description}) failed")
+            raise
+
+        logger.info(f"Applied migration {migration.version}: {migration.description}")
+        applied.append(migration.version)
+
+    return applied
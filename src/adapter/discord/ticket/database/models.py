@@ -1,38 +1,24 @@
-# --- Bot Settings Management ---
+"""Database models for the ticket system."""
+
 import sqlite3
-import os
+from contextlib import asynccontextmanager
+from typing import Optional, List, Dict, Any, AsyncIterator, Callable, Iterable, Sequence, Tuple, TypeVar
+from pathlib import Path
+from .pool import ConnectionPool, DatabaseExecutor
+from .write_queue import WriteQueue
+from .migrations import apply_migrations
+from .transaction import Transaction, write_result
+from ..config.settings import Settings
 
-DB_PATH = os.getenv('DATABASE_PATH', 'data/bot.db')
 
-def save_bot_settings(**kwargs):
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    c.execute('''CREATE TABLE IF NOT EXISTS bot_settings (
-        key TEXT PRIMARY KEY,
-        value TEXT
-    )''')
-    for key, value in kwargs.items():
-        c.execute('REPLACE INTO bot_settings (key, value) VALUES (?, ?)', (key, str(value)))
-    conn.commit()
-    conn.close()
+T = TypeVar('T')
 
-def get_bot_settings():
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    c.execute('''CREATE TABLE IF NOT EXISTS bot_settings (
-        key TEXT PRIMARY KEY,
-        value TEXT
-    )''')
-    c.execute('SELECT key, value FROM bot_settings')
-    settings = {row[0]: row[1] for row in c.fetchall()}
-    conn.close()
-    return settings
-"""Database models for the ticket system."""
 
-import sqlite3
-import asyncio
-from typing import Optional, List, Dict, Any
-from pathlib import Path
+def tuple_cursor(conn: sqlite3.Connection) -> sqlite3.Cursor:
+    """Open a cursor that returns plain tuples instead of sqlite3.Row objects."""
+    cursor = conn.cursor()
+    cursor.row_factory = None
+    return cursor
 
 
 class DatabaseManager:
@@ -41,135 +27,111 @@ class DatabaseManager:
     def __init__(self, db_path: str):
         self.db_path = db_path
         self._ensure_directory()
+        self.pool = ConnectionPool(
+            db_path,
+            readers=Settings.DATABASE_READERS,
+            pragmas=Settings.get_database_pragmas()
+        )
+        # One thread per reader plus one for the writer
+        self.executor = DatabaseExecutor(
+            max_workers=self.pool.readers + 1,
+            max_queue=Settings.DATABASE_EXECUTOR_QUEUE
+        )
+        self.write_queue = WriteQueue(
+            self.pool,
+            self.executor,
+            max_batch=Settings.DATABASE_WRITE_BATCH_SIZE,
+            max_latency=Settings.DATABASE_WRITE_LATENCY_MS / 1000,
+            max_pending=Settings.DATABASE_WRITE_QUEUE_LIMIT
+        )
     
     def _ensure_directory(self):
         """Ensure the database directory exists."""
         Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
     
     async def initialize(self):
-        """Initialize database tables."""
-        await self._execute_script("""
-            CREATE TABLE IF NOT EXISTS guild_settings (
-                guild_id INTEGER PRIMARY KEY,
-                ticket_type TEXT DEFAULT 'simple',
-                welcome_message TEXT DEFAULT 'Welcome to your ticket!',
-                target_channel_id INTEGER,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            );
-            
-            CREATE TABLE IF NOT EXISTS form_questions (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                guild_id INTEGER,
-                question_order INTEGER,
-                question_text TEXT NOT NULL,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (guild_id) REFERENCES guild_settings (guild_id)
-            );
-            
-            CREATE TABLE IF NOT EXISTS ticket_roles (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                guild_id INTEGER,
-                role_id INTEGER,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (guild_id) REFERENCES guild_settings (guild_id)
-            );
-            
-            CREATE TABLE IF NOT EXISTS tickets (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                guild_id INTEGER,
-                user_id INTEGER,
-                channel_id INTEGER,
-                ticket_type TEXT,
-                status TEXT DEFAULT 'open',
-                priority TEXT DEFAULT 'normal',
-                claimed_by INTEGER,
-                category TEXT,
-                custom_name TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                closed_at TIMESTAMP,
-                last_activity TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (guild_id) REFERENCES guild_settings (guild_id)
-            );
-            
-            CREATE TABLE IF NOT EXISTS form_responses (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                ticket_id INTEGER,
-                question_order INTEGER,
-                question_text TEXT,
-                response_text TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (ticket_id) REFERENCES tickets (id)
-            );
-            
-            CREATE TABLE IF NOT EXISTS co_owners (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                guild_id INTEGER,
-                user_id INTEGER,
-                assigned_by INTEGER,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (guild_id) REFERENCES guild_settings (guild_id)
-            );
-            
-            CREATE TABLE IF NOT EXISTS ticket_notes (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                ticket_id INTEGER,
-                user_id INTEGER,
-                note_text TEXT NOT NULL,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (ticket_id) REFERENCES tickets (id)
-            );
-            
-            CREATE TABLE IF NOT EXISTS ticket_participants (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                ticket_id INTEGER,
-                user_id INTEGER,
-                added_by INTEGER,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (ticket_id) REFERENCES tickets (id)
-            );
-            
-            CREATE TABLE IF NOT EXISTS ticket_transcripts (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                ticket_id INTEGER,
-                created_by INTEGER,
-                transcript_url TEXT,
-                message_count INTEGER DEFAULT 0,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (ticket_id) REFERENCES tickets (id)
-            );
-            
-            CREATE TABLE IF NOT EXISTS ticket_categories (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                guild_id INTEGER,
-                name TEXT NOT NULL,
-                description TEXT,
-                emoji TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (guild_id) REFERENCES guild_settings (guild_id)
-            );
-        """)
+        """Initialize database tables by applying pending migrations."""
+        await self.migrate()
+    
+    async def migrate(self, target: Optional[int] = None) -> List[int]:
+        """Apply schema migrations up to target (latest by default)."""
+        def _execute():
+            with self.pool.writer() as conn:
+                return apply_migrations(conn, target)
+        
+        return await self.executor.run(_execute)
     
     async def _execute_script(self, script: str):
         """Execute a SQL script asynchronously."""
         def _execute():
-            with sqlite3.connect(self.db_path) as conn:
+            with self.pool.writer() as conn:
                 conn.executescript(script)
-                conn.commit()
         
-        loop = asyncio.get_event_loop()
-        await loop.run_in_executor(None, _execute)
+        await self.executor.run(_execute)
     
     async def execute(self, query: str, params: tuple = ()) -> List[Dict[str, Any]]:
         """Execute a SELECT query and return results."""
         def _execute():
-            with sqlite3.connect(self.db_path) as conn:
-                conn.row_factory = sqlite3.Row
+            with self.pool.reader() as conn:
                 cursor = conn.execute(query, params)
                 return [dict(row) for row in cursor.fetchall()]
         
-        loop = asyncio.get_event_loop()
-        return await loop.run_in_executor(None, _execute)
+        return await self.executor.run(_execute)
+    
+    async def fetch_rows(self, query: str, params: tuple = ()) -> List[tuple]:
+        """Execute a SELECT query and return the rows as plain tuples."""
+        def _execute():
+            with self.pool.reader() as conn:
+                return tuple_cursor(conn).execute(query, params).fetchall()
+        
+        return await self.executor.run(_execute)
+    
+    async def fetch_row(self, query: str, params: tuple = ()) -> Optional[tuple]:
+        """Execute a SELECT query and return the first row as a plain tuple."""
+        def _execute():
+            with self.pool.reader() as conn:
+                return tuple_cursor(conn).execute(query, params).fetchone()
+        
+        return await self.executor.run(_execute)
+    
+    async def run_read(self, func: Callable[[sqlite3.Connection], T]) -> T:
+        """Run func(conn) on a reader connection in a single executor hop."""
+        def _execute():
+            with self.pool.reader() as conn:
+                return func(conn)
+        
+        return await self.executor.run(_execute)
+    
+    async def stream(
+        self,
+        query: str,
+        params: tuple = (),
+        chunk_size: int = 1000
+    ) -> AsyncIterator[List[tuple]]:
+        """Stream the rows of a SELECT query as chunks of plain tuples.
+        
+        The query runs once; each chunk is fetched in its own executor hop
+        so large result sets never sit in memory at once.
+        
+        Meant for sequential scans such as loading state at startup. The
+        stream keeps a reader checked out until it ends, so consume it under
+        contextlib.aclosing() to return the reader when stopping early. If
+        no reader is idle it raises RuntimeError rather than block an
+        executor thread that other hops, this stream's included, need.
+        """
+        conn = await self.executor.run(lambda: self.pool.checkout_reader(block=False))
+        try:
+            cursor = await self.executor.run(lambda: tuple_cursor(conn).execute(query, params))
+            try:
+                while True:
+                    rows = await self.executor.run(lambda: cursor.fetchmany(chunk_size))
+                    if not rows:
+                        break
+                    yield rows
+            finally:
+                cursor.close()
+        finally:
+            self.pool.release_reader(conn)
     
     async def execute_one(self, query: str, params: tuple = ()) -> Optional[Dict[str, Any]]:
         """Execute a SELECT query and return first result."""
@@ -177,12 +139,70 @@ class DatabaseManager:
         return results[0] if results else None
     
     async def execute_write(self, query: str, params: tuple = ()) -> int:
-        """Execute an INSERT/UPDATE/DELETE query and return affected rows or last row id."""
-        def _execute():
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.execute(query, params)
-                conn.commit()
-                return cursor.lastrowid if cursor.lastrowid else cursor.rowcount
+        """Execute an INSERT/UPDATE/DELETE query and return affected rows or last row id.
+        
+        Concurrent writes are group-committed: they share one transaction
+        but each caller still gets its own result.
+        """
+        def _execute(conn):
+            cursor = conn.execute(query, params)
+            return write_result(query, cursor)
+        
+        return await self.write_queue.submit(_execute)
+    
+    async def execute_many(self, query: str, params_seq: Iterable[tuple]) -> int:
+        """Execute one statement for every parameter tuple in a single transaction.
+        
+        Returns the total number of affected rows.
+        """
+        params_list = list(params_seq)
+        if not params_list:
+            return 0
         
-        loop = asyncio.get_event_loop()
-        return await loop.run_in_executor(None, _execute)
+        def _execute(conn):
+            cursor = conn.executemany(query, params_list)
+            return cursor.rowcount
+        
+        return await self.write_queue.submit(_execute)
+    
+    async def execute_batch(self, statements: Sequence[Tuple[str, tuple]]) -> List[int]:
+        """Execute several statements atomically in a single transaction.
+        
+        Returns the result of each statement, as execute_write would.
+        """
+        if not statements:
+            return []
+        
+        def _execute(conn):
+            return [
+                write_result(query, conn.execute(query, params))
+                for query, params in statements
+            ]
+        
+        return await self.write_queue.submit(_execute)
+    
+    @asynccontextmanager
+    async def transaction(self) -> AsyncIterator[Transaction]:
+        """Collect steps and commit them atomically when the block exits.
+        
+        Steps run together in one executor hop; if the block raises,
+        nothing is written.
+        """
+        tx = Transaction()
+        yield tx
+        if len(tx):
+            await self.write_queue.submit(tx.run)
+    
+    def stats(self) -> Dict[str, Any]:
+        """Get connection pool, executor and write queue metrics."""
+        return {
+            'readers': self.pool.readers,
+            'executor': self.executor.stats(),
+            'writes': self.write_queue.stats()
+        }
+    
+    async def close(self):
+        """Flush queued writes, close all pooled connections and stop the executor."""
+        await self.write_queue.drain()
+        self.executor.shutdown()
+        self.pool.close()
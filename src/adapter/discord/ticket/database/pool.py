@@ -0,0 +1,167 @@
+"""Connection pool and executor for SQLite access."""
+
+import asyncio
+import queue
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, TypeVar
+
+
+T = TypeVar('T')
+
+
+class DatabaseExecutor:
+    """Bounded thread pool dedicated to database work."""
+
+    def __init__(self, max_workers: int, max_queue: int):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers,
+            thread_name_prefix="db"
+        )
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._lock = threading.Lock()
+        self._queued = 0
+        self._running = 0
+        self._completed = 0
+        self._peak_queue_depth = 0
+
+    @property
+    def queue_depth(self) -> int:
+        """Number of jobs waiting for a worker thread."""
+        return self._queued
+
+    async def run(self, func: Callable[[], T]) -> T:
+        """Run a blocking function on the executor, waiting for a free slot if full."""
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_workers + self.max_queue)
+
+        async with self._slots:
+            with self._lock:
+                self._queued += 1
+                self._peak_queue_depth = max(self._peak_queue_depth, self._queued)
+
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, self._track, func)
+
+    def _track(self, func: Callable[[], T]) -> T:
+        """Update the counters around a job running on a worker thread."""
+        with self._lock:
+            self._queued -= 1
+            self._running += 1
+        try:
+            return func()
+        finally:
+            with self._lock:
+                self._running -= 1
+                self._completed += 1
+
+    def stats(self) -> Dict[str, int]:
+        """Get executor metrics."""
+        with self._lock:
+            return {
+                'workers': self.max_workers,
+                'queue_depth': self._queued,
+                'peak_queue_depth': self._peak_queue_depth,
+                'running': self._running,
+                'completed': self._completed
+            }
+
+    def shutdown(self) -> None:
+        """Stop the worker threads."""
+        self._executor.shutdown(wait=True)
+
+
+class ConnectionPool:
+    """Long-lived SQLite connections: one writer and several readers."""
+
+    def __init__(self, db_path: str, readers: int, pragmas: Dict[str, Any]):
+        self.db_path = db_path
+        self.readers = max(1, readers)
+        self.pragmas = pragmas
+        self._writer: Optional[sqlite3.Connection] = None
+        self._writer_lock = threading.Lock()
+        self._idle_readers: "queue.LifoQueue[sqlite3.Connection]" = queue.LifoQueue()
+        self._all_readers: List[sqlite3.Connection] = []
+        self._open_lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        """Open a connection with the configured pragmas applied."""
+        # Transactions are managed explicitly, so run in autocommit mode
+        conn = sqlite3.connect(
+            self.db_path,
+            check_same_thread=False,
+            isolation_level=None
+        )
+        for name, value in self.pragmas.items():
+            conn.execute(f"PRAGMA {name} = {value}")
+        return conn
+
+    def _ensure_writer(self) -> sqlite3.Connection:
+        """Open the writer connection and switch the database to WAL mode."""
+        with self._open_lock:
+            if self._writer is None:
+                conn = self._connect()
+                conn.execute("PRAGMA journal_mode = WAL")
+                self._writer = conn
+            return self._writer
+
+    @contextmanager
+    def writer(self) -> Iterator[sqlite3.Connection]:
+        """Borrow the single writer connection."""
+        conn = self._ensure_writer()
+        with self._writer_lock:
+            yield conn
+
+    @contextmanager
+    def reader(self) -> Iterator[sqlite3.Connection]:
+        """Borrow a reader connection."""
+        conn = self.checkout_reader()
+        try:
+            yield conn
+        finally:
+            self.release_reader(conn)
+
+    def release_reader(self, conn: sqlite3.Connection) -> None:
+        """Return a reader taken with checkout_reader."""
+        self._idle_readers.put(conn)
+
+    def checkout_reader(self, block: bool = True) -> sqlite3.Connection:
+        """Take an idle reader, opening a new one while under the limit.
+
+        When every reader is busy this waits for one, unless block is False;
+        then it raises RuntimeError instead of holding the calling thread.
+        """
+        try:
+            return self._idle_readers.get_nowait()
+        except queue.Empty:
+            pass
+
+        self._ensure_writer()
+        with self._open_lock:
+            if len(self._all_readers) < self.readers:
+                conn = self._connect()
+                conn.row_factory = sqlite3.Row
+                conn.execute("PRAGMA query_only = 1")
+                self._all_readers.append(conn)
+                return conn
+
+        if not block:
+            raise RuntimeError("No idle reader connection")
+        return self._idle_readers.get()
+
+    def close(self) -> None:
+        """Close every connection in the pool."""
+        with self._open_lock:
+            for conn in self._all_readers:
+                conn.close()
+            self._all_readers.clear()
+            self._idle_readers = queue.LifoQueue()
+
+            if self._writer is not None:
+                with self._writer_lock:
+                    self._writer.close()
+                self._writer = None
@@ -0,0 +1,97 @@
+"""Unit-of-work transactions for the ticket database."""
+
+import sqlite3
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+
+_INSERT_PREFIXES = ("INSERT", "REPLACE")
+
+
+def write_result(query: str, cursor: sqlite3.Cursor) -> int:
+    """Return the new row id for inserts and the affected row count otherwise."""
+    # Pooled connections are long-lived, so lastrowid can be left over from an
+    # earlier insert; only trust it when this statement inserted a row.
+    if cursor.rowcount > 0 and query.lstrip().upper().startswith(_INSERT_PREFIXES):
+        return cursor.lastrowid
+    return cursor.rowcount
+
+
+class TxResult:
+    """Result of a transaction step, available once the transaction has run.
+
+    A TxResult can be passed as a parameter to later steps of the same
+    transaction; it is resolved on the writer thread just before use.
+    """
+
+    __slots__ = ('_value', '_ready')
+
+    def __init__(self):
+        self._value: Any = None
+        self._ready = False
+
+    @property
+    def value(self) -> Any:
+        """Get the step result."""
+        if not self._ready:
+            raise RuntimeError("Transaction step has not run yet")
+        return self._value
+
+    def _set(self, value: Any) -> None:
+        self._value = value
+        self._ready = True
+
+
+def _resolve(params: Iterable[Any]) -> tuple:
+    """Replace TxResult placeholders with their values."""
+    return tuple(p.value if isinstance(p, TxResult) else p for p in params)
+
+
+def _row_to_dict(cursor: sqlite3.Cursor, row: Optional[tuple]) -> Optional[Dict[str, Any]]:
+    """Convert a raw row from the writer connection into a dict."""
+    if row is None:
+        return None
+    return {column[0]: value for column, value in zip(cursor.description, row)}
+
+
+class Transaction:
+    """Collects steps that run on one connection, in one executor hop and one commit."""
+
+    def __init__(self):
+        self._steps: List[Tuple[Callable[[sqlite3.Connection], Any], TxResult]] = []
+
+    def __len__(self) -> int:
+        return len(self._steps)
+
+    def call(self, func: Callable[[sqlite3.Connection], Any]) -> TxResult:
+        """Add a step that runs func(conn) inside the transaction."""
+        result = TxResult()
+        self._steps.append((func, result))
+        return result
+
+    def execute_write(self, query: str, params: tuple = ()) -> TxResult:
+        """Add an INSERT/UPDATE/DELETE step; resolves to last row id or affected rows."""
+        return self.call(lambda conn: write_result(query, conn.execute(query, _resolve(params))))
+
+    def execute_many(self, query: str, params_seq: Iterable[tuple]) -> TxResult:
+        """Add an executemany step; resolves to the number of affected rows."""
+        params_list = list(params_seq)
+
+        def _execute(conn):
+            if not params_list:
+                return 0
+            return conn.executemany(query, [_resolve(p) for p in params_list]).rowcount
+
+        return self.call(_execute)
+
+    def execute_one(self, query: str, params: tuple = ()) -> TxResult:
+        """Add a SELECT step that sees earlier writes; resolves to the first row."""
+        def _execute(conn):
+            cursor = conn.execute(query, _resolve(params))
+            return _row_to_dict(cursor, cursor.fetchone())
+
+        return self.call(_execute)
+
+    def run(self, conn: sqlite3.Connection) -> None:
+        """Run every step in order on the writer connection."""
+        for func, result in self._steps:
+            result._set(func(conn))
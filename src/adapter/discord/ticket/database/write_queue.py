@@ -0,0 +1,178 @@
+"""Group-commit queue for SQLite writes."""
+
+import asyncio
+import sqlite3
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from .pool import ConnectionPool, DatabaseExecutor
+
+
+WriteJob = Callable[[sqlite3.Connection], Any]
+
+
+class WriteQueue:
+    """Gathers concurrent writes into shared transactions.
+
+    Every job runs under its own savepoint, so a failing job is rolled back
+    on its own while the rest of the batch still commits. Submitters wait
+    while max_pending jobs are queued or in flight.
+    """
+
+    def __init__(
+        self,
+        pool: ConnectionPool,
+        executor: DatabaseExecutor,
+        max_batch: int,
+        max_latency: float,
+        max_pending: int
+    ):
+        self.pool = pool
+        self.executor = executor
+        self.max_batch = max(1, max_batch)
+        self.max_latency = max_latency
+        self.max_pending = max(self.max_batch, max_pending)
+        self._pending: List[Tuple[WriteJob, asyncio.Future]] = []
+        self._flush_handle: Optional[asyncio.Handle] = None
+        self._commit_lock: Optional[asyncio.Lock] = None
+        self._space: Optional[asyncio.Condition] = None
+        self._in_flight: set = set()
+        # Jobs submitted and not yet resolved, queued or in flight
+        self._outstanding = 0
+        self._batches = 0
+        self._statements = 0
+        self._failed_batches = 0
+        self._peak_depth = 0
+        self._blocked = 0
+        self._last_batch_size = 0
+        self._commit_seconds = 0.0
+
+    @property
+    def depth(self) -> int:
+        """Number of writes waiting to be committed."""
+        return len(self._pending)
+
+    async def submit(self, job: WriteJob) -> Any:
+        """Queue a write job and wait for the transaction that commits it."""
+        loop = asyncio.get_running_loop()
+        if self._commit_lock is None:
+            self._commit_lock = asyncio.Lock()
+            self._space = asyncio.Condition()
+
+        if self._outstanding >= self.max_pending:
+            self._blocked += 1
+            async with self._space:
+                await self._space.wait_for(lambda: self._outstanding < self.max_pending)
+
+        self._outstanding += 1
+        future = loop.create_future()
+        self._pending.append((job, future))
+        self._peak_depth = max(self._peak_depth, len(self._pending))
+
+        if len(self._pending) >= self.max_batch:
+            self._flush_soon(loop, immediate=True)
+        elif self._flush_handle is None:
+            self._flush_soon(loop)
+
+        return await future
+
+    def _flush_soon(self, loop: asyncio.AbstractEventLoop, immediate: bool = False) -> None:
+        """Schedule a flush after the latency window, or right away."""
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+
+        if immediate or self.max_latency <= 0:
+            self._start_flush()
+        else:
+            self._flush_handle = loop.call_later(self.max_latency, self._start_flush)
+
+    def _start_flush(self) -> None:
+        """Hand the pending jobs over to a commit task."""
+        self._flush_handle = None
+        if not self._pending:
+            return
+
+        batch = self._pending[:self.max_batch]
+        del self._pending[:self.max_batch]
+        task = asyncio.ensure_future(self._commit(batch))
+        self._in_flight.add(task)
+        task.add_done_callback(self._in_flight.discard)
+
+        if self._pending:
+            self._flush_soon(asyncio.get_running_loop(), immediate=len(self._pending) >= self.max_batch)
+
+    async def _commit(self, batch: List[Tuple[WriteJob, asyncio.Future]]) -> None:
+        """Run a batch in one transaction and resolve each caller's future."""
+        jobs = [job for job, _ in batch]
+
+        # Batches commit one after another, in the order they were formed
+        async with self._commit_lock:
+            started = time.perf_counter()
+            try:
+                results = await self.executor.run(lambda: self._run_batch(jobs))
+            except Exception as e:
+                self._failed_batches += 1
+                results = [e] * len(batch)
+            self._commit_seconds += time.perf_counter() - started
+
+        self._batches += 1
+        self._statements += len(batch)
+        self._last_batch_size = len(batch)
+
+        self._outstanding -= len(batch)
+        for (_, future), result in zip(batch, results):
+            if future.done():
+                continue
+            if isinstance(result, BaseException):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+        async with self._space:
+            self._space.notify_all()
+
+    def _run_batch(self, jobs: List[WriteJob]) -> List[Any]:
+        """Execute jobs inside a single transaction on the writer connection."""
+        results: List[Any] = []
+        with self.pool.writer() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                for job in jobs:
+                    conn.execute("SAVEPOINT write_job")
+                    try:
+                        results.append(job(conn))
+                    except Exception as e:
+                        conn.execute("ROLLBACK TO write_job")
+                        results.append(e)
+                    conn.execute("RELEASE write_job")
+                conn.execute("COMMIT")
+            except Exception:
+                if conn.in_transaction:
+                    conn.execute("ROLLBACK")
+                raise
+        return results
+
+    async def drain(self) -> None:
+        """Commit everything that is queued or in flight."""
+        while self._pending or self._in_flight:
+            if self._pending:
+                self._start_flush()
+            if self._in_flight:
+                await asyncio.gather(*list(self._in_flight), return_exceptions=True)
+
+    def stats(self) -> Dict[str, Any]:
+        """Get group-commit metrics."""
+        return {
+            'depth': len(self._pending),
+            'outstanding': self._outstanding,
+            'blocked_submits': self._blocked,
+            'peak_depth': self._peak_depth,
+            'batches': self._batches,
+            'statements': self._statements,
+            'failed_batches': self._failed_batches,
+            'last_batch_size': self._last_batch_size,
+            'avg_batch_size': self._statements / self._batches if self._batches else 0.0,
+            'avg_commit_ms': self._commit_seconds * 1000 / self._batches if self._batches else 0.0,
+            'max_batch': self.max_batch,
+            'max_latency_ms': self.max_latency * 1000
+        }
@@ -1,7 +1,7 @@
 """Domain entities for the ticket system."""
 
-from dataclasses import dataclass
-from typing import List, Optional
+from dataclasses import dataclass, field
+from typing import Dict, FrozenSet, List, Optional
 from datetime import datetime
 from enum import Enum
 
@@ -26,15 +26,19 @@ class TicketPriority(Enum):
     URGENT = "urgent"
 
 
-@dataclass
+@dataclass(slots=True)
 class FormQuestion:
     """Represents a form question."""
     order: int
     text: str
     id: Optional[int] = None
+    style: str = "long"
+    min_length: int = 0
+    max_length: int = 1000
+    required: bool = True
 
 
-@dataclass
+@dataclass(slots=True)
 class FormResponse:
     """Represents a form response."""
     question_order: int
@@ -43,7 +47,7 @@ class FormResponse:
     id: Optional[int] = None
 
 
-@dataclass
+@dataclass(slots=True)
 class GuildSettings:
     """Represents guild ticket settings."""
     guild_id: int
@@ -54,7 +58,7 @@ class GuildSettings:
     updated_at: Optional[datetime] = None
 
 
-@dataclass
+@dataclass(slots=True)
 class Ticket:
     """Represents a ticket."""
     guild_id: int
@@ -73,7 +77,7 @@ class Ticket:
     form_responses: Optional[List[FormResponse]] = None
 
 
-@dataclass
+@dataclass(slots=True)
 class TicketRole:
     """Represents a role with access to tickets."""
     guild_id: int
@@ -82,7 +86,7 @@ class TicketRole:
     created_at: Optional[datetime] = None
 
 
-@dataclass
+@dataclass(slots=True)
 class CoOwner:
     """Represents a co-owner of a guild."""
     guild_id: int
@@ -92,7 +96,49 @@ class CoOwner:
     created_at: Optional[datetime] = None
 
 
-@dataclass
+@dataclass(slots=True)
+class GuildConfig:
+    """Bundle of everything the ticket flows need to know about a guild."""
+    guild_id: int
+    settings: Optional[GuildSettings] = None
+    ticket_roles: List[TicketRole] = field(default_factory=list)
+    form_questions: List[FormQuestion] = field(default_factory=list)
+    co_owners: List[CoOwner] = field(default_factory=list)
+    staff_role_ids: FrozenSet[int] = field(init=False)
+    co_owner_ids: FrozenSet[int] = field(init=False)
+    
+    def __post_init__(self):
+        # Precompiled for in-memory permission checks
+        self.staff_role_ids = frozenset(role.role_id for role in self.ticket_roles)
+        self.co_owner_ids = frozenset(co_owner.user_id for co_owner in self.co_owners)
+
+
+@dataclass(slots=True)
+class FormSession:
+    """A settings panel form that a user is filling in.
+    
+    Questions are kept as specs ("text [options]") to notice when the form
+    changes while it is filled in; answers by question index.
+    """
+    guild_id: int
+    user_id: int
+    questions: List[str]
+    ticket_format: str = "text"
+    forum_channel_id: int = 0
+    welcome_message: str = ""
+    answers: Dict[int, str] = field(default_factory=dict)
+    current: int = 0
+    
+    @property
+    def key(self) -> tuple:
+        return (self.guild_id, self.user_id)
+    
+    @property
+    def finished(self) -> bool:
+        return self.current >= len(self.questions)
+
+
+@dataclass(slots=True)
 class TicketNote:
     """Represents an internal note for a ticket."""
     ticket_id: int
@@ -102,7 +148,7 @@ class TicketNote:
     created_at: Optional[datetime] = None
 
 
-@dataclass
+@dataclass(slots=True)
 class TicketParticipant:
     """Represents a participant added to a ticket."""
     ticket_id: int
@@ -112,7 +158,7 @@ class TicketParticipant:
     created_at: Optional[datetime] = None
 
 
-@dataclass
+@dataclass(slots=True)
 class TicketTranscript:
     """Represents a ticket transcript."""
     ticket_id: int
@@ -123,12 +169,19 @@ class TicketTranscript:
     created_at: Optional[datetime] = None
 
 
-@dataclass
+@dataclass(slots=True)
 class TicketCategory:
-    """Represents a ticket category."""
+    """Represents a ticket category.
+    
+    Rows with a partition map the category to one of the Discord categories
+    its channels are spread over: partition 1 is named like the category,
+    later ones get a "-2", "-3" ... suffix.
+    """
     guild_id: int
     name: str
     description: Optional[str] = None
     emoji: Optional[str] = None
+    partition: Optional[int] = None
+    discord_category_id: Optional[int] = None
     id: Optional[int] = None
     created_at: Optional[datetime] = None
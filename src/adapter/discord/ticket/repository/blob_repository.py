@@ -0,0 +1,73 @@
+"""Repository for blob reference counts."""
+
+import time
+from typing import List, Optional, Tuple
+from ..database.models import DatabaseManager
+
+
+class BlobRepository:
+    """Reference counts and metadata of the blobs in the blob store.
+
+    A blob whose count drops to zero keeps its row, with the time it was
+    released, until the garbage collector removes it.
+    """
+
+    def __init__(self, db_manager: DatabaseManager):
+        self.db = db_manager
+
+    async def get_blob(self, blob_hash: str) -> Optional[Tuple[str, str, int, int, int]]:
+        """Get the (kind, codec, size, stored_size, refs) of a blob."""
+        return await self.db.fetch_row(
+            "SELECT kind, codec, size, stored_size, refs FROM blobs WHERE hash = ?",
+            (blob_hash,)
+        )
+
+    async def add_ref(self, blob_hash: str) -> bool:
+        """Add a reference to a stored blob. Returns False if it is not stored."""
+        affected = await self.db.execute_write(
+            "UPDATE blobs SET refs = refs + 1, released_at = NULL WHERE hash = ?",
+            (blob_hash,)
+        )
+        return affected > 0
+
+    async def insert_blob(self, blob_hash: str, kind: str, codec: str, size: int, stored_size: int) -> None:
+        """Record a newly written blob with one reference."""
+        await self.db.execute_write(
+            """INSERT INTO blobs (hash, kind, codec, size, stored_size, refs)
+               VALUES (?, ?, ?, ?, ?, 1)
+               ON CONFLICT (hash) DO UPDATE SET refs = refs + 1, released_at = NULL""",
+            (blob_hash, kind, codec, size, stored_size)
+        )
+
+    async def release(self, blob_hashes: List[str]) -> None:
+        """Drop one reference per listed hash; repeated hashes drop several."""
+        await self.db.execute_many(
+            """UPDATE blobs SET refs = MAX(refs - 1, 0),
+                   released_at = CASE WHEN refs <= 1 THEN ? ELSE NULL END
+               WHERE hash = ?""",
+            [(time.time(), blob_hash) for blob_hash in blob_hashes]
+        )
+
+    async def get_released(self, before: float, limit: int) -> List[Tuple[str, str]]:
+        """Get (hash, kind) of unreferenced blobs released before a time."""
+        return await self.db.fetch_rows(
+            """SELECT hash, kind FROM blobs
+               WHERE refs = 0 AND released_at < ?
+               ORDER BY released_at LIMIT ?""",
+            (before, limit)
+        )
+
+    async def delete_unreferenced(self, blob_hash: str) -> bool:
+        """Delete a blob row if it is still unreferenced. Returns True if deleted."""
+        affected = await self.db.execute_write(
+            "DELETE FROM blobs WHERE hash = ? AND refs = 0",
+            (blob_hash,)
+        )
+        return affected > 0
+
+    async def get_totals(self) -> Tuple[int, int, int]:
+        """Get (blob count, total size, total stored size)."""
+        row = await self.db.fetch_row(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0), COALESCE(SUM(stored_size), 0) FROM blobs"
+        )
+        return row
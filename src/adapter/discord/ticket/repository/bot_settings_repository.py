@@ -0,0 +1,135 @@
+"""Repository for per-guild bot settings."""
+
+from typing import Callable, Dict, Optional, Set
+from ..database.models import DatabaseManager
+
+
+class BotSettingsRepository:
+    """Per-guild key/value bot settings with a read-through cache.
+
+    Rows stored under DEFAULTS_GUILD_ID hold values shared by every guild
+    (the legacy global settings are migrated there); a guild's own rows
+    override them.
+
+    Saving or invalidating a guild bumps its generation; a load only fills
+    the cache for guilds whose generation did not change while it ran.
+    """
+
+    DEFAULTS_GUILD_ID = 0
+
+    def __init__(self, db_manager: DatabaseManager):
+        self.db = db_manager
+        self._cache: Dict[int, Dict[str, str]] = {}
+        self._fully_loaded = False
+        self._stale: Set[int] = set()
+        self._generations: Dict[int, int] = {}
+        self._epoch = 0
+        self.hits = 0
+        self.misses = 0
+        # Called with a guild id after its settings were saved here, e.g. to notify other clusters
+        self.invalidation_hook: Optional[Callable[[int], None]] = None
+
+    def _bump(self, guild_id: int) -> None:
+        self._generations[guild_id] = self._generations.get(guild_id, 0) + 1
+
+    async def load_all(self) -> None:
+        """Warm the cache with the settings of every guild."""
+        epoch, generations = self._epoch, dict(self._generations)
+        results = await self.db.execute(
+            "SELECT guild_id, key, value FROM guild_bot_settings"
+        )
+        if self._epoch != epoch:
+            return  # Everything was invalidated meanwhile
+        cache: Dict[int, Dict[str, str]] = {}
+        for row in results:
+            cache.setdefault(row['guild_id'], {})[row['key']] = row['value']
+        # Guilds saved or invalidated during the load keep what they have now
+        changed = {
+            guild_id for guild_id, generation in self._generations.items()
+            if generations.get(guild_id) != generation
+        }
+        for guild_id in changed:
+            cache.pop(guild_id, None)
+            if guild_id in self._cache:
+                cache[guild_id] = self._cache[guild_id]
+        self._cache = cache
+        self._fully_loaded = True
+        self._stale = {guild_id for guild_id in changed if guild_id not in cache}
+
+    async def _get_raw(self, guild_id: int) -> Dict[str, str]:
+        """Get a guild's own settings, loading them on a cache miss."""
+        cached = self._cache.get(guild_id)
+        if cached is not None or (self._fully_loaded and guild_id not in self._stale):
+            self.hits += 1
+            return cached or {}
+
+        self.misses += 1
+        keys = (self.DEFAULTS_GUILD_ID, guild_id)
+        generations = {key: self._epoch + self._generations.get(key, 0) for key in keys}
+        results = await self.db.execute(
+            "SELECT guild_id, key, value FROM guild_bot_settings WHERE guild_id IN (?, ?)",
+            (self.DEFAULTS_GUILD_ID, guild_id)
+        )
+        loaded: Dict[int, Dict[str, str]] = {self.DEFAULTS_GUILD_ID: {}, guild_id: {}}
+        for row in results:
+            loaded[row['guild_id']][row['key']] = row['value']
+        for key, values in loaded.items():
+            # Saved or invalidated while loading: the result may be stale
+            if self._epoch + self._generations.get(key, 0) == generations[key]:
+                self._cache[key] = values
+                self._stale.discard(key)
+        return loaded[guild_id]
+
+    async def get_settings(self, guild_id: int) -> Dict[str, str]:
+        """Get the effective settings of a guild."""
+        # Loading a guild also loads the defaults, so fetch the guild first
+        own = await self._get_raw(guild_id)
+        defaults = await self._get_raw(self.DEFAULTS_GUILD_ID)
+        return {**defaults, **own}
+
+    async def get_setting(self, guild_id: int, key: str, default: Optional[str] = None) -> Optional[str]:
+        """Get a single effective setting of a guild."""
+        settings = await self.get_settings(guild_id)
+        return settings.get(key, default)
+
+    async def save_settings(self, guild_id: int, **kwargs) -> None:
+        """Save settings for a guild and update the cache once written."""
+        if not kwargs:
+            return
+
+        values = {key: str(value) for key, value in kwargs.items()}
+        await self.db.execute_many(
+            """INSERT INTO guild_bot_settings (guild_id, key, value, updated_at)
+               VALUES (?, ?, ?, CURRENT_TIMESTAMP)
+               ON CONFLICT (guild_id, key) DO UPDATE
+               SET value = excluded.value, updated_at = excluded.updated_at""",
+            [(guild_id, key, value) for key, value in values.items()]
+        )
+
+        # Loads that read the old values must not cache them
+        self._bump(guild_id)
+        cached = self._cache.get(guild_id)
+        if cached is not None or (self._fully_loaded and guild_id not in self._stale):
+            self._cache[guild_id] = {**(cached or {}), **values}
+        if self.invalidation_hook is not None:
+            self.invalidation_hook(guild_id)
+
+    def invalidate(self, guild_id: Optional[int] = None) -> None:
+        """Drop cached settings for one guild, or all of them."""
+        if guild_id is None:
+            self._cache.clear()
+            self._fully_loaded = False
+            self._stale.clear()
+            self._epoch += 1
+        else:
+            self._cache.pop(guild_id, None)
+            self._stale.add(guild_id)
+            self._bump(guild_id)
+
+    def stats(self) -> Dict[str, int]:
+        """Get cache metrics."""
+        return {
+            'guilds': len(self._cache),
+            'hits': self.hits,
+            'misses': self.misses
+        }
@@ -0,0 +1,40 @@
+"""Repository for application command sync state."""
+
+from typing import Optional, Tuple
+from ..database.models import DatabaseManager
+
+
+class CommandSyncRepository:
+    """Hash of the command tree last synced to each scope.
+
+    A scope is the global command list or a single guild's command list of
+    one application.
+    """
+
+    def __init__(self, db_manager: DatabaseManager):
+        self.db = db_manager
+
+    async def get_state(self, scope: str) -> Optional[Tuple[str, int, float]]:
+        """Get the (hash, command_count, sync_seconds) of the last sync to a scope."""
+        return await self.db.fetch_row(
+            "SELECT hash, command_count, sync_seconds FROM command_sync_state WHERE scope = ?",
+            (scope,)
+        )
+
+    async def save_state(self, scope: str, tree_hash: str, command_count: int, sync_seconds: float) -> None:
+        """Record a successful sync to a scope."""
+        await self.db.execute_write(
+            """INSERT INTO command_sync_state (scope, hash, command_count, sync_seconds, synced_at)
+               VALUES (?, ?, ?, ?, CURRENT_TIMESTAMP)
+               ON CONFLICT (scope) DO UPDATE
+               SET hash = excluded.hash, command_count = excluded.command_count,
+                   sync_seconds = excluded.sync_seconds, synced_at = excluded.synced_at""",
+            (scope, tree_hash, command_count, sync_seconds)
+        )
+
+    async def clear_state(self, scope: Optional[str] = None) -> None:
+        """Forget sync state so the next startup syncs again."""
+        if scope is None:
+            await self.db.execute_write("DELETE FROM command_sync_state")
+        else:
+            await self.db.execute_write("DELETE FROM command_sync_state WHERE scope = ?", (scope,))
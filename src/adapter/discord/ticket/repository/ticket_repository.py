@@ -1,33 +1,190 @@
 """Repository for ticket-related database operations."""
 
-from typing import List, Optional
-from ..database.models import DatabaseManager
+import json
+from contextlib import aclosing, asynccontextmanager
+from typing import AsyncIterator, List, Optional, Tuple, Union
+from ..database.models import DatabaseManager, tuple_cursor
+from ..database.transaction import Transaction, TxResult
 from ..domain.entities import (
     GuildSettings, Ticket, TicketRole, FormQuestion, 
-    FormResponse, CoOwner, TicketType, TicketStatus
+    FormResponse, CoOwner, GuildConfig, TicketType, TicketStatus, FormSession,
+    TicketTranscript, TicketCategory
 )
 
 
+# Column lists the row mappers below decode by position
+GUILD_SETTINGS_COLUMNS = "guild_id, ticket_type, welcome_message, target_channel_id"
+FORM_QUESTION_COLUMNS = "id, question_order, question_text, style, min_length, max_length, required"
+TICKET_ROLE_COLUMNS = "id, guild_id, role_id"
+CO_OWNER_COLUMNS = "id, guild_id, user_id, assigned_by"
+TICKET_COLUMNS = "id, guild_id, user_id, channel_id, ticket_type, status"
+FORM_RESPONSE_COLUMNS = "id, question_order, question_text, response_text"
+FORM_SESSION_COLUMNS = "guild_id, user_id, data, expires_at"
+TRANSCRIPT_COLUMNS = "id, ticket_id, created_by, transcript_url, message_count"
+TICKET_CATEGORY_COLUMNS = "id, guild_id, name, description, emoji, partition, discord_category_id"
+
+# Enum decoding as a dict lookup instead of an Enum(value) call per row
+_TICKET_TYPES = {member.value: member for member in TicketType}
+_TICKET_STATUSES = {member.value: member for member in TicketStatus}
+
+
+def _guild_settings_from_row(row: tuple) -> GuildSettings:
+    """Build GuildSettings from a GUILD_SETTINGS_COLUMNS row."""
+    guild_id, ticket_type, welcome_message, target_channel_id = row
+    return GuildSettings(guild_id, _TICKET_TYPES[ticket_type], welcome_message, target_channel_id)
+
+
+def _form_question_from_row(row: tuple) -> FormQuestion:
+    """Build a FormQuestion from a FORM_QUESTION_COLUMNS row."""
+    question_id, order, text, style, min_length, max_length, required = row
+    return FormQuestion(order, text, question_id, style, min_length, max_length, bool(required))
+
+
+def _ticket_role_from_row(row: tuple) -> TicketRole:
+    """Build a TicketRole from a TICKET_ROLE_COLUMNS row."""
+    role_row_id, guild_id, role_id = row
+    return TicketRole(guild_id, role_id, role_row_id)
+
+
+def _co_owner_from_row(row: tuple) -> CoOwner:
+    """Build a CoOwner from a CO_OWNER_COLUMNS row."""
+    co_owner_id, guild_id, user_id, assigned_by = row
+    return CoOwner(guild_id, user_id, assigned_by, co_owner_id)
+
+
+def _ticket_from_row(row: tuple) -> Ticket:
+    """Build a Ticket from a TICKET_COLUMNS row."""
+    ticket_id, guild_id, user_id, channel_id, ticket_type, status = row
+    return Ticket(
+        guild_id, user_id, channel_id,
+        _TICKET_TYPES[ticket_type], _TICKET_STATUSES[status],
+        id=ticket_id
+    )
+
+
+def _form_response_from_row(row: tuple) -> FormResponse:
+    """Build a FormResponse from a FORM_RESPONSE_COLUMNS row."""
+    response_id, question_order, question_text, response_text = row
+    return FormResponse(question_order, question_text, response_text, response_id)
+
+
+def _form_session_data(session: FormSession) -> str:
+    """Serialize the progress of a form session for the data column."""
+    return json.dumps({
+        'questions': session.questions,
+        'ticket_format': session.ticket_format,
+        'forum_channel_id': session.forum_channel_id,
+        'welcome_message': session.welcome_message,
+        'answers': session.answers,
+        'current': session.current
+    })
+
+
+def _form_session_from_row(row: tuple) -> Tuple[FormSession, float]:
+    """Build a FormSession and its expiry time from a FORM_SESSION_COLUMNS row."""
+    guild_id, user_id, data, expires_at = row
+    data = json.loads(data)
+    session = FormSession(
+        guild_id, user_id, data['questions'], data['ticket_format'],
+        data['forum_channel_id'], data['welcome_message'],
+        # JSON object keys are strings
+        {int(index): answer for index, answer in data['answers'].items()},
+        data['current']
+    )
+    return session, expires_at
+
+
+def _transcript_from_row(row: tuple) -> TicketTranscript:
+    """Build a TicketTranscript from a TRANSCRIPT_COLUMNS row."""
+    transcript_id, ticket_id, created_by, transcript_url, message_count = row
+    return TicketTranscript(ticket_id, created_by, transcript_url, message_count, transcript_id)
+
+
+def _ticket_category_from_row(row: tuple) -> TicketCategory:
+    """Build a TicketCategory from a TICKET_CATEGORY_COLUMNS row."""
+    category_id, guild_id, name, description, emoji, partition, discord_category_id = row
+    return TicketCategory(guild_id, name, description, emoji, partition, discord_category_id, category_id)
+
+
+class TicketTransaction:
+    """Repository operations that commit together in one transaction."""
+    
+    def __init__(self, tx: Transaction):
+        self.tx = tx
+    
+    def create_ticket(self, ticket: Ticket) -> TxResult:
+        """Create a new ticket. Resolves to the ticket ID."""
+        return self.tx.execute_write(
+            """INSERT INTO tickets (guild_id, user_id, channel_id, ticket_type, status, last_activity)
+               VALUES (?, ?, ?, ?, ?, CURRENT_TIMESTAMP)""",
+            (ticket.guild_id, ticket.user_id, ticket.channel_id,
+             ticket.ticket_type.value, ticket.status.value)
+        )
+    
+    def save_form_responses(
+        self,
+        ticket_id: Union[int, TxResult],
+        responses: List[FormResponse]
+    ) -> TxResult:
+        """Save form responses for a ticket created earlier in the transaction."""
+        return self.tx.execute_many(
+            """INSERT INTO form_responses 
+               (ticket_id, question_order, question_text, response_text)
+               VALUES (?, ?, ?, ?)""",
+            [
+                (ticket_id, response.question_order,
+                 response.question_text, response.response_text)
+                for response in responses
+            ]
+        )
+    
+    def close_ticket_by_channel(self, channel_id: int) -> TxResult:
+        """Close the ticket of a channel if it is open.
+        
+        Resolves to the closed Ticket, or None if there was nothing to close.
+        """
+        def _close(conn):
+            row = conn.execute(
+                f"SELECT {TICKET_COLUMNS} FROM tickets WHERE channel_id = ?", (channel_id,)
+            ).fetchone()
+            if row is None:
+                return None
+            
+            ticket = _ticket_from_row(row)
+            if ticket.status != TicketStatus.OPEN:
+                return None
+            
+            conn.execute(
+                "UPDATE tickets SET status = ?, closed_at = CURRENT_TIMESTAMP WHERE id = ?",
+                (TicketStatus.CLOSED.value, ticket.id)
+            )
+            ticket.status = TicketStatus.CLOSED
+            return ticket
+        
+        return self.tx.call(_close)
+
+
 class TicketRepository:
     """Repository for ticket system data access."""
     
     def __init__(self, db_manager: DatabaseManager):
         self.db = db_manager
     
+    @asynccontextmanager
+    async def transaction(self) -> AsyncIterator[TicketTransaction]:
+        """Group repository operations into one executor hop and one commit."""
+        async with self.db.transaction() as tx:
+            yield TicketTransaction(tx)
+    
     # Guild Settings
     async def get_guild_settings(self, guild_id: int) -> Optional[GuildSettings]:
         """Get guild settings."""
-        result = await self.db.execute_one(
-            "SELECT * FROM guild_settings WHERE guild_id = ?",
+        row = await self.db.fetch_row(
+            f"SELECT {GUILD_SETTINGS_COLUMNS} FROM guild_settings WHERE guild_id = ?",
             (guild_id,)
         )
-        if result:
-            return GuildSettings(
-                guild_id=result['guild_id'],
-                ticket_type=TicketType(result['ticket_type']),
-                welcome_message=result['welcome_message'],
-                target_channel_id=result['target_channel_id']
-            )
+        if row:
+            return _guild_settings_from_row(row)
         return None
     
     async def save_guild_settings(self, settings: GuildSettings) -> None:
@@ -40,52 +197,65 @@ class TicketRepository:
              settings.welcome_message, settings.target_channel_id)
         )
     
+    async def get_guild_config(self, guild_id: int) -> GuildConfig:
+        """Load settings, roles, questions and co-owners of a guild in one round trip."""
+        def _load(conn) -> GuildConfig:
+            cursor = tuple_cursor(conn)
+            settings_row = cursor.execute(
+                f"SELECT {GUILD_SETTINGS_COLUMNS} FROM guild_settings WHERE guild_id = ?",
+                (guild_id,)
+            ).fetchone()
+            questions = cursor.execute(
+                f"SELECT {FORM_QUESTION_COLUMNS} FROM form_questions "
+                "WHERE guild_id = ? ORDER BY question_order",
+                (guild_id,)
+            ).fetchall()
+            roles = cursor.execute(
+                f"SELECT {TICKET_ROLE_COLUMNS} FROM ticket_roles WHERE guild_id = ?", (guild_id,)
+            ).fetchall()
+            co_owners = cursor.execute(
+                f"SELECT {CO_OWNER_COLUMNS} FROM co_owners WHERE guild_id = ?", (guild_id,)
+            ).fetchall()
+            return GuildConfig(
+                guild_id=guild_id,
+                settings=_guild_settings_from_row(settings_row) if settings_row else None,
+                form_questions=[_form_question_from_row(row) for row in questions],
+                ticket_roles=[_ticket_role_from_row(row) for row in roles],
+                co_owners=[_co_owner_from_row(row) for row in co_owners]
+            )
+        
+        return await self.db.run_read(_load)
+    
     # Form Questions
     async def get_form_questions(self, guild_id: int) -> List[FormQuestion]:
         """Get form questions for a guild."""
-        results = await self.db.execute(
-            "SELECT * FROM form_questions WHERE guild_id = ? ORDER BY question_order",
+        rows = await self.db.fetch_rows(
+            f"SELECT {FORM_QUESTION_COLUMNS} FROM form_questions WHERE guild_id = ? ORDER BY question_order",
             (guild_id,)
         )
-        return [
-            FormQuestion(
-                id=row['id'],
-                order=row['question_order'],
-                text=row['question_text']
-            )
-            for row in results
-        ]
+        return [_form_question_from_row(row) for row in rows]
     
     async def save_form_questions(self, guild_id: int, questions: List[FormQuestion]) -> None:
-        """Save form questions for a guild."""
-        # Delete existing questions
-        await self.db.execute_write(
-            "DELETE FROM form_questions WHERE guild_id = ?",
-            (guild_id,)
+        """Save form questions for a guild, replacing the existing set atomically."""
+        statements = [("DELETE FROM form_questions WHERE guild_id = ?", (guild_id,))]
+        statements.extend(
+            ("""INSERT INTO form_questions
+                (guild_id, question_order, question_text, style, min_length, max_length, required)
+                VALUES (?, ?, ?, ?, ?, ?, ?)""",
+             (guild_id, question.order, question.text, question.style,
+              question.min_length, question.max_length, int(question.required)))
+            for question in questions
         )
-        
-        # Insert new questions
-        for question in questions:
-            await self.db.execute_write(
-                "INSERT INTO form_questions (guild_id, question_order, question_text) VALUES (?, ?, ?)",
-                (guild_id, question.order, question.text)
-            )
+        await self.db.execute_batch(statements)
     
     # Ticket Roles
     async def get_ticket_roles(self, guild_id: int) -> List[TicketRole]:
         """Get ticket roles for a guild."""
-        results = await self.db.execute(
-            "SELECT * FROM ticket_roles WHERE guild_id = ?",
+        rows = await self.db.fetch_rows(
+            f"SELECT {TICKET_ROLE_COLUMNS} FROM ticket_roles WHERE guild_id = ?",
             (guild_id,)
         )
-        return [
-            TicketRole(
-                id=row['id'],
-                guild_id=row['guild_id'],
-                role_id=row['role_id']
-            )
-            for row in results
-        ]
+        return [_ticket_role_from_row(row) for row in rows]
     
     async def add_ticket_role(self, guild_id: int, role_id: int) -> None:
         """Add a ticket role."""
@@ -106,8 +276,8 @@ class TicketRepository:
     async def create_ticket(self, ticket: Ticket) -> int:
         """Create a new ticket. Returns ticket ID."""
         ticket_id = await self.db.execute_write(
-            """INSERT INTO tickets (guild_id, user_id, channel_id, ticket_type, status)
-               VALUES (?, ?, ?, ?, ?)""",
+            """INSERT INTO tickets (guild_id, user_id, channel_id, ticket_type, status, last_activity)
+               VALUES (?, ?, ?, ?, ?, CURRENT_TIMESTAMP)""",
             (ticket.guild_id, ticket.user_id, ticket.channel_id, 
              ticket.ticket_type.value, ticket.status.value)
         )
@@ -115,21 +285,67 @@ class TicketRepository:
     
     async def get_ticket_by_channel(self, channel_id: int) -> Optional[Ticket]:
         """Get ticket by channel ID."""
-        result = await self.db.execute_one(
-            "SELECT * FROM tickets WHERE channel_id = ?",
+        row = await self.db.fetch_row(
+            f"SELECT {TICKET_COLUMNS} FROM tickets WHERE channel_id = ?",
             (channel_id,)
         )
-        if result:
-            return Ticket(
-                id=result['id'],
-                guild_id=result['guild_id'],
-                user_id=result['user_id'],
-                channel_id=result['channel_id'],
-                ticket_type=TicketType(result['ticket_type']),
-                status=TicketStatus(result['status'])
-            )
+        if row:
+            return _ticket_from_row(row)
+        return None
+    
+    async def get_open_ticket_by_user(self, guild_id: int, user_id: int) -> Optional[Ticket]:
+        """Get the newest open channel ticket of a user in a guild."""
+        row = await self.db.fetch_row(
+            f"""SELECT {TICKET_COLUMNS} FROM tickets
+                WHERE guild_id = ? AND user_id = ? AND status = ? AND ticket_type = ?
+                ORDER BY id DESC LIMIT 1""",
+            (guild_id, user_id, TicketStatus.OPEN.value, TicketType.SIMPLE.value)
+        )
+        if row:
+            return _ticket_from_row(row)
         return None
     
+    async def iter_open_tickets(self, chunk_size: int = 5000) -> AsyncIterator[List[tuple]]:
+        """Stream open channel tickets as (id, guild_id, user_id, channel_id) chunks.
+        
+        Form tickets share their target channel, so only tickets that own a
+        channel are included.
+        """
+        async with aclosing(self.db.stream(
+            """SELECT id, guild_id, user_id, channel_id FROM tickets
+               WHERE status = ? AND ticket_type = ?""",
+            (TicketStatus.OPEN.value, TicketType.SIMPLE.value),
+            chunk_size
+        )) as chunks:
+            async for rows in chunks:
+                yield rows
+    
+    async def iter_ticket_activity(self, chunk_size: int = 5000) -> AsyncIterator[List[tuple]]:
+        """Stream open channel tickets as (id, guild_id, channel_id, last_activity) chunks.
+        
+        last_activity is in Unix seconds, oldest first.
+        """
+        async with aclosing(self.db.stream(
+            """SELECT id, guild_id, channel_id, CAST(strftime('%s', last_activity) AS REAL) FROM tickets
+               WHERE status = ? AND ticket_type = ?
+               ORDER BY last_activity""",
+            (TicketStatus.OPEN.value, TicketType.SIMPLE.value),
+            chunk_size
+        )) as chunks:
+            async for rows in chunks:
+                yield rows
+    
+    async def update_ticket_activity(self, activity: List[Tuple[int, float]]) -> int:
+        """Set last_activity of open tickets from (channel_id, Unix time) pairs in one transaction.
+        
+        Returns the number of updated rows.
+        """
+        return await self.db.execute_many(
+            """UPDATE tickets SET last_activity = datetime(?, 'unixepoch')
+               WHERE channel_id = ? AND status = ?""",
+            [(when, channel_id, TicketStatus.OPEN.value) for channel_id, when in activity]
+        )
+    
     async def close_ticket(self, ticket_id: int) -> None:
         """Close a ticket."""
         await self.db.execute_write(
@@ -137,33 +353,139 @@ class TicketRepository:
             (TicketStatus.CLOSED.value, ticket_id)
         )
     
+    # Channel deletions
+    async def schedule_channel_deletion(
+        self,
+        channel_id: int,
+        guild_id: Optional[int],
+        due_at: float,
+        reason: Optional[str] = None
+    ) -> None:
+        """Persist a pending channel deletion, moving it if already scheduled."""
+        await self.db.execute_write(
+            """INSERT INTO channel_deletions (channel_id, guild_id, due_at, reason)
+               VALUES (?, ?, ?, ?)
+               ON CONFLICT (channel_id) DO UPDATE
+               SET due_at = excluded.due_at, reason = excluded.reason""",
+            (channel_id, guild_id, due_at, reason)
+        )
+    
+    async def get_channel_deletions(self) -> List[tuple]:
+        """Get pending deletions as (channel_id, guild_id, due_at, reason, attempts) rows."""
+        return await self.db.fetch_rows(
+            "SELECT channel_id, guild_id, due_at, reason, attempts FROM channel_deletions ORDER BY due_at"
+        )
+    
+    async def reschedule_channel_deletion(self, channel_id: int, due_at: float, attempts: int) -> None:
+        """Move a failed deletion to a later retry time."""
+        await self.db.execute_write(
+            "UPDATE channel_deletions SET due_at = ?, attempts = ? WHERE channel_id = ?",
+            (due_at, attempts, channel_id)
+        )
+    
+    async def remove_channel_deletions(self, channel_ids: List[int]) -> None:
+        """Drop finished deletions."""
+        await self.db.execute_many(
+            "DELETE FROM channel_deletions WHERE channel_id = ?",
+            [(channel_id,) for channel_id in channel_ids]
+        )
+    
+    # Transcripts
+    async def save_transcript(self, transcript: TicketTranscript) -> int:
+        """Record an exported transcript. Returns its ID."""
+        return await self.db.execute_write(
+            """INSERT INTO ticket_transcripts (ticket_id, created_by, transcript_url, message_count)
+               VALUES (?, ?, ?, ?)""",
+            (transcript.ticket_id, transcript.created_by, transcript.transcript_url, transcript.message_count)
+        )
+    
+    async def get_transcript(self, ticket_id: int) -> Optional[TicketTranscript]:
+        """Get the newest transcript of a ticket."""
+        row = await self.db.fetch_row(
+            f"SELECT {TRANSCRIPT_COLUMNS} FROM ticket_transcripts WHERE ticket_id = ? ORDER BY id DESC LIMIT 1",
+            (ticket_id,)
+        )
+        if row:
+            return _transcript_from_row(row)
+        return None
+    
+    # Ticket categories
+    async def get_category_partitions(self, guild_id: int, name: str) -> List[TicketCategory]:
+        """Get the Discord categories a ticket category is spread over, by partition."""
+        rows = await self.db.fetch_rows(
+            f"""SELECT {TICKET_CATEGORY_COLUMNS} FROM ticket_categories
+                WHERE guild_id = ? AND name = ? AND partition IS NOT NULL
+                ORDER BY partition""",
+            (guild_id, name)
+        )
+        return [_ticket_category_from_row(row) for row in rows]
+    
+    async def save_category_partition(self, category: TicketCategory) -> None:
+        """Record the Discord category of a ticket category partition."""
+        await self.db.execute_write(
+            """INSERT INTO ticket_categories (guild_id, name, partition, discord_category_id)
+               VALUES (?, ?, ?, ?)
+               ON CONFLICT (guild_id, name, partition)
+               DO UPDATE SET discord_category_id = excluded.discord_category_id""",
+            (category.guild_id, category.name, category.partition, category.discord_category_id)
+        )
+    
+    # Form sessions
+    async def get_form_sessions(self, now: float) -> List[Tuple[FormSession, float]]:
+        """Get form sessions that have not expired, with their expiry times."""
+        rows = await self.db.fetch_rows(
+            f"SELECT {FORM_SESSION_COLUMNS} FROM form_sessions WHERE expires_at > ?", (now,)
+        )
+        return [_form_session_from_row(row) for row in rows]
+    
+    async def write_form_sessions(
+        self,
+        sessions: List[Tuple[FormSession, float]],
+        removed: List[Tuple[int, int]]
+    ) -> None:
+        """Upsert changed sessions and delete removed ones in one transaction."""
+        statements = [
+            (
+                """INSERT INTO form_sessions (guild_id, user_id, data, expires_at, updated_at)
+                   VALUES (?, ?, ?, ?, CURRENT_TIMESTAMP)
+                   ON CONFLICT (guild_id, user_id) DO UPDATE
+                   SET data = excluded.data, expires_at = excluded.expires_at,
+                       updated_at = excluded.updated_at""",
+                (session.guild_id, session.user_id, _form_session_data(session), expires_at)
+            )
+            for session, expires_at in sessions
+        ]
+        statements.extend(
+            ("DELETE FROM form_sessions WHERE guild_id = ? AND user_id = ?", key)
+            for key in removed
+        )
+        await self.db.execute_batch(statements)
+    
+    async def delete_expired_form_sessions(self, now: float) -> int:
+        """Delete sessions that expired, e.g. while the bot was offline."""
+        return await self.db.execute_write("DELETE FROM form_sessions WHERE expires_at <= ?", (now,))
+    
     # Form Responses
     async def save_form_responses(self, ticket_id: int, responses: List[FormResponse]) -> None:
         """Save form responses for a ticket."""
-        for response in responses:
-            await self.db.execute_write(
-                """INSERT INTO form_responses 
-                   (ticket_id, question_order, question_text, response_text)
-                   VALUES (?, ?, ?, ?)""",
-                (ticket_id, response.question_order, 
+        await self.db.execute_many(
+            """INSERT INTO form_responses 
+               (ticket_id, question_order, question_text, response_text)
+               VALUES (?, ?, ?, ?)""",
+            [
+                (ticket_id, response.question_order,
                  response.question_text, response.response_text)
-            )
+                for response in responses
+            ]
+        )
     
     async def get_form_responses(self, ticket_id: int) -> List[FormResponse]:
         """Get form responses for a ticket."""
-        results = await self.db.execute(
-            "SELECT * FROM form_responses WHERE ticket_id = ? ORDER BY question_order",
+        rows = await self.db.fetch_rows(
+            f"SELECT {FORM_RESPONSE_COLUMNS} FROM form_responses WHERE ticket_id = ? ORDER BY question_order",
             (ticket_id,)
         )
-        return [
-            FormResponse(
-                id=row['id'],
-                question_order=row['question_order'],
-                question_text=row['question_text'],
-                response_text=row['response_text']
-            )
-            for row in results
-        ]
+        return [_form_response_from_row(row) for row in rows]
     
     # Co-owners
     async def add_co_owner(self, guild_id: int, user_id: int, assigned_by: int) -> None:
@@ -183,19 +505,11 @@ class TicketRepository:
     
     async def get_co_owners(self, guild_id: int) -> List[CoOwner]:
         """Get co-owners for a guild."""
-        results = await self.db.execute(
-            "SELECT * FROM co_owners WHERE guild_id = ?",
+        rows = await self.db.fetch_rows(
+            f"SELECT {CO_OWNER_COLUMNS} FROM co_owners WHERE guild_id = ?",
             (guild_id,)
         )
-        return [
-            CoOwner(
-                id=row['id'],
-                guild_id=row['guild_id'],
-                user_id=row['user_id'],
-                assigned_by=row['assigned_by']
-            )
-            for row in results
-        ]
+        return [_co_owner_from_row(row) for row in rows]
     
     async def is_co_owner(self, guild_id: int, user_id: int) -> bool:
         """Check if user is a co-owner."""
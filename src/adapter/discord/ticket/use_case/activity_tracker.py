@@ -0,0 +1,122 @@
+"""Write-behind tracking of the last activity in ticket channels."""
+
+import asyncio
+import logging
+import time
+from typing import Any, Callable, Dict, Optional
+
+from ..config.settings import Settings
+from ..repository.ticket_repository import TicketRepository
+from .ticket_service import TicketService
+
+
+logger = logging.getLogger(__name__)
+
+
+class ActivityTracker:
+    """Keeps the latest message time of each ticket channel and writes it in batches.
+
+    Every message passes through record(). Channels not in the open ticket
+    index are discarded with one dict lookup. For ticket channels only the
+    newest timestamp is kept, so any number of messages between two flushes
+    costs one row update. Changed rows are written in one transaction every
+    flush interval and when the tracker closes.
+    """
+
+    def __init__(
+        self,
+        ticket_service: TicketService,
+        repository: TicketRepository,
+        flush_interval: float = Settings.ACTIVITY_FLUSH_INTERVAL
+    ):
+        self.ticket_service = ticket_service
+        self.repository = repository
+        self.flush_interval = flush_interval
+        # channel_id -> newest unwritten activity time
+        self._dirty: Dict[int, float] = {}
+        self._worker: Optional[asyncio.Task] = None
+        # Called with (channel_id, time) for each recorded message, e.g. to postpone idle closing
+        self.activity_hook: Optional[Callable[[int, float], Any]] = None
+
+        self.started_at = time.monotonic()
+        self.seen = 0
+        self.recorded = 0
+        self.rows_written = 0
+        self.flushes = 0
+
+    def __len__(self) -> int:
+        return len(self._dirty)
+
+    def record(self, message: Any) -> bool:
+        """Note a message's time if it was sent in a ticket channel. Returns True if it was."""
+        self.seen += 1
+        channel_id = message.channel.id
+        if channel_id not in self.ticket_service.ticket_index or message.author.bot:
+            return False
+
+        when = message.created_at.timestamp()
+        if when > self._dirty.get(channel_id, 0.0):
+            self._dirty[channel_id] = when
+        self.recorded += 1
+        if self.activity_hook is not None:
+            self.activity_hook(channel_id, when)
+        return True
+
+    def start(self) -> None:
+        """Start flushing in the background."""
+        self.started_at = time.monotonic()
+        self._worker = asyncio.create_task(self._run())
+
+    async def flush(self) -> int:
+        """Write pending activity times. Returns how many rows were updated."""
+        if not self._dirty:
+            return 0
+
+        dirty, self._dirty = self._dirty, {}
+        try:
+            updated = await self.repository.update_ticket_activity(list(dirty.items()))
+        except Exception:
+            # Keep the times for the next flush unless newer ones arrived meanwhile
+            for channel_id, when in dirty.items():
+                if when > self._dirty.get(channel_id, 0.0):
+                    self._dirty[channel_id] = when
+            raise
+        self.rows_written += len(dirty)
+        self.flushes += 1
+        return updated
+
+    async def _run(self) -> None:
+        """Flush pending activity every flush interval."""
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Failed to write ticket activity: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        """Get tracker metrics, including messages seen and rows written per second."""
+        elapsed = max(time.monotonic() - self.started_at, 1e-9)
+        return {
+            'seen': self.seen,
+            'recorded': self.recorded,
+            'rows_written': self.rows_written,
+            'pending_writes': len(self._dirty),
+            'flushes': self.flushes,
+            'seen_per_second': self.seen / elapsed,
+            'rows_per_second': self.rows_written / elapsed,
+            'messages_per_row': self.recorded / self.rows_written if self.rows_written else 0.0
+        }
+
+    async def close(self) -> None:
+        """Stop the background task and write pending activity."""
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+        await self.flush()
@@ -0,0 +1,330 @@
+"""Content-addressed, compressed, reference-counted storage of files."""
+
+import asyncio
+import hashlib
+import json
+import logging
+import mmap
+import os
+import time
+import zlib
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from ..config.settings import Settings
+from ..repository.blob_repository import BlobRepository
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+logger = logging.getLogger(__name__)
+
+BLOB_URL_PREFIX = "blob:"
+CODEC_EXTENSIONS = {"zstd": ".zst", "gzip": ".gz", "raw": ".raw"}
+
+# Data that does not compress below this ratio is stored as is
+_COMPRESS_SAMPLE = 64 * 1024
+_COMPRESS_MIN_RATIO = 0.9
+_CHUNK_SIZE = 1024 * 1024
+
+
+def blob_url(blob_hash: str) -> str:
+    """URL of a blob, as stored in ticket_transcripts.transcript_url."""
+    return f"{BLOB_URL_PREFIX}{blob_hash}"
+
+
+def parse_blob_url(url: str) -> Optional[str]:
+    """Get the hash a blob URL points to, or None for other URLs."""
+    return url[len(BLOB_URL_PREFIX):] if url and url.startswith(BLOB_URL_PREFIX) else None
+
+
+def _compressor(codec: str, level: int) -> Any:
+    if codec == "zstd":
+        return zstandard.ZstdCompressor(level=level).compressobj()
+    return zlib.compressobj(level, zlib.DEFLATED, 31)  # gzip framing
+
+
+def _decompressor(codec: str) -> Any:
+    if codec == "zstd":
+        return zstandard.ZstdDecompressor().decompressobj()
+    return zlib.decompressobj(31)
+
+
+class BlobStore:
+    """Stores each distinct content once, under the SHA-256 of its bytes.
+
+    Files live in hash-sharded directories (ab/cd/abcd...) and are
+    compressed with zstd when the zstandard package is installed, gzip
+    otherwise, or kept raw when they do not compress. Every put adds a
+    reference; release drops one. A background collector deletes blobs
+    that stayed unreferenced for the grace period. Manifests are JSON blobs
+    referencing other blobs and release them when collected.
+
+    Reads map the file into memory instead of copying it into Python.
+    """
+
+    def __init__(
+        self,
+        repository: BlobRepository,
+        directory: str = Settings.BLOB_DIR,
+        compress_level: int = Settings.BLOB_COMPRESS_LEVEL,
+        gc_interval: float = Settings.BLOB_GC_INTERVAL,
+        gc_grace: float = Settings.BLOB_GC_GRACE
+    ):
+        self.repository = repository
+        self.directory = directory
+        self.codec = "zstd" if zstandard is not None else "gzip"
+        self.compress_level = compress_level
+        self.gc_interval = gc_interval
+        self.gc_grace = gc_grace
+        # Puts and collection of the same hash must not interleave
+        self._lock = asyncio.Lock()
+        self._worker: Optional[asyncio.Task] = None
+
+        self.puts = 0
+        self.deduplicated = 0
+        self.collected = 0
+        self.bytes_collected = 0
+
+    def path(self, blob_hash: str, codec: str) -> str:
+        """Path of a blob stored with a codec."""
+        return os.path.join(self.directory, blob_hash[:2], blob_hash[2:4], blob_hash + CODEC_EXTENSIONS[codec])
+
+    def locate(self, blob_hash: str) -> Tuple[str, str]:
+        """Find the (path, codec) of a stored blob."""
+        for codec in CODEC_EXTENSIONS:
+            path = self.path(blob_hash, codec)
+            if os.path.exists(path):
+                return path, codec
+        raise FileNotFoundError(f"Blob {blob_hash} is not stored")
+
+    # Writing
+
+    def _write(self, blob_hash: str, data: memoryview) -> Tuple[str, int]:
+        """Write a blob file unless it exists. Returns (codec, stored size)."""
+        try:
+            path, codec = self.locate(blob_hash)
+            return codec, os.path.getsize(path)
+        except FileNotFoundError:
+            pass
+
+        codec = self.codec
+        sample = data[:_COMPRESS_SAMPLE]
+        if sample and len(zlib.compress(sample, 1)) > len(sample) * _COMPRESS_MIN_RATIO:
+            codec = "raw"
+
+        path = self.path(blob_hash, codec)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        with open(temp_path, "wb") as f:
+            if codec == "raw":
+                f.write(data)
+            else:
+                compressor = _compressor(codec, self.compress_level)
+                for start in range(0, len(data), _CHUNK_SIZE):
+                    f.write(compressor.compress(data[start:start + _CHUNK_SIZE]))
+                f.write(compressor.flush())
+        os.replace(temp_path, path)
+        return codec, os.path.getsize(path)
+
+    async def _put(self, blob_hash: str, size: int, kind: str, write: Callable[[], Tuple[str, int]]) -> bool:
+        """Add a reference, writing the blob if needed. Returns True if it was stored already."""
+        async with self._lock:
+            self.puts += 1
+            if await self.repository.add_ref(blob_hash):
+                self.deduplicated += 1
+                # A crash between writing a file and recording it can leave the row without the file
+                await asyncio.to_thread(write)
+                return True
+            codec, stored_size = await asyncio.to_thread(write)
+            await self.repository.insert_blob(blob_hash, kind, codec, size, stored_size)
+            return False
+
+    async def put(self, data: bytes, kind: str = "blob") -> str:
+        """Store bytes and add a reference to them. Returns the hash."""
+        blob_hash = hashlib.sha256(data).hexdigest()
+        await self._put(blob_hash, len(data), kind, lambda: self._write(blob_hash, memoryview(data)))
+        return blob_hash
+
+    async def put_file(self, path: str, kind: str = "blob") -> str:
+        """Store a file's contents and add a reference to them. Returns the hash."""
+        def hash_file() -> Tuple[str, int]:
+            with self._map(path) as data:
+                return hashlib.sha256(data).hexdigest(), len(data)
+
+        def write() -> Tuple[str, int]:
+            with self._map(path) as data:
+                return self._write(blob_hash, data)
+
+        blob_hash, size = await asyncio.to_thread(hash_file)
+        await self._put(blob_hash, size, kind, write)
+        return blob_hash
+
+    async def put_manifest(self, entries: Dict[str, Any]) -> str:
+        """Store a manifest of blobs already put, taking over their references.
+
+        entries maps names to hashes or to dicts of names to hashes. When an
+        identical manifest is stored already, the references of its entries
+        are dropped again so that each stored manifest holds one per entry.
+        """
+        data = json.dumps(entries, sort_keys=True, separators=(",", ":")).encode()
+        blob_hash = hashlib.sha256(data).hexdigest()
+        if await self._put(blob_hash, len(data), "manifest", lambda: self._write(blob_hash, memoryview(data))):
+            await self.repository.release(_manifest_hashes(entries))
+        return blob_hash
+
+    async def release(self, blob_hash: str) -> None:
+        """Drop one reference to a blob."""
+        await self.repository.release([blob_hash])
+
+    # Reading
+
+    @staticmethod
+    @contextmanager
+    def _map(path: str) -> Iterator[memoryview]:
+        with open(path, "rb") as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                yield memoryview(b"")
+                return
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                view = memoryview(mapped)
+                try:
+                    yield view
+                finally:
+                    view.release()
+
+    @contextmanager
+    def open_stored(self, blob_hash: str) -> Iterator[Tuple[memoryview, str]]:
+        """Map a blob's stored bytes into memory. Yields (bytes, codec)."""
+        path, codec = self.locate(blob_hash)
+        with self._map(path) as data:
+            yield data, codec
+
+    def iter_chunks(self, blob_hash: str, chunk_size: int = _CHUNK_SIZE) -> Iterator[bytes]:
+        """Yield the original content of a blob in chunks, decompressing as it goes."""
+        with self.open_stored(blob_hash) as (data, codec):
+            if codec == "raw":
+                for start in range(0, len(data), chunk_size):
+                    yield bytes(data[start:start + chunk_size])
+                return
+            decompressor = _decompressor(codec)
+            for start in range(0, len(data), chunk_size):
+                chunk = decompressor.decompress(data[start:start + chunk_size])
+                if chunk:
+                    yield chunk
+            rest = decompressor.flush()
+            if rest:
+                yield rest
+
+    def read(self, blob_hash: str) -> bytes:
+        """Read a whole blob; meant for small blobs such as manifests."""
+        return b"".join(self.iter_chunks(blob_hash))
+
+    def read_manifest(self, blob_hash: str) -> Dict[str, Any]:
+        """Read a manifest blob."""
+        return json.loads(self.read(blob_hash))
+
+    # Garbage collection
+
+    async def start(self) -> None:
+        """Start collecting unreferenced blobs in the background."""
+        if self.gc_interval > 0:
+            self._worker = asyncio.create_task(self._run())
+
+    async def collect(self, now: Optional[float] = None, batch_size: int = 500) -> int:
+        """Delete blobs unreferenced for longer than the grace period. Returns how many were deleted."""
+        now = time.time() if now is None else now
+        count = 0
+        while True:
+            candidates = await self.repository.get_released(now - self.gc_grace, batch_size)
+            if not candidates:
+                return count
+            for blob_hash, kind in candidates:
+                if await self._collect(blob_hash, kind):
+                    count += 1
+            if len(candidates) < batch_size:
+                return count
+
+    async def _collect(self, blob_hash: str, kind: str) -> bool:
+        """Delete an unreferenced blob.
+
+        The lock only covers this process; other clusters share the
+        directory. The file is therefore moved aside before the row is
+        deleted: a put that adds a reference to the row meanwhile makes the
+        delete fail and the file is moved back, while a put after the
+        delete no longer finds the file and writes it again.
+        """
+        children: List[str] = []
+        async with self._lock:
+            if kind == "manifest":
+                try:
+                    children = _manifest_hashes(self.read_manifest(blob_hash))
+                except FileNotFoundError:
+                    pass
+            try:
+                path, _ = self.locate(blob_hash)
+                doomed = f"{path}.{os.getpid()}.gc"
+                os.replace(path, doomed)
+            except FileNotFoundError:
+                path = doomed = None
+            if not await self.repository.delete_unreferenced(blob_hash):
+                if doomed is not None:
+                    os.replace(doomed, path)
+                return False  # Referenced again meanwhile
+            if doomed is not None:
+                self.bytes_collected += os.path.getsize(doomed)
+                os.remove(doomed)
+        self.collected += 1
+        if children:
+            await self.repository.release(children)
+        return True
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.gc_interval)
+            try:
+                collected = await self.collect()
+                if collected:
+                    logger.info(f"Collected {collected} unreferenced blob(s)")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Blob collection failed: {e}")
+
+    async def stats(self) -> Dict[str, Any]:
+        """Get store metrics."""
+        blobs, size, stored_size = await self.repository.get_totals()
+        return {
+            'codec': self.codec,
+            'blobs': blobs,
+            'size': size,
+            'stored_size': stored_size,
+            'puts': self.puts,
+            'deduplicated': self.deduplicated,
+            'collected': self.collected,
+            'bytes_collected': self.bytes_collected
+        }
+
+    async def close(self) -> None:
+        """Stop the collector."""
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+
+
+def _manifest_hashes(entries: Dict[str, Any]) -> List[str]:
+    """List every hash a manifest references, once per entry."""
+    hashes = []
+    for value in entries.values():
+        if isinstance(value, dict):
+            hashes.extend(value.values())
+        else:
+            hashes.append(value)
+    return hashes
@@ -0,0 +1,290 @@
+"""Resolution of the Discord category new ticket channels are created in."""
+
+import asyncio
+import logging
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional
+
+import discord
+
+from ..config.settings import Settings
+from ..domain.entities import TicketCategory
+from ..repository.ticket_repository import TicketRepository
+from ..utils.rest_scheduler import Priority, RestScheduler
+
+
+logger = logging.getLogger(__name__)
+
+
+def partition_name(name: str, partition: int) -> str:
+    """Name of a category partition: "tickets", "tickets-2", "tickets-3" ..."""
+    return name if partition == 1 else f"{name}-{partition}"
+
+
+def parse_partition(name: str, category_name: str) -> Optional[int]:
+    """Get the partition a Discord category name stands for, or None."""
+    category_name = category_name.lower()
+    if category_name == name:
+        return 1
+    prefix = f"{name}-"
+    if category_name.startswith(prefix):
+        suffix = category_name[len(prefix):]
+        if suffix.isdigit() and int(suffix) >= 2:
+            return int(suffix)
+    return None
+
+
+def _is_category(channel: Any) -> bool:
+    return channel.type == discord.ChannelType.category
+
+
+@dataclass(slots=True)
+class _GuildCategories:
+    # partition -> Discord category id
+    partitions: Dict[int, int] = field(default_factory=dict)
+    # Discord category id -> channels in it, including reserved ones
+    counts: Dict[int, int] = field(default_factory=dict)
+    # Discord category id -> slots handed out by resolve whose create event has not arrived
+    reserved: Dict[int, int] = field(default_factory=dict)
+    # Creation of the next partition, if one is running
+    creating: Optional[asyncio.Task] = None
+
+
+class TicketCategoryResolver:
+    """Picks the category for a guild's next ticket channel.
+
+    Discord allows 50 channels per category, so ticket channels are spread
+    over partitions named "tickets", "tickets-2", "tickets-3" ... and each
+    new channel goes to the first partition with room. When the last
+    partition is down to the headroom, the next one is created in the
+    background, so it exists before it is needed.
+
+    The partitions of a guild and their channel counts are loaded once,
+    with one pass over the guild's channels, and kept current from the
+    on_guild_channel_* events. The partition -> Discord category mapping is
+    stored in ticket_categories. A category named like a partition is
+    adopted when no partition maps to it yet, whether it was made by hand,
+    created before its create call returned, or the stored mapping went
+    stale. Deleting or renaming a partition drops the guild's entry so it
+    is loaded again.
+
+    Each resolve reserves a slot in the category it returns, so concurrent
+    resolves do not overfill it. The create event of the channel settles
+    the reservation instead of counting the channel again, and release()
+    returns a slot whose channel was not created.
+    """
+
+    def __init__(
+        self,
+        repository: TicketRepository,
+        rest: RestScheduler,
+        name: str = Settings.TICKET_CATEGORY_NAME,
+        capacity: int = Settings.TICKET_CATEGORY_CAPACITY,
+        headroom: int = Settings.TICKET_CATEGORY_HEADROOM
+    ):
+        self.repository = repository
+        self.rest = rest
+        self.name = name.lower()
+        self.capacity = max(1, capacity)
+        self.headroom = max(0, min(headroom, self.capacity - 1))
+        self._guilds: Dict[int, _GuildCategories] = {}
+
+        self.hits = 0
+        self.loads = 0
+        self.invalidations = 0
+        self.created = 0
+
+    def __len__(self) -> int:
+        return len(self._guilds)
+
+    async def resolve(self, guild: discord.Guild) -> Optional[discord.CategoryChannel]:
+        """Get the category for a new ticket channel, creating partitions as they fill.
+
+        Returns None when no category can be created, e.g. without the
+        Manage Channels permission; the channel is then left uncategorized.
+        A returned category has a slot reserved; call release() if the
+        channel is not created in it.
+        """
+        state = self._guilds.get(guild.id)
+        if state is None:
+            state = await self._load(guild)
+        else:
+            self.hits += 1
+
+        last = max(state.partitions, default=0)
+        for partition in sorted(state.partitions):
+            category = guild.get_channel(state.partitions[partition])
+            if category is None:
+                continue  # Deleted; the delete event reloads the guild
+            free = self.capacity - state.counts.get(category.id, 0)
+            if free <= 0:
+                continue
+            if partition == last and free <= self.headroom:
+                self._create_next(guild, state, Priority.BACKGROUND)
+            return self._reserve(state, category)
+
+        # Every partition is full: the ticket waits for the next one
+        try:
+            category = await self._create_next(guild, state, Priority.USER)
+        except discord.HTTPException as e:
+            logger.warning(f"Failed to create a ticket category in guild {guild.id}: {e}")
+            return None
+        if self._guilds.get(guild.id) is not state:
+            # Reloaded meanwhile; resolve against the current partitions
+            return await self.resolve(guild)
+        if state.counts.get(category.id, 0) >= self.capacity:
+            # Filled by concurrent resolves while it was being created
+            return await self.resolve(guild)
+        return self._reserve(state, category)
+
+    @staticmethod
+    def _reserve(state: _GuildCategories, category: discord.CategoryChannel) -> discord.CategoryChannel:
+        state.counts[category.id] = state.counts.get(category.id, 0) + 1
+        state.reserved[category.id] = state.reserved.get(category.id, 0) + 1
+        return category
+
+    def release(self, guild_id: int, category_id: int) -> None:
+        """Return the slot of a resolved category whose channel was not created."""
+        state = self._guilds.get(guild_id)
+        if state is None or not state.reserved.get(category_id):
+            return  # Reloaded meanwhile; the reservation went with the old state
+        state.reserved[category_id] -= 1
+        state.counts[category_id] -= 1
+
+    async def _load(self, guild: discord.Guild) -> _GuildCategories:
+        """Find a guild's partitions and count the channels in them."""
+        self.loads += 1
+        state = _GuildCategories()
+        for row in await self.repository.get_category_partitions(guild.id, self.name):
+            category = guild.get_channel(row.discord_category_id)
+            if category is not None and _is_category(category):
+                state.partitions[row.partition] = category.id
+
+        # Categories created by hand, or whose mapping went stale
+        mapped = set(state.partitions.values())
+        for category in guild.categories:
+            partition = parse_partition(self.name, category.name)
+            if partition is None or partition in state.partitions or category.id in mapped:
+                continue
+            state.partitions[partition] = category.id
+            await self.repository.save_category_partition(
+                TicketCategory(guild.id, self.name, partition=partition, discord_category_id=category.id)
+            )
+
+        state.counts = dict.fromkeys(state.partitions.values(), 0)
+        for channel in guild.channels:
+            if channel.category_id in state.counts:
+                state.counts[channel.category_id] += 1
+
+        self._guilds[guild.id] = state
+        return state
+
+    def _create_next(self, guild: discord.Guild, state: _GuildCategories, priority: Priority) -> asyncio.Task:
+        """Start creating the partition after the last one unless that is already running."""
+        if state.creating is None or state.creating.done():
+            state.creating = asyncio.create_task(self._create_partition(guild, state, priority))
+            state.creating.add_done_callback(_log_failure)
+        return state.creating
+
+    async def _create_partition(
+        self,
+        guild: discord.Guild,
+        state: _GuildCategories,
+        priority: Priority
+    ) -> discord.CategoryChannel:
+        """Create the next partition with the permissions of the first one."""
+        partition = max(state.partitions, default=0) + 1
+        first = guild.get_channel(state.partitions[1]) if 1 in state.partitions else None
+        kwargs = {'overwrites': first.overwrites} if first is not None else {}
+        category = await self.rest.create_category(
+            guild,
+            partition_name(self.name, partition),
+            priority=priority,
+            reason="Ticket category" if partition == 1 else "Ticket category overflow",
+            **kwargs
+        )
+        self.created += 1
+        state.partitions[partition] = category.id
+        state.counts.setdefault(category.id, 0)
+        await self.repository.save_category_partition(
+            TicketCategory(guild.id, self.name, partition=partition, discord_category_id=category.id)
+        )
+        return category
+
+    def invalidate(self, guild_id: int) -> None:
+        """Drop a guild's partitions so they are loaded again on the next resolve."""
+        if self._guilds.pop(guild_id, None) is not None:
+            self.invalidations += 1
+
+    def forget(self, guild_id: int) -> None:
+        """Stop tracking a guild, e.g. after the bot left it."""
+        self._guilds.pop(guild_id, None)
+
+    def _is_partition(self, state: _GuildCategories, channel: Any) -> bool:
+        return channel.id in state.counts or parse_partition(self.name, channel.name) is not None
+
+    def channel_created(self, channel: Any) -> None:
+        """Count a new channel; on_guild_channel_create."""
+        state = self._guilds.get(channel.guild.id)
+        if state is None:
+            return
+        if _is_category(channel):
+            # Ours, possibly reported before the create call returned, or made by hand
+            partition = parse_partition(self.name, channel.name)
+            if partition is not None and partition not in state.partitions:
+                state.partitions[partition] = channel.id
+                state.counts.setdefault(channel.id, 0)
+        elif state.reserved.get(channel.category_id):
+            # Counted when resolve reserved its slot
+            state.reserved[channel.category_id] -= 1
+        elif channel.category_id in state.counts:
+            state.counts[channel.category_id] += 1
+
+    def channel_deleted(self, channel: Any) -> None:
+        """Uncount a deleted channel; on_guild_channel_delete."""
+        state = self._guilds.get(channel.guild.id)
+        if state is None:
+            return
+        if _is_category(channel):
+            if channel.id in state.counts:
+                self.invalidate(channel.guild.id)
+        elif channel.category_id in state.counts:
+            state.counts[channel.category_id] -= 1
+
+    def channel_updated(self, before: Any, after: Any) -> None:
+        """Follow channels moved between categories and renamed partitions; on_guild_channel_update."""
+        state = self._guilds.get(after.guild.id)
+        if state is None:
+            return
+        if _is_category(after):
+            if before.name != after.name and (self._is_partition(state, before) or self._is_partition(state, after)):
+                self.invalidate(after.guild.id)
+            return
+        if before.category_id != after.category_id:
+            if before.category_id in state.counts:
+                state.counts[before.category_id] -= 1
+            if after.category_id in state.counts:
+                state.counts[after.category_id] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Get resolver metrics."""
+        return {
+            'guilds': len(self._guilds),
+            'partitions': sum(len(state.partitions) for state in self._guilds.values()),
+            'hits': self.hits,
+            'loads': self.loads,
+            'invalidations': self.invalidations,
+            'created': self.created
+        }
+
+    async def close(self) -> None:
+        """Cancel category creations still running."""
+        tasks = [state.creating for state in self._guilds.values() if state.creating and not state.creating.done()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+def _log_failure(task: asyncio.Task) -> None:
+    if not task.cancelled() and task.exception() is not None:
+        logger.warning(f"Failed to create a ticket category: {task.exception()}")
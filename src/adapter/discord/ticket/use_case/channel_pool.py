@@ -0,0 +1,287 @@
+"""Warm pool of hidden, pre-created ticket channels."""
+
+import asyncio
+import logging
+import secrets
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Iterable, Optional, Set
+
+import discord
+
+from ..config.settings import Settings
+from ..utils.rest_scheduler import Priority, RestScheduler
+from .category_resolver import TicketCategoryResolver
+
+
+logger = logging.getLogger(__name__)
+
+
+def _is_hidden(channel: discord.TextChannel, guild: discord.Guild) -> bool:
+    """Check that a channel is still hidden from regular members."""
+    return channel.overwrites_for(guild.default_role).view_channel is False
+
+
+class TicketChannelPool:
+    """Per-guild pool of hidden ticket channels created ahead of demand.
+
+    Creating a channel is the slowest and most rate-limited step of opening a
+    ticket. Claiming a pooled channel instead costs a single edit that renames
+    it and sets its permission overwrites. A background task refills pools of
+    guilds that have claimed a channel, one channel per refill interval.
+    """
+
+    def __init__(
+        self,
+        rest: RestScheduler,
+        size: int = Settings.TICKET_POOL_SIZE,
+        refill_interval: float = Settings.TICKET_POOL_REFILL_INTERVAL,
+        category_resolver: Optional[TicketCategoryResolver] = None
+    ):
+        self.rest = rest
+        self.category_resolver = category_resolver
+        self.size = max(0, size)
+        self.refill_interval = refill_interval
+        self._pools: Dict[int, Deque[int]] = {}
+        self._guilds: Dict[int, discord.Guild] = {}
+        self._wakeup: Optional[asyncio.Event] = None
+        self._refiller: Optional[asyncio.Task] = None
+        # Deletions of channels whose claim failed
+        self._discards: Set[asyncio.Task] = set()
+
+        self.claims = 0
+        self.misses = 0
+        self.created = 0
+        self.refill_errors = 0
+        self.adopted = 0
+        self.removed = 0
+        self._claim_total = 0.0
+        self._claim_max = 0.0
+
+    @property
+    def enabled(self) -> bool:
+        return self.size > 0
+
+    def __len__(self) -> int:
+        return sum(len(pool) for pool in self._pools.values())
+
+    def pooled(self, guild_id: int) -> int:
+        """Number of warm channels in a guild's pool."""
+        return len(self._pools.get(guild_id, ()))
+
+    def _wake(self) -> None:
+        if self._wakeup is None:
+            self._wakeup = asyncio.Event()
+        self._wakeup.set()
+
+    def activate(self, guild: discord.Guild) -> None:
+        """Keep a guild's pool filled from now on."""
+        if not self.enabled:
+            return
+        self._guilds[guild.id] = guild
+        self._pools.setdefault(guild.id, deque())
+        self._wake()
+
+    def forget(self, guild_id: int) -> None:
+        """Stop tracking a guild, e.g. after the bot left it."""
+        self._guilds.pop(guild_id, None)
+        self._pools.pop(guild_id, None)
+
+    async def reconcile(self, guild: discord.Guild) -> None:
+        """Adopt pool channels left over from a previous run, deleting any beyond the pool size."""
+        pool = self._pools.setdefault(guild.id, deque())
+        known = set(pool)
+        extra = []
+
+        for channel in guild.text_channels:
+            if not channel.name.startswith(Settings.TICKET_POOL_CHANNEL_PREFIX) or channel.id in known:
+                continue
+            # A pool channel someone made visible is no longer ours to reuse or delete
+            if not _is_hidden(channel, guild):
+                continue
+            if len(pool) < self.size:
+                pool.append(channel.id)
+                self.adopted += 1
+            else:
+                extra.append(channel)
+
+        if extra:
+            await asyncio.gather(
+                *(self.rest.delete_channel(channel, reason="Unused ticket pool channel") for channel in extra),
+                return_exceptions=True
+            )
+            self.removed += len(extra)
+
+        if pool:
+            self.activate(guild)
+        else:
+            self._pools.pop(guild.id, None)
+
+    async def start(self, guilds: Iterable[discord.Guild]) -> None:
+        """Reconcile leftover pool channels and start the background refiller."""
+        for guild in guilds:
+            try:
+                await self.reconcile(guild)
+            except Exception as e:
+                logger.warning(f"Failed to reconcile ticket pool of guild {guild.id}: {e}")
+
+        if self.enabled and (self._refiller is None or self._refiller.done()):
+            self._wake()
+            self._refiller = asyncio.create_task(self._refill_loop())
+
+    async def claim(
+        self,
+        guild: discord.Guild,
+        name: str,
+        overwrites: Dict[Any, discord.PermissionOverwrite],
+        reason: Optional[str] = None
+    ) -> Optional[discord.TextChannel]:
+        """Turn a pooled channel into a ticket channel.
+
+        Returns None when the guild's pool is empty; the caller should then
+        create the channel itself.
+        """
+        if not self.enabled:
+            return None
+
+        self.activate(guild)
+        pool = self._pools[guild.id]
+        started = time.monotonic()
+
+        while pool:
+            channel = guild.get_channel(pool.popleft())
+            if channel is None:
+                continue  # Deleted by hand since it was pooled
+
+            try:
+                edited = await self.rest.edit_channel(
+                    channel,
+                    priority=Priority.USER,
+                    name=name,
+                    overwrites=overwrites,
+                    reason=reason
+                )
+            except discord.HTTPException as e:
+                logger.warning(f"Failed to claim pooled channel {channel.id}: {e}")
+                self._discard(channel)
+                continue
+            if edited is None:
+                # Not renamed or opened up to the user; never hand it out like that
+                logger.warning(f"Claim of pooled channel {channel.id} was not applied")
+                self._discard(channel)
+                continue
+
+            elapsed = time.monotonic() - started
+            self.claims += 1
+            self._claim_total += elapsed
+            self._claim_max = max(self._claim_max, elapsed)
+            return edited
+
+        self.misses += 1
+        return None
+
+    def _discard(self, channel: discord.TextChannel) -> None:
+        """Delete a channel taken out of the pool in the background, so it does not hold a slot."""
+        task = asyncio.create_task(self._delete_discarded(channel))
+        self._discards.add(task)
+        task.add_done_callback(self._discards.discard)
+
+    async def _delete_discarded(self, channel: discord.TextChannel) -> None:
+        try:
+            await self.rest.delete_channel(channel, reason="Unusable ticket pool channel")
+        except discord.NotFound:
+            pass
+        except discord.HTTPException as e:
+            logger.warning(f"Failed to delete pooled channel {channel.id}: {e}")
+            return
+        self.removed += 1
+
+    def _next_guild(self) -> Optional[discord.Guild]:
+        """Pick the active guild whose pool is emptiest."""
+        best = None
+        best_size = self.size
+        for guild_id, guild in self._guilds.items():
+            pooled = len(self._pools.get(guild_id, ()))
+            if pooled < best_size:
+                best, best_size = guild, pooled
+        return best
+
+    async def _refill_loop(self) -> None:
+        """Create pool channels one at a time until every active pool is full."""
+        while True:
+            self._wakeup.clear()
+            guild = self._next_guild()
+            if guild is None:
+                await self._wakeup.wait()
+                continue
+
+            try:
+                await self._create_channel(guild)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.refill_errors += 1
+                logger.warning(f"Failed to refill ticket pool of guild {guild.id}: {e}")
+
+            await asyncio.sleep(self.refill_interval)
+
+    async def _create_channel(self, guild: discord.Guild) -> None:
+        """Create one hidden channel and add it to a guild's pool."""
+        overwrites = {
+            guild.default_role: discord.PermissionOverwrite(view_channel=False),
+            guild.me: discord.PermissionOverwrite(view_channel=True, send_messages=True)
+        }
+        category = await self.category_resolver.resolve(guild) if self.category_resolver else None
+        try:
+            channel = await self.rest.create_text_channel(
+                guild,
+                f"{Settings.TICKET_POOL_CHANNEL_PREFIX}{secrets.token_hex(3)}",
+                priority=Priority.BACKGROUND,
+                overwrites=overwrites,
+                category=category,
+                reason="Ticket channel pool"
+            )
+        except Exception:
+            if category is not None:
+                self.category_resolver.release(guild.id, category.id)
+            raise
+        self.created += 1
+
+        pool = self._pools.get(guild.id)
+        if pool is None:
+            # The guild was forgotten while the channel was being created
+            await self.rest.delete_channel(channel, reason="Unused ticket pool channel")
+            return
+        pool.append(channel.id)
+
+    def stats(self) -> Dict[str, Any]:
+        """Get pool metrics."""
+        return {
+            'guilds': len(self._guilds),
+            'pooled': len(self),
+            'target_size': self.size,
+            'claims': self.claims,
+            'misses': self.misses,
+            'hit_rate': self.claims / (self.claims + self.misses) if self.claims + self.misses else 0.0,
+            'created': self.created,
+            'refill_errors': self.refill_errors,
+            'adopted': self.adopted,
+            'removed': self.removed,
+            'avg_claim_ms': self._claim_total / self.claims * 1000 if self.claims else 0.0,
+            'max_claim_ms': self._claim_max * 1000
+        }
+
+    async def close(self) -> None:
+        """Stop the refiller and wait for discarded channels to be deleted.
+
+        Pooled channels are adopted again on the next start.
+        """
+        if self._discards:
+            await asyncio.gather(*self._discards, return_exceptions=True)
+        if self._refiller is not None:
+            self._refiller.cancel()
+            try:
+                await self._refiller
+            except asyncio.CancelledError:
+                pass
+            self._refiller = None
@@ -0,0 +1,110 @@
+"""Application command sync that skips unchanged command trees."""
+
+import hashlib
+import json
+import logging
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence
+
+import discord
+from discord import app_commands
+
+from ..repository.command_sync_repository import CommandSyncRepository
+
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(slots=True)
+class SyncResult:
+    """Outcome of syncing one scope."""
+    scope: str
+    synced: bool
+    command_count: int
+    seconds: float
+    saved_seconds: float = 0.0
+
+
+class CommandSyncer:
+    """Syncs the command tree only when its definitions changed.
+
+    The payload discord.py would upload is serialized in a stable order and
+    hashed. The hash of the last successful sync is stored per scope, so a
+    restart with unchanged commands makes no application-commands request.
+    """
+
+    def __init__(self, tree: app_commands.CommandTree, repository: CommandSyncRepository):
+        self.tree = tree
+        self.repository = repository
+        self.synced = 0
+        self.skipped = 0
+        self.seconds_spent = 0.0
+        self.seconds_saved = 0.0
+
+    def scope(self, guild: Optional[discord.abc.Snowflake] = None) -> str:
+        """Storage key of a sync target; includes the application id."""
+        application_id = self.tree.client.application_id or 0
+        return f"{application_id}:{'global' if guild is None else f'guild:{guild.id}'}"
+
+    async def payload(self, guild: Optional[discord.abc.Snowflake] = None) -> List[Dict[str, Any]]:
+        """Build the command payload sync() would upload, sorted by type and name."""
+        commands = self.tree.get_commands(guild=guild)
+        translator = self.tree.translator
+        if translator:
+            payload = [await command.get_translated_payload(self.tree, translator) for command in commands]
+        else:
+            payload = [command.to_dict(self.tree) for command in commands]
+        return sorted(payload, key=lambda data: (data.get('type', 1), data['name']))
+
+    async def tree_hash(self, guild: Optional[discord.abc.Snowflake] = None) -> str:
+        """Hash of the command payload of a scope."""
+        encoded = json.dumps(await self.payload(guild), sort_keys=True, separators=(',', ':'))
+        return hashlib.sha256(encoded.encode()).hexdigest()
+
+    async def sync(self, guild: Optional[discord.abc.Snowflake] = None, force: bool = False) -> SyncResult:
+        """Sync a scope if its command tree changed since the last sync."""
+        scope = self.scope(guild)
+        tree_hash = await self.tree_hash(guild)
+        state = await self.repository.get_state(scope)
+
+        if not force and state is not None and state[0] == tree_hash:
+            # The last real sync of this scope is what skipping it saved
+            self.skipped += 1
+            self.seconds_saved += state[2]
+            return SyncResult(scope, False, state[1], 0.0, state[2])
+
+        started = time.monotonic()
+        synced = await self.tree.sync(guild=guild)
+        elapsed = time.monotonic() - started
+
+        await self.repository.save_state(scope, tree_hash, len(synced), elapsed)
+        self.synced += 1
+        self.seconds_spent += elapsed
+        return SyncResult(scope, True, len(synced), elapsed)
+
+    async def sync_all(self, guild_ids: Sequence[int] = (), force: bool = False) -> List[SyncResult]:
+        """Sync the global commands, or only the given guilds' copies of them.
+
+        With guild ids (staging mode) the global commands are copied to each
+        guild and synced there, where changes show up immediately, and the
+        global command list is left untouched.
+        """
+        if not guild_ids:
+            return [await self.sync(force=force)]
+
+        results = []
+        for guild_id in guild_ids:
+            guild = discord.Object(id=guild_id)
+            self.tree.copy_global_to(guild=guild)
+            results.append(await self.sync(guild, force=force))
+        return results
+
+    def stats(self) -> Dict[str, Any]:
+        """Get sync metrics."""
+        return {
+            'synced': self.synced,
+            'skipped': self.skipped,
+            'seconds_spent': self.seconds_spent,
+            'seconds_saved': self.seconds_saved
+        }
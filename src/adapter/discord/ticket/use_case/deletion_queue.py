@@ -0,0 +1,209 @@
+"""Durable queue of delayed channel deletions."""
+
+import asyncio
+import heapq
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+import discord
+
+from ..config.settings import Settings
+from ..repository.ticket_repository import TicketRepository
+from ..utils.rest_scheduler import Priority, RestScheduler
+
+
+logger = logging.getLogger(__name__)
+
+
+class ChannelDeletionQueue:
+    """Deletes channels once their delay has passed, surviving restarts.
+
+    Every scheduled deletion is stored in the channel_deletions table before
+    schedule() returns. One worker keeps a min-heap of due times, deletes due
+    channels in batches through the REST scheduler, and retries failures
+    with exponential backoff. A before_delete hook, such as the transcript
+    export, runs first; when it fails the deletion is retried as well.
+    """
+
+    def __init__(
+        self,
+        repository: TicketRepository,
+        rest: RestScheduler,
+        http: Any,
+        batch_size: int = Settings.CHANNEL_DELETE_BATCH_SIZE,
+        max_attempts: int = Settings.CHANNEL_DELETE_MAX_ATTEMPTS,
+        before_delete: Optional[Callable[[int], Awaitable[Any]]] = None
+    ):
+        self.repository = repository
+        self.rest = rest
+        self.http = http
+        self.batch_size = max(1, batch_size)
+        self.max_attempts = max_attempts
+        self.before_delete = before_delete
+        self._heap: List[Tuple[float, int]] = []
+        # channel_id -> (due_at, reason, attempts); heap entries not matching are stale
+        self._pending: Dict[int, Tuple[float, Optional[str], int]] = {}
+        self._wakeup: Optional[asyncio.Event] = None
+        self._worker: Optional[asyncio.Task] = None
+
+        self.deleted = 0
+        self.failed = 0
+        self.retries = 0
+        self.batch_failures = 0
+        self._failed_in_row = 0
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def __contains__(self, channel_id: int) -> bool:
+        return channel_id in self._pending
+
+    def _push(self, channel_id: int, due_at: float, reason: Optional[str], attempts: int) -> None:
+        self._pending[channel_id] = (due_at, reason, attempts)
+        heapq.heappush(self._heap, (due_at, channel_id))
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def start(self, guild_filter: Optional[Callable[[Optional[int]], bool]] = None) -> int:
+        """Load deletions left from a previous run and start the worker. Returns how many were loaded.
+
+        guild_filter limits loading to the guilds it accepts, so each cluster
+        resumes only the deletions of its own shards.
+        """
+        rows = await self.repository.get_channel_deletions()
+        loaded = 0
+        for channel_id, guild_id, due_at, reason, attempts in rows:
+            if guild_filter is not None and not guild_filter(guild_id):
+                continue
+            if channel_id not in self._pending:
+                self._push(channel_id, due_at, reason, attempts or 0)
+            loaded += 1
+
+        self._wakeup = asyncio.Event()
+        self._worker = asyncio.create_task(self._run())
+        return loaded
+
+    async def schedule(
+        self,
+        channel_id: int,
+        guild_id: Optional[int] = None,
+        delay: float = Settings.CHANNEL_DELETE_DELAY,
+        reason: Optional[str] = None
+    ) -> None:
+        """Delete a channel after delay seconds. Returns once the job is stored."""
+        due_at = time.time() + delay
+        await self.repository.schedule_channel_deletion(channel_id, guild_id, due_at, reason)
+        self._push(channel_id, due_at, reason, 0)
+
+    def _pop_due(self, now: float) -> List[Tuple[int, Optional[str], int]]:
+        """Take up to batch_size deletions that are due."""
+        batch = []
+        while self._heap and self._heap[0][0] <= now and len(batch) < self.batch_size:
+            due_at, channel_id = heapq.heappop(self._heap)
+            job = self._pending.get(channel_id)
+            if job is None or job[0] != due_at:
+                continue  # Rescheduled or already done
+            batch.append((channel_id, job[1], job[2]))
+        return batch
+
+    async def _run(self) -> None:
+        """Worker loop: sleep until the earliest due time, then delete a batch."""
+        while True:
+            self._wakeup.clear()
+            now = time.time()
+            batch = self._pop_due(now)
+
+            if not batch:
+                timeout = self._heap[0][0] - now if self._heap else None
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=timeout)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            try:
+                await self._delete_batch(batch)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.batch_failures += 1
+                self._failed_in_row += 1
+                delay = min(300, 2 ** (self._failed_in_row - 1))
+                logger.error(f"Channel deletion batch failed, retrying in {delay}s: {e}")
+                self._requeue(batch, now, time.time() + delay)
+            else:
+                self._failed_in_row = 0
+
+    def _requeue(self, batch: List[Tuple[int, Optional[str], int]], popped_at: float, due_at: float) -> None:
+        """Put back jobs of a failed batch that were neither finished nor rescheduled."""
+        for channel_id, _, _ in batch:
+            job = self._pending.get(channel_id)
+            if job is not None and job[0] <= popped_at:
+                self._push(channel_id, due_at, job[1], job[2])
+
+    async def _delete_batch(self, batch: List[Tuple[int, Optional[str], int]]) -> None:
+        """Delete a batch of channels and record the outcome of each."""
+        results = await asyncio.gather(
+            *(self._delete(channel_id, reason) for channel_id, reason, _ in batch),
+            return_exceptions=True
+        )
+
+        done = []
+        for (channel_id, reason, attempts), result in zip(batch, results):
+            if not isinstance(result, Exception):
+                done.append(channel_id)
+                continue
+
+            attempts += 1
+            if attempts >= self.max_attempts or isinstance(result, discord.Forbidden):
+                logger.error(f"Giving up on deleting channel {channel_id}: {result}")
+                self.failed += 1
+                done.append(channel_id)
+                continue
+
+            self.retries += 1
+            due_at = time.time() + min(300, 2 ** attempts)
+            await self.repository.reschedule_channel_deletion(channel_id, due_at, attempts)
+            self._push(channel_id, due_at, reason, attempts)
+
+        if done:
+            await self.repository.remove_channel_deletions(done)
+            for channel_id in done:
+                self._pending.pop(channel_id, None)
+
+    async def _delete(self, channel_id: int, reason: Optional[str]) -> None:
+        """Delete one channel by id; a channel that is already gone counts as deleted."""
+        if self.before_delete is not None:
+            await self.before_delete(channel_id)
+        try:
+            await self.rest.run(
+                'channel_delete', channel_id,
+                lambda: self.http.delete_channel(channel_id, reason=reason),
+                Priority.BACKGROUND
+            )
+        except discord.NotFound:
+            pass
+        self.deleted += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Get queue metrics."""
+        next_due = min((job[0] for job in self._pending.values()), default=None)
+        return {
+            'pending': len(self._pending),
+            'deleted': self.deleted,
+            'failed': self.failed,
+            'retries': self.retries,
+            'batch_failures': self.batch_failures,
+            'next_due_in': max(0.0, next_due - time.time()) if next_due is not None else None
+        }
+
+    async def close(self) -> None:
+        """Stop the worker; pending deletions stay stored for the next start."""
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
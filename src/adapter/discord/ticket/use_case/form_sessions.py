@@ -0,0 +1,203 @@
+"""Bounded store of form sessions with expiry and write-behind persistence."""
+
+import asyncio
+import heapq
+import logging
+import time
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+from ..config.settings import Settings
+from ..domain.entities import FormSession
+from ..repository.ticket_repository import TicketRepository
+
+
+logger = logging.getLogger(__name__)
+
+SessionKey = Tuple[int, int]
+
+
+class FormSessionStore:
+    """Form sessions keyed by (guild_id, user_id).
+
+    A session expires ttl seconds after it was last updated. Expiry times
+    sit in one min-heap that a single background task drains, together
+    with writing changed and removed sessions to the database every flush
+    interval. Sessions stored that way are loaded again on start, so a
+    restart does not lose partial answers. When the store is full, the
+    session closest to expiring is evicted.
+    """
+
+    def __init__(
+        self,
+        repository: TicketRepository,
+        ttl: float = Settings.FORM_SESSION_TTL,
+        max_sessions: int = Settings.FORM_SESSION_MAX,
+        flush_interval: float = Settings.FORM_SESSION_FLUSH_INTERVAL
+    ):
+        self.repository = repository
+        self.ttl = ttl
+        self.max_sessions = max(1, max_sessions)
+        self.flush_interval = flush_interval
+        self._sessions: Dict[SessionKey, FormSession] = {}
+        self._expires: Dict[SessionKey, float] = {}
+        # (expires_at, key); entries not matching _expires are stale
+        self._heap: List[Tuple[float, SessionKey]] = []
+        self._dirty: Set[SessionKey] = set()
+        self._removed: Set[SessionKey] = set()
+        self._worker: Optional[asyncio.Task] = None
+
+        self.started = 0
+        self.resumed = 0
+        self.completed = 0
+        self.expired = 0
+        self.evicted = 0
+        self.flushes = 0
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def __contains__(self, key: SessionKey) -> bool:
+        return self.get(*key) is not None
+
+    async def start(self, guild_filter: Optional[Callable[[int], bool]] = None) -> int:
+        """Load stored sessions and start the background task. Returns how many were resumed."""
+        now = time.time()
+        await self.repository.delete_expired_form_sessions(now)
+        for session, expires_at in await self.repository.get_form_sessions(now):
+            if guild_filter is not None and not guild_filter(session.guild_id):
+                continue
+            self._sessions[session.key] = session
+            self._schedule(session.key, expires_at)
+            self.resumed += 1
+
+        self._worker = asyncio.create_task(self._run())
+        return self.resumed
+
+    def _schedule(self, key: SessionKey, expires_at: float) -> None:
+        self._expires[key] = expires_at
+        heapq.heappush(self._heap, (expires_at, key))
+
+    def _remove(self, key: SessionKey) -> Optional[FormSession]:
+        session = self._sessions.pop(key, None)
+        if session is not None:
+            del self._expires[key]
+            self._dirty.discard(key)
+            self._removed.add(key)
+        return session
+
+    def get(self, guild_id: int, user_id: int) -> Optional[FormSession]:
+        """Get a live session."""
+        key = (guild_id, user_id)
+        expires_at = self._expires.get(key)
+        if expires_at is None:
+            return None
+        if expires_at <= time.time():
+            self._remove(key)
+            self.expired += 1
+            return None
+        return self._sessions[key]
+
+    def put(self, session: FormSession) -> None:
+        """Start a session, replacing any session of the same user in the guild."""
+        key = session.key
+        if key not in self._sessions:
+            while len(self._sessions) >= self.max_sessions and self._pop_earliest() is not None:
+                self.evicted += 1
+            self.started += 1
+        self._sessions[key] = session
+        self.update(session)
+
+    def update(self, session: FormSession) -> None:
+        """Record progress of a session and renew its expiry."""
+        key = session.key
+        if self._sessions.get(key) is not session:
+            return  # Expired or replaced meanwhile
+        self._schedule(key, time.time() + self.ttl)
+        self._dirty.add(key)
+        self._removed.discard(key)
+
+    def complete(self, guild_id: int, user_id: int) -> Optional[FormSession]:
+        """Finish a session. Returns it, or None if it was no longer live."""
+        session = self._remove((guild_id, user_id))
+        if session is not None:
+            self.completed += 1
+        return session
+
+    def discard(self, guild_id: int, user_id: int) -> None:
+        """Drop a session without counting it as completed."""
+        self._remove((guild_id, user_id))
+
+    def _pop_earliest(self) -> Optional[SessionKey]:
+        """Remove the live session that expires first."""
+        while self._heap:
+            expires_at, key = heapq.heappop(self._heap)
+            if self._expires.get(key) == expires_at:
+                self._remove(key)
+                return key
+        return None
+
+    def expire(self, now: Optional[float] = None) -> int:
+        """Remove sessions whose expiry time has passed. Returns how many were removed."""
+        now = time.time() if now is None else now
+        count = 0
+        while self._heap and self._heap[0][0] <= now:
+            expires_at, key = heapq.heappop(self._heap)
+            if self._expires.get(key) == expires_at:
+                self._remove(key)
+                count += 1
+        self.expired += count
+        return count
+
+    async def flush(self) -> None:
+        """Write changed and removed sessions to the database."""
+        if not self._dirty and not self._removed:
+            return
+
+        dirty, removed = self._dirty, self._removed
+        self._dirty, self._removed = set(), set()
+        sessions = [(self._sessions[key], self._expires[key]) for key in dirty]
+        try:
+            await self.repository.write_form_sessions(sessions, list(removed))
+        except Exception:
+            # Keep the changes for the next flush unless they were superseded meanwhile
+            self._dirty |= {key for key in dirty if key in self._sessions and key not in self._removed}
+            self._removed |= {key for key in removed if key not in self._sessions}
+            raise
+        self.flushes += 1
+
+    async def _run(self) -> None:
+        """Expire sessions and flush changes every flush interval."""
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            self.expire()
+            try:
+                await self.flush()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Failed to persist form sessions: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        """Get session metrics."""
+        return {
+            'active': len(self._sessions),
+            'max_sessions': self.max_sessions,
+            'started': self.started,
+            'resumed': self.resumed,
+            'completed': self.completed,
+            'expired': self.expired,
+            'evicted': self.evicted,
+            'pending_writes': len(self._dirty) + len(self._removed),
+            'flushes': self.flushes
+        }
+
+    async def close(self) -> None:
+        """Stop the background task and write pending changes."""
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+        await self.flush()
@@ -0,0 +1,255 @@
+"""Automatic closing of tickets without recent activity."""
+
+import asyncio
+import heapq
+import logging
+import time
+from contextlib import aclosing
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from ..config.settings import Settings
+from ..domain.entities import Ticket
+from ..repository.bot_settings_repository import BotSettingsRepository
+from ..repository.ticket_repository import TicketRepository
+from ..utils.helpers import create_embed
+from ..utils.rest_scheduler import Priority, RestScheduler
+from .deletion_queue import ChannelDeletionQueue
+from .ticket_service import TicketService
+
+
+logger = logging.getLogger(__name__)
+
+# Per-guild bot setting holding the idle threshold in hours; 0 disables
+IDLE_HOURS_SETTING = "idle_close_hours"
+
+
+@dataclass(slots=True)
+class _IdleTicket:
+    ticket_id: int
+    guild_id: int
+    last_activity: float
+    # Time of the heap entry that is current for this ticket
+    scheduled_at: float = 0.0
+    # When the warning was posted; 0 while not warned
+    warned_at: float = 0.0
+
+
+class IdleTicketCloser:
+    """Warns about and then closes tickets that saw no activity for a guild's threshold.
+
+    One min-heap holds the next action time of every open ticket, loaded
+    from the (status, last_activity) index at startup. A single task sleeps
+    until the earliest entry. Activity only updates the ticket's timestamp;
+    when an entry comes due, its time is recomputed and the entry is
+    pushed back if the ticket was active meanwhile, so activity costs no
+    heap operation.
+    """
+
+    def __init__(
+        self,
+        ticket_service: TicketService,
+        repository: TicketRepository,
+        bot_settings: BotSettingsRepository,
+        deletion_queue: ChannelDeletionQueue,
+        rest: RestScheduler,
+        client: Any,
+        default_hours: float = Settings.TICKET_IDLE_HOURS,
+        warning: float = Settings.TICKET_IDLE_WARNING
+    ):
+        self.ticket_service = ticket_service
+        self.repository = repository
+        self.bot_settings = bot_settings
+        self.deletion_queue = deletion_queue
+        self.rest = rest
+        self.client = client
+        self.default_hours = default_hours
+        self.warning = warning
+        self._tickets: Dict[int, _IdleTicket] = {}
+        # (time, channel_id); entries not matching _IdleTicket.scheduled_at are stale
+        self._heap: List[Tuple[float, int]] = []
+        self._wakeup: Optional[asyncio.Event] = None
+        self._worker: Optional[asyncio.Task] = None
+
+        self.warned = 0
+        self.closed = 0
+
+    def __len__(self) -> int:
+        return len(self._tickets)
+
+    async def threshold(self, guild_id: int) -> float:
+        """Idle seconds after which a guild's tickets are closed; 0 when disabled."""
+        value = await self.bot_settings.get_setting(guild_id, IDLE_HOURS_SETTING)
+        try:
+            hours = float(value) if value is not None else self.default_hours
+        except ValueError:
+            hours = self.default_hours
+        return max(0.0, hours * 3600)
+
+    def _due(self, ticket: _IdleTicket, threshold: float) -> float:
+        """Time of the ticket's next action: the warning, or closing once warned."""
+        lead = min(self.warning, threshold / 2)
+        close_at = ticket.last_activity + threshold
+        if ticket.warned_at:
+            # Tickets that went idle while the bot was down still get the full warning
+            return max(close_at, ticket.warned_at + lead)
+        return close_at - lead
+
+    def _push(self, channel_id: int, ticket: _IdleTicket, when: float) -> None:
+        ticket.scheduled_at = when
+        heapq.heappush(self._heap, (when, channel_id))
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def _schedule(self, channel_id: int, ticket: _IdleTicket) -> None:
+        threshold = await self.threshold(ticket.guild_id)
+        if threshold > 0:
+            self._push(channel_id, ticket, self._due(ticket, threshold))
+        else:
+            ticket.scheduled_at = 0.0
+
+    async def start(self, guild_filter: Optional[Callable[[int], bool]] = None) -> int:
+        """Load open tickets and start the scheduler. Returns how many are tracked."""
+        now = time.time()
+        async with aclosing(self.repository.iter_ticket_activity()) as chunks:
+            async for rows in chunks:
+                for ticket_id, guild_id, channel_id, last_activity in rows:
+                    if guild_filter is not None and not guild_filter(guild_id):
+                        continue
+                    ticket = _IdleTicket(ticket_id, guild_id, last_activity or now)
+                    self._tickets[channel_id] = ticket
+                    await self._schedule(channel_id, ticket)
+
+        self._wakeup = asyncio.Event()
+        self._worker = asyncio.create_task(self._run())
+        return len(self._tickets)
+
+    def track(self, ticket: Ticket) -> None:
+        """Start watching a newly opened ticket."""
+        if ticket.channel_id in self._tickets:
+            return
+        idle = _IdleTicket(ticket.id, ticket.guild_id, time.time())
+        self._tickets[ticket.channel_id] = idle
+        # Due at once: handling the entry looks up the threshold and pushes the real time
+        self._push(ticket.channel_id, idle, idle.last_activity)
+
+    def touch(self, channel_id: int, when: Optional[float] = None) -> bool:
+        """Record activity in a ticket channel. Returns False for untracked channels."""
+        ticket = self._tickets.get(channel_id)
+        if ticket is None:
+            return False
+        ticket.last_activity = max(ticket.last_activity, time.time() if when is None else when)
+        # Activity after the warning cancels it; the close entry will be pushed back
+        ticket.warned_at = 0.0
+        return True
+
+    def reschedule_guild(self, guild_id: int) -> int:
+        """Recompute the schedule of a guild's tickets after its threshold changed."""
+        now = time.time()
+        count = 0
+        for channel_id, ticket in self._tickets.items():
+            if ticket.guild_id == guild_id:
+                self._push(channel_id, ticket, now)
+                count += 1
+        return count
+
+    async def _run(self) -> None:
+        """Scheduler loop: sleep until the earliest entry, then handle due entries."""
+        while True:
+            self._wakeup.clear()
+            now = time.time()
+            if not self._heap or self._heap[0][0] > now:
+                timeout = self._heap[0][0] - now if self._heap else None
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=timeout)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            when, channel_id = heapq.heappop(self._heap)
+            try:
+                await self._handle(channel_id, when, now)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Idle check of channel {channel_id} failed: {e}")
+
+    async def _handle(self, channel_id: int, when: float, now: float) -> None:
+        """Warn about or close a ticket whose entry came due."""
+        ticket = self._tickets.get(channel_id)
+        if ticket is None or ticket.scheduled_at != when:
+            return  # Stale entry
+        if channel_id not in self.ticket_service.ticket_index:
+            del self._tickets[channel_id]  # Closed by other means
+            return
+
+        threshold = await self.threshold(ticket.guild_id)
+        if threshold <= 0:
+            ticket.scheduled_at = 0.0
+            return
+        due = self._due(ticket, threshold)
+        if due > now:
+            self._push(channel_id, ticket, due)  # Active since the entry was pushed
+            return
+
+        channel = self.client.get_channel(channel_id)
+        if not ticket.warned_at:
+            ticket.warned_at = now
+            close_at = self._due(ticket, threshold)
+            self._push(channel_id, ticket, close_at)
+            if channel is not None:
+                await self.rest.send(
+                    channel, Priority.BACKGROUND,
+                    embed=create_embed(
+                        "⏰ Ticket Inactive",
+                        f"This ticket has had no activity and will be closed <t:{int(close_at)}:R>.\n"
+                        f"Send a message to keep it open."
+                    )
+                )
+                self.warned += 1
+            return
+
+        del self._tickets[channel_id]
+        await self._close(channel_id, ticket, channel)
+
+    async def _close(self, channel_id: int, ticket: _IdleTicket, channel: Any) -> None:
+        """Close a ticket the same way the close button does."""
+        closed = await self.ticket_service.close_ticket(channel_id)
+        if closed is None:
+            return
+        self.closed += 1
+        if channel is None:
+            return  # The channel is already gone
+        # Schedule first: the ticket is closed now and its channel must go even if the notice fails
+        await self.deletion_queue.schedule(channel_id, ticket.guild_id, reason="Ticket closed after inactivity")
+        try:
+            await self.rest.send(
+                channel, Priority.BACKGROUND,
+                embed=create_embed(
+                    "Ticket Closed",
+                    f"This ticket was closed after inactivity.\n"
+                    f"The channel will be deleted in {Settings.CHANNEL_DELETE_DELAY:.0f} seconds."
+                )
+            )
+        except Exception as e:
+            logger.warning(f"Failed to send the idle close notice to channel {channel_id}: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        """Get scheduler metrics."""
+        return {
+            'tracked': len(self._tickets),
+            'scheduled': sum(1 for ticket in self._tickets.values() if ticket.scheduled_at),
+            'warned': self.warned,
+            'closed': self.closed,
+            'next_due_in': max(0.0, self._heap[0][0] - time.time()) if self._heap else None
+        }
+
+    async def close(self) -> None:
+        """Stop the scheduler."""
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
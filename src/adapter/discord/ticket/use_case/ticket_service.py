@@ -1,20 +1,103 @@
 """Use cases for ticket system operations."""
 
 import discord
-from typing import List, Optional, Tuple
+from contextlib import aclosing
+from typing import Any, Callable, Dict, List, Optional, Tuple
 from ..repository.ticket_repository import TicketRepository
 from ..domain.entities import (
     GuildSettings, Ticket, TicketRole, FormQuestion, 
-    FormResponse, TicketType, TicketStatus
+    FormResponse, CoOwner, GuildConfig, TicketType, TicketStatus
 )
 from ..config.settings import Settings
+from ..utils.cache import LRUCache
+from ..utils.ticket_index import IndexEntry, OpenTicketIndex
+from ..utils.rest_scheduler import RestScheduler
+from ..utils.form_pages import parse_question_spec
+from .channel_pool import TicketChannelPool
+from .category_resolver import TicketCategoryResolver
 
 
 class TicketService:
     """Service for ticket system business logic."""
     
-    def __init__(self, repository: TicketRepository):
+    def __init__(
+        self,
+        repository: TicketRepository,
+        rest: Optional[RestScheduler] = None,
+        channel_pool: Optional[TicketChannelPool] = None,
+        category_resolver: Optional[TicketCategoryResolver] = None
+    ):
         self.repository = repository
+        self.rest = rest or RestScheduler(Settings.REST_GLOBAL_RATE)
+        self.channel_pool = channel_pool
+        self.category_resolver = category_resolver
+        self._config_cache: LRUCache[GuildConfig] = LRUCache(
+            Settings.GUILD_CONFIG_CACHE_SIZE,
+            Settings.GUILD_CONFIG_CACHE_TTL
+        )
+        self.ticket_index = OpenTicketIndex()
+        # Called with a guild id after its configuration changed here, e.g. to notify other clusters
+        self.invalidation_hook: Optional[Callable[[int], None]] = None
+        # Called with each channel ticket opened here, e.g. to watch it for inactivity
+        self.ticket_opened_hook: Optional[Callable[[Ticket], None]] = None
+    
+    async def get_guild_config(self, guild_id: int) -> GuildConfig:
+        """Get the cached configuration bundle of a guild."""
+        config = self._config_cache.get(guild_id)
+        if config is None:
+            # Not cached if the guild was invalidated while it loaded
+            generation = self._config_cache.generation(guild_id)
+            config = await self.repository.get_guild_config(guild_id)
+            self._config_cache.set(guild_id, config, generation)
+        return config
+    
+    def invalidate_guild_config(self, guild_id: int, publish: bool = True) -> None:
+        """Drop the cached configuration of a guild after it changed."""
+        self._config_cache.invalidate(guild_id)
+        if publish and self.invalidation_hook is not None:
+            self.invalidation_hook(guild_id)
+    
+    def cache_stats(self) -> Dict[str, Any]:
+        """Get guild configuration cache metrics."""
+        return self._config_cache.stats()
+    
+    async def load_ticket_index(self, guild_filter: Optional[Callable[[int], bool]] = None) -> int:
+        """Fill the open ticket index from the database. Returns the ticket count.
+        
+        guild_filter limits the index to the guilds it accepts, e.g. the
+        guilds of this cluster's shards.
+        """
+        self.ticket_index.clear()
+        count = 0
+        async with aclosing(self.repository.iter_open_tickets()) as chunks:
+            async for rows in chunks:
+                if guild_filter is not None:
+                    rows = [row for row in rows if guild_filter(row[1])]
+                count += self.ticket_index.load(rows)
+        return count
+    
+    def _index_ticket(self, ticket: Ticket) -> None:
+        """Track a ticket in the open ticket index if it owns its channel."""
+        if ticket.status == TicketStatus.OPEN and ticket.ticket_type == TicketType.SIMPLE:
+            self.ticket_index.add(ticket.id, ticket.guild_id, ticket.user_id, ticket.channel_id)
+    
+    def _ticket_opened(self, ticket: Ticket) -> None:
+        """Index a newly created channel ticket and notify the hook."""
+        self._index_ticket(ticket)
+        if self.ticket_opened_hook is not None:
+            self.ticket_opened_hook(ticket)
+    
+    @staticmethod
+    def _ticket_from_entry(entry: IndexEntry) -> Ticket:
+        """Build a Ticket from an open ticket index entry."""
+        ticket_id, guild_id, user_id, channel_id = entry
+        return Ticket(
+            id=ticket_id,
+            guild_id=guild_id,
+            user_id=user_id,
+            channel_id=channel_id,
+            ticket_type=TicketType.SIMPLE
+        )
     
     async def setup_guild_settings(
         self, 
@@ -31,40 +114,45 @@ class TicketService:
             target_channel_id=target_channel_id
         )
         await self.repository.save_guild_settings(settings)
+        self.invalidate_guild_config(guild_id)
         return settings
     
     async def get_guild_settings(self, guild_id: int) -> Optional[GuildSettings]:
         """Get guild settings."""
-        return await self.repository.get_guild_settings(guild_id)
+        return (await self.get_guild_config(guild_id)).settings
     
     async def setup_form_questions(self, guild_id: int, questions: List[str]) -> List[FormQuestion]:
-        """Setup form questions for a guild."""
+        """Setup form questions for a guild from "text [options]" specs."""
         if len(questions) > Settings.MAX_QUESTIONS_PER_FORM:
             raise ValueError(f"Maximum {Settings.MAX_QUESTIONS_PER_FORM} questions allowed")
         
         form_questions = [
-            FormQuestion(order=i + 1, text=question)
+            parse_question_spec(question, order=i + 1)
             for i, question in enumerate(questions)
         ]
         
         await self.repository.save_form_questions(guild_id, form_questions)
+        self.invalidate_guild_config(guild_id)
         return form_questions
     
     async def get_form_questions(self, guild_id: int) -> List[FormQuestion]:
         """Get form questions for a guild."""
-        return await self.repository.get_form_questions(guild_id)
+        return (await self.get_guild_config(guild_id)).form_questions
     
     async def add_ticket_role(self, guild_id: int, role_id: int) -> None:
         """Add a role that can access tickets."""
         await self.repository.add_ticket_role(guild_id, role_id)
+        self.invalidate_guild_config(guild_id)
     
     async def remove_ticket_role(self, guild_id: int, role_id: int) -> bool:
         """Remove a ticket role."""
-        return await self.repository.remove_ticket_role(guild_id, role_id)
+        removed = await self.repository.remove_ticket_role(guild_id, role_id)
+        self.invalidate_guild_config(guild_id)
+        return removed
     
     async def get_ticket_roles(self, guild_id: int) -> List[TicketRole]:
         """Get ticket roles for a guild."""
-        return await self.repository.get_ticket_roles(guild_id)
+        return (await self.get_guild_config(guild_id)).ticket_roles
     
     async def create_simple_ticket(
         self, 
@@ -88,12 +176,8 @@ class TicketService:
                 overwrites[role] = discord.PermissionOverwrite(read_messages=True, send_messages=True)
         
         channel_name = f"{Settings.TICKET_CHANNEL_PREFIX}{user.display_name}".lower()
-        channel = await guild.create_text_channel(
-            name=channel_name,
-            overwrites=overwrites,
-            category=None,  # You can add category logic here
-            reason=f"Ticket created by {user}"
-        )
+        reason = f"Ticket created by {user}"
+        channel = await self.open_ticket_channel(guild, channel_name, overwrites, reason)
         
         # Create ticket record
         ticket = Ticket(
@@ -105,9 +189,54 @@ class TicketService:
         
         ticket_id = await self.repository.create_ticket(ticket)
         ticket.id = ticket_id
+        self._ticket_opened(ticket)
         
         return channel, ticket
     
+    async def open_ticket_channel(
+        self,
+        guild: discord.Guild,
+        name: str,
+        overwrites: Dict[Any, discord.PermissionOverwrite],
+        reason: Optional[str] = None
+    ) -> discord.TextChannel:
+        """Claim a warm pooled channel for a ticket, creating one if the pool is empty."""
+        if self.channel_pool:
+            channel = await self.channel_pool.claim(guild, name, overwrites, reason)
+            if channel:
+                return channel
+        
+        category = await self.category_resolver.resolve(guild) if self.category_resolver else None
+        try:
+            return await self.rest.create_text_channel(
+                guild,
+                name,
+                overwrites=overwrites,
+                category=category,
+                reason=reason
+            )
+        except Exception:
+            if category is not None:
+                self.category_resolver.release(guild.id, category.id)
+            raise
+    
+    async def register_channel_ticket(
+        self,
+        guild_id: int,
+        user_id: int,
+        channel_id: int
+    ) -> Ticket:
+        """Record a ticket for a channel created outside create_simple_ticket."""
+        ticket = Ticket(
+            guild_id=guild_id,
+            user_id=user_id,
+            channel_id=channel_id,
+            ticket_type=TicketType.SIMPLE
+        )
+        ticket.id = await self.repository.create_ticket(ticket)
+        self._ticket_opened(ticket)
+        return ticket
+    
     async def create_form_ticket(
         self,
         guild: discord.Guild,
@@ -124,38 +253,90 @@ class TicketService:
             ticket_type=TicketType.FORM
         )
         
-        ticket_id = await self.repository.create_ticket(ticket)
-        ticket.id = ticket_id
-        
-        # Save form responses
-        await self.repository.save_form_responses(ticket_id, responses)
+        # Create the ticket and its responses in one commit
+        async with self.repository.transaction() as tx:
+            ticket_id = tx.create_ticket(ticket)
+            tx.save_form_responses(ticket_id, responses)
         
+        ticket.id = ticket_id.value
         return ticket
     
     async def close_ticket(self, channel_id: int) -> Optional[Ticket]:
         """Close a ticket."""
-        ticket = await self.repository.get_ticket_by_channel(channel_id)
-        if ticket and ticket.status == TicketStatus.OPEN:
-            await self.repository.close_ticket(ticket.id)
-            ticket.status = TicketStatus.CLOSED
-            return ticket
-        return None
+        # Read and update in one transaction so concurrent closes cannot race
+        async with self.repository.transaction() as tx:
+            closed = tx.close_ticket_by_channel(channel_id)
+        self.ticket_index.remove(channel_id)
+        return closed.value
     
     async def get_ticket_by_channel(self, channel_id: int) -> Optional[Ticket]:
         """Get ticket by channel ID."""
-        return await self.repository.get_ticket_by_channel(channel_id)
+        entry = self.ticket_index.get_by_channel(channel_id)
+        if entry is not None:
+            return self._ticket_from_entry(entry)
+        
+        ticket = await self.repository.get_ticket_by_channel(channel_id)
+        if ticket is not None:
+            self._index_ticket(ticket)
+        return ticket
+    
+    async def get_open_ticket(self, guild_id: int, user_id: int) -> Optional[Ticket]:
+        """Get the open channel ticket of a user in a guild."""
+        entry = self.ticket_index.get_by_owner(guild_id, user_id)
+        if entry is not None:
+            return self._ticket_from_entry(entry)
+        
+        ticket = await self.repository.get_open_ticket_by_user(guild_id, user_id)
+        if ticket is not None:
+            self._index_ticket(ticket)
+        return ticket
     
     async def add_co_owner(self, guild_id: int, user_id: int, assigned_by: int) -> None:
         """Add a co-owner."""
         await self.repository.add_co_owner(guild_id, user_id, assigned_by)
+        self.invalidate_guild_config(guild_id)
     
     async def remove_co_owner(self, guild_id: int, user_id: int) -> bool:
         """Remove a co-owner."""
-        return await self.repository.remove_co_owner(guild_id, user_id)
+        removed = await self.repository.remove_co_owner(guild_id, user_id)
+        self.invalidate_guild_config(guild_id)
+        return removed
     
-    async def is_authorized(self, guild: discord.Guild, user: discord.Member) -> bool:
-        """Check if user is authorized to manage tickets (owner or co-owner)."""
-        if guild.owner_id == user.id:
+    async def get_co_owners(self, guild_id: int) -> List[CoOwner]:
+        """Get co-owners for a guild."""
+        return (await self.get_guild_config(guild_id)).co_owners
+    
+    async def is_co_owner(self, guild_id: int, user_id: int) -> bool:
+        """Check if user is a co-owner."""
+        config = await self.get_guild_config(guild_id)
+        return user_id in config.co_owner_ids
+    
+    async def can_manage(
+        self,
+        guild: discord.Guild,
+        member: discord.Member,
+        ticket: Optional[Ticket] = None
+    ) -> bool:
+        """Check if member may manage the ticket system, or a given ticket.
+        
+        The owner and co-owners may manage everything. For a ticket, its
+        creator and members with a ticket role are allowed as well.
+        """
+        if guild.owner_id == member.id:
+            return True
+        
+        config = await self.get_guild_config(guild.id)
+        if member.id in config.co_owner_ids:
             return True
         
-        return await self.repository.is_co_owner(guild.id, user.id)
+        if ticket is None:
+            return False
+        
+        if ticket.user_id == member.id:
+            return True
+        
+        return not config.staff_role_ids.isdisjoint(role.id for role in member.roles)
+    
+    async def is_authorized(self, guild: discord.Guild, user: discord.Member) -> bool:
+        """Check if user is authorized to manage tickets (owner or co-owner)."""
+        return await self.can_manage(guild, user)
@@ -0,0 +1,242 @@
+"""Export of ticket channels to transcript files before they are deleted."""
+
+import asyncio
+import contextlib
+import logging
+import multiprocessing
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+import discord
+
+from ..config.settings import Settings
+from ..domain.entities import TicketTranscript
+from ..repository.ticket_repository import TicketRepository
+from .blob_store import BlobStore, blob_url
+from ..utils.rest_scheduler import Priority, RestScheduler
+from ..utils.transcript_render import render_foot, render_head, render_page
+
+
+logger = logging.getLogger(__name__)
+
+
+class TranscriptExporter:
+    """Streams a ticket channel's history into gzip-compressed JSONL and HTML files.
+
+    History is fetched one page at a time, oldest first, and each page is
+    rendered in a process pool while the next one is fetched. Only two pages
+    are held at once, whatever the size of the channel. The finished
+    transcript is recorded in ticket_transcripts with the local JSONL path;
+    the HTML file sits next to it.
+
+    With a blob store, both files and the channel's attachments are moved
+    into it and the record points to a manifest blob listing them, so
+    content repeated across tickets is stored once.
+    """
+
+    def __init__(
+        self,
+        repository: TicketRepository,
+        rest: RestScheduler,
+        client: Any,
+        directory: str = Settings.TRANSCRIPT_DIR,
+        workers: int = Settings.TRANSCRIPT_WORKERS,
+        page_size: int = Settings.TRANSCRIPT_PAGE_SIZE,
+        compress_level: int = Settings.TRANSCRIPT_COMPRESS_LEVEL,
+        blobs: Optional[BlobStore] = None,
+        attachments: bool = Settings.TRANSCRIPT_ATTACHMENTS,
+        attachment_max_bytes: int = Settings.TRANSCRIPT_ATTACHMENT_MAX_BYTES
+    ):
+        self.repository = repository
+        self.rest = rest
+        self.client = client
+        self.directory = directory
+        self.workers = workers
+        self.page_size = max(1, min(page_size, 100))
+        self.compress_level = compress_level
+        self.blobs = blobs
+        self.attachments = attachments and blobs is not None
+        self.attachment_max_bytes = attachment_max_bytes
+        self._executor: Optional[Executor] = None
+
+        self.exported = 0
+        self.messages = 0
+        self.skipped = 0
+        self.attachments_stored = 0
+
+    def _get_executor(self) -> Optional[Executor]:
+        """Create the process pool on first use; 0 workers renders in threads."""
+        if self._executor is None and self.workers > 0:
+            # Workers must not inherit the event loop and database threads
+            self._executor = ProcessPoolExecutor(
+                self.workers, mp_context=multiprocessing.get_context('spawn')
+            )
+        return self._executor
+
+    def paths(self, guild_id: int, channel_id: int) -> Tuple[str, str]:
+        """Get the (JSONL, HTML) paths of a channel's transcript."""
+        base = os.path.join(self.directory, str(guild_id), str(channel_id))
+        return f"{base}.jsonl.gz", f"{base}.html.gz"
+
+    async def iter_history(self, channel_id: int) -> AsyncIterator[List[Dict[str, Any]]]:
+        """Yield the raw messages of a channel in pages, oldest first."""
+        after = 0
+        while True:
+            page = await self.rest.run(
+                'channel_history', channel_id,
+                lambda after=after: self.client.http.logs_from(channel_id, self.page_size, after=after),
+                Priority.BACKGROUND
+            )
+            if not page:
+                return
+            page.sort(key=lambda payload: int(payload['id']))
+            yield page
+            if len(page) < self.page_size:
+                return
+            after = int(page[-1]['id'])
+
+    async def _store_attachments(self, page: List[Dict[str, Any]], stored: Dict[str, str]) -> None:
+        """Put the attachments of a page into the blob store, recording url -> hash."""
+        for payload in page:
+            for attachment in payload.get('attachments', ()):
+                url = attachment['url']
+                if url in stored or attachment.get('size', 0) > self.attachment_max_bytes:
+                    continue
+                try:
+                    data = await self.client.http.get_from_cdn(url)
+                except discord.HTTPException as e:
+                    logger.warning(f"Cannot download attachment {url}: {e}")
+                    continue
+                stored[url] = await self.blobs.put(data)
+                self.attachments_stored += 1
+
+    async def export(
+        self,
+        guild_id: int,
+        channel_id: int,
+        title: str,
+        attachments: Optional[Dict[str, str]] = None
+    ) -> Tuple[str, int]:
+        """Write a channel's transcript files. Returns (JSONL path, message count).
+
+        When an attachments dict is given, attachments are put into the blob
+        store as pages arrive and recorded in it as url -> hash.
+        """
+        loop = asyncio.get_running_loop()
+        executor = self._get_executor()
+        jsonl_path, html_path = self.paths(guild_id, channel_id)
+        os.makedirs(os.path.dirname(jsonl_path), exist_ok=True)
+
+        count = 0
+        # Written under temporary names that are removed again if the export fails
+        parts = (f"{jsonl_path}.part", f"{html_path}.part")
+        pending = render = None
+        try:
+            with open(parts[0], "wb") as jsonl, open(parts[1], "wb") as html_file:
+                html_file.write(render_head(title, self.compress_level))
+                async for page in self.iter_history(channel_id):
+                    count += len(page)
+                    render = loop.run_in_executor(executor, render_page, page, self.compress_level)
+                    if attachments is not None:
+                        await self._store_attachments(page, attachments)
+                    if pending is not None:
+                        jsonl_chunk, html_chunk = await pending
+                        jsonl.write(jsonl_chunk)
+                        html_file.write(html_chunk)
+                    pending = render
+                if pending is not None:
+                    jsonl_chunk, html_chunk = await pending
+                    jsonl.write(jsonl_chunk)
+                    html_file.write(html_chunk)
+                html_file.write(render_foot(self.compress_level))
+        except BaseException:
+            renders = {future for future in (pending, render) if future is not None}
+            for future in renders:
+                future.cancel()
+            await asyncio.gather(*renders, return_exceptions=True)
+            for part in parts:
+                try:
+                    os.remove(part)
+                except FileNotFoundError:
+                    pass
+            raise
+
+        os.replace(parts[0], jsonl_path)
+        os.replace(parts[1], html_path)
+        return jsonl_path, count
+
+    async def export_channel(self, channel_id: int) -> Optional[TicketTranscript]:
+        """Export the transcript of a ticket channel unless it already has one.
+
+        Returns None for channels without a ticket or whose history can no
+        longer be read. Other errors propagate, so the caller can retry
+        before deleting the channel.
+        """
+        ticket = await self.repository.get_ticket_by_channel(channel_id)
+        if ticket is None:
+            self.skipped += 1
+            return None
+
+        existing = await self.repository.get_transcript(ticket.id)
+        if existing is not None:
+            return existing
+
+        attachments: Optional[Dict[str, str]] = {} if self.attachments else None
+        try:
+            path, count = await self.export(ticket.guild_id, channel_id, f"Ticket #{ticket.id}", attachments)
+            if self.blobs is not None:
+                path = await self._store(ticket.guild_id, channel_id, attachments or {})
+        except (discord.NotFound, discord.Forbidden) as e:
+            logger.warning(f"Cannot read history of channel {channel_id}: {e}")
+            self.skipped += 1
+            await self._release(attachments)
+            return None
+        except BaseException:
+            await self._release(attachments)
+            raise
+
+        created_by = self.client.user.id if self.client.user else 0
+        transcript = TicketTranscript(ticket.id, created_by, path, count)
+        transcript.id = await self.repository.save_transcript(transcript)
+        self.exported += 1
+        self.messages += count
+        logger.info(f"Exported {count} message(s) of ticket {ticket.id} to {path}")
+        return transcript
+
+    async def _store(self, guild_id: int, channel_id: int, attachments: Dict[str, str]) -> str:
+        """Move the transcript files into the blob store. Returns the manifest URL."""
+        jsonl_path, html_path = self.paths(guild_id, channel_id)
+        files = {}
+        try:
+            files['jsonl'] = await self.blobs.put_file(jsonl_path, kind="transcript")
+            files['html'] = await self.blobs.put_file(html_path, kind="transcript")
+            manifest = await self.blobs.put_manifest({**files, 'attachments': attachments})
+        except BaseException:
+            await self._release(files)
+            raise
+        for path in (jsonl_path, html_path):
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(path)
+        return blob_url(manifest)
+
+    async def _release(self, stored: Optional[Dict[str, str]]) -> None:
+        """Drop the references taken for an export that did not complete."""
+        if self.blobs is not None and stored:
+            await self.blobs.repository.release(list(stored.values()))
+
+    def stats(self) -> Dict[str, int]:
+        """Get exporter metrics."""
+        return {
+            'exported': self.exported,
+            'messages': self.messages,
+            'skipped': self.skipped,
+            'attachments_stored': self.attachments_stored,
+            'workers': self.workers
+        }
+
+    def close(self) -> None:
+        """Shut down the process pool."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
@@ -0,0 +1,91 @@
+"""In-memory caches for the ticket system."""
+
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Generic, Hashable, Optional, Tuple, TypeVar
+
+
+V = TypeVar('V')
+
+
+class LRUCache(Generic[V]):
+    """Bounded least-recently-used cache with a time-to-live per entry.
+
+    Invalidating a key bumps its generation. A loader reads the generation
+    before it starts and passes it to set(), so a value loaded before an
+    invalidation is not stored after it.
+    """
+
+    def __init__(self, maxsize: int, ttl: Optional[float] = None):
+        self.maxsize = max(1, maxsize)
+        self.ttl = ttl
+        self._entries: "OrderedDict[Hashable, Tuple[float, V]]" = OrderedDict()
+        self._generations: Dict[Hashable, int] = {}
+        self._epoch = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return self.get(key, count=False) is not None
+
+    def get(self, key: Hashable, count: bool = True) -> Optional[V]:
+        """Get a live entry and mark it as recently used."""
+        entry = self._entries.get(key)
+        if entry is not None:
+            expires_at, value = entry
+            if self.ttl is None or expires_at > time.monotonic():
+                self._entries.move_to_end(key)
+                if count:
+                    self.hits += 1
+                return value
+            del self._entries[key]
+
+        if count:
+            self.misses += 1
+        return None
+
+    def generation(self, key: Hashable) -> int:
+        """Get a key's generation; it grows with every invalidation of the key."""
+        return self._epoch + self._generations.get(key, 0)
+
+    def set(self, key: Hashable, value: V, generation: Optional[int] = None) -> bool:
+        """Store an entry, evicting the least recently used one if full.
+
+        With a generation, the entry is only stored if the key was not
+        invalidated since. Returns whether it was stored.
+        """
+        if generation is not None and generation != self.generation(key):
+            return False
+        expires_at = time.monotonic() + self.ttl if self.ttl is not None else 0.0
+        self._entries[key] = (expires_at, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+        return True
+
+    def invalidate(self, key: Hashable) -> None:
+        """Drop an entry."""
+        self._entries.pop(key, None)
+        self._generations[key] = self._generations.get(key, 0) + 1
+
+    def clear(self) -> None:
+        """Drop every entry."""
+        self._entries.clear()
+        self._epoch += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Get cache metrics."""
+        lookups = self.hits + self.misses
+        return {
+            'size': len(self._entries),
+            'maxsize': self.maxsize,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_rate': self.hits / lookups if lookups else 0.0
+        }
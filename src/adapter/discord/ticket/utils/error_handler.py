@@ -114,25 +114,20 @@ def validate_bot_permissions(
 
 async def safe_delete_channel(
     channel: discord.TextChannel,
+    queue,
     reason: str = "Ticket closed",
-    delay: int = 0
+    delay: float = 0
 ) -> bool:
-    """Safely delete a channel with error handling."""
+    """Schedule a channel's deletion on a ChannelDeletionQueue with error handling.
+    
+    The deletion is stored and runs in the background, so a delay does not
+    hold the caller.
+    """
     try:
-        if delay > 0:
-            import asyncio
-            await asyncio.sleep(delay)
-        
-        await channel.delete(reason=reason)
+        await queue.schedule(channel.id, channel.guild.id, delay, reason)
         return True
-    except discord.Forbidden:
-        logger.error(f"No permission to delete channel {channel.id}")
-        return False
-    except discord.NotFound:
-        logger.warning(f"Channel {channel.id} already deleted")
-        return True
-    except discord.HTTPException as e:
-        logger.error(f"Failed to delete channel {channel.id}: {e}")
+    except Exception as e:
+        logger.error(f"Failed to schedule deletion of channel {channel.id}: {e}")
         return False
 
 
@@ -0,0 +1,61 @@
+"""Routing of form answers to the sessions waiting for them."""
+
+import asyncio
+from typing import Any, Dict, Tuple
+
+
+class FormAnswerDispatcher:
+    """Delivers messages to form sessions keyed by (user id, channel id).
+
+    Each incoming message costs one dict lookup, however many forms are in
+    progress, instead of running every pending bot.wait_for check.
+    """
+
+    def __init__(self):
+        self._waiters: Dict[Tuple[int, int], asyncio.Future] = {}
+        self.delivered = 0
+        self.dropped = 0
+        self.replaced = 0
+
+    def __len__(self) -> int:
+        return len(self._waiters)
+
+    async def wait(self, user_id: int, channel_id: int, timeout: float) -> Any:
+        """Wait for the user's next message in a channel.
+
+        Raises asyncio.TimeoutError when none arrives in time. A newer wait
+        for the same user and channel cancels this one.
+        """
+        key = (user_id, channel_id)
+        previous = self._waiters.get(key)
+        if previous is not None and not previous.done():
+            previous.cancel()
+            self.replaced += 1
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters[key] = waiter
+        try:
+            return await asyncio.wait_for(waiter, timeout)
+        finally:
+            if self._waiters.get(key) is waiter:
+                del self._waiters[key]
+
+    def dispatch(self, message: Any) -> bool:
+        """Hand a message to the session waiting for it. Returns True if one was."""
+        waiter = self._waiters.pop((message.author.id, message.channel.id), None) if self._waiters else None
+        if waiter is None or waiter.done():
+            self.dropped += 1
+            return False
+
+        waiter.set_result(message)
+        self.delivered += 1
+        return True
+
+    def stats(self) -> Dict[str, int]:
+        """Get dispatcher metrics."""
+        return {
+            'waiting': len(self._waiters),
+            'delivered': self.delivered,
+            'dropped': self.dropped,
+            'replaced': self.replaced
+        }
@@ -0,0 +1,110 @@
+"""Question specs and paging of form questions into modals."""
+
+import re
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from ..domain.entities import FormQuestion
+
+
+# Discord allows at most five text inputs per modal
+FIELDS_PER_PAGE = 5
+LABEL_MAX_LENGTH = 45
+PLACEHOLDER_MAX_LENGTH = 100
+ANSWER_MAX_LENGTH = 4000
+
+QUESTION_STYLES = ("short", "long")
+DEFAULT_MAX_LENGTH = 1000
+
+# Answers that leave an optional question empty in message-based forms
+SKIP_ANSWERS = frozenset({"-", "skip", "пропустить"})
+
+# "Question text [long, 10-500, optional]"
+_SPEC_PATTERN = re.compile(r"^(?P<text>.*?)\s*(?:\[(?P<options>[^\[\]]*)\])?\s*$", re.S)
+_RANGE_PATTERN = re.compile(r"^(?P<min>\d+)\s*-\s*(?P<max>\d+)$")
+_BOUND_PATTERN = re.compile(r"^(?P<kind>min|max)\s*(?P<value>\d+)$")
+
+
+def parse_question_spec(spec: str, order: int = 1) -> FormQuestion:
+    """Parse "text [options]" into a FormQuestion.
+
+    Options are comma separated: short or long, required or optional, a
+    length range such as 10-500, or min N / max N. Unknown options raise
+    ValueError.
+    """
+    match = _SPEC_PATTERN.match(spec.strip())
+    text = match["text"].strip()
+    if not text:
+        raise ValueError("Question text is empty")
+
+    question = FormQuestion(order, text)
+    for option in (match["options"] or "").split(","):
+        option = option.strip().lower()
+        if not option:
+            continue
+        if option in QUESTION_STYLES:
+            question.style = option
+        elif option in ("required", "optional"):
+            question.required = option == "required"
+        elif (bounds := _RANGE_PATTERN.match(option)) is not None:
+            question.min_length, question.max_length = int(bounds["min"]), int(bounds["max"])
+        elif (bound := _BOUND_PATTERN.match(option)) is not None:
+            setattr(question, f"{bound['kind']}_length", int(bound["value"]))
+        else:
+            raise ValueError(f"Unknown option '{option}' in question '{text}'")
+
+    question.max_length = max(1, min(question.max_length, ANSWER_MAX_LENGTH))
+    question.min_length = max(0, min(question.min_length, question.max_length))
+    return question
+
+
+def format_question_spec(question: FormQuestion) -> str:
+    """Format a FormQuestion back into "text [options]"."""
+    options = [question.style]
+    if question.min_length or question.max_length != DEFAULT_MAX_LENGTH:
+        options.append(f"{question.min_length}-{question.max_length}")
+    if not question.required:
+        options.append("optional")
+    return f"{question.text} [{', '.join(options)}]"
+
+
+def parse_questions(specs: Sequence[str]) -> List[FormQuestion]:
+    """Parse stored specs, keeping a spec that does not parse as plain text."""
+    questions = []
+    for order, spec in enumerate(specs, start=1):
+        try:
+            questions.append(parse_question_spec(spec, order))
+        except ValueError:
+            questions.append(FormQuestion(order, spec.strip() or f"Question {order}"))
+    return questions
+
+
+def paginate(questions: Sequence[FormQuestion], per_page: int = FIELDS_PER_PAGE) -> List[List[FormQuestion]]:
+    """Split questions into modal pages."""
+    return [list(questions[start:start + per_page]) for start in range(0, len(questions), per_page)]
+
+
+def page_count(question_count: int, per_page: int = FIELDS_PER_PAGE) -> int:
+    """Number of modal pages a form needs."""
+    return -(-question_count // per_page)
+
+
+def check_answer(question: FormQuestion, answer: str) -> Tuple[str, Optional[str]]:
+    """Normalize an answer typed as a message. Returns (answer, error message)."""
+    answer = answer.strip()
+    if not question.required and answer.lower() in SKIP_ANSWERS:
+        return "", None
+    if not answer and question.required:
+        return answer, "This question requires an answer."
+    if len(answer) < question.min_length:
+        return answer, f"The answer must be at least {question.min_length} characters long."
+    if len(answer) > question.max_length:
+        return answer, f"The answer must be at most {question.max_length} characters long."
+    return answer, None
+
+
+def answers_text(questions: Sequence[FormQuestion], answers: Dict[int, str]) -> str:
+    """Format answers by question index for the ticket channel."""
+    return "\n".join(
+        f"**{question.text}**\n{answers.get(index) or '—'}"
+        for index, question in enumerate(questions)
+    )
@@ -0,0 +1,75 @@
+"""On-demand member lookup for bots that do not cache members."""
+
+import asyncio
+from typing import Dict, Iterable, Optional, Union
+
+import discord
+
+from .cache import LRUCache
+from .rest_scheduler import Priority, RestScheduler
+
+
+# Cached in place of a member that is no longer in the guild
+_LEFT = object()
+
+
+class MemberResolver:
+    """Resolves guild members from the gateway cache, a small LRU, or the API.
+
+    With the lean gateway profile the member cache only holds the bot itself,
+    so members a command needs are fetched once and kept for a short time.
+    Members that left the guild are remembered too, to avoid refetching them.
+    """
+
+    def __init__(self, rest: RestScheduler, maxsize: int = 1024, ttl: float = 300.0):
+        self.rest = rest
+        self._cache: LRUCache[Union[discord.Member, object]] = LRUCache(maxsize, ttl)
+        self.fetches = 0
+
+    def remember(self, member: discord.Member) -> None:
+        """Keep a member that arrived with an interaction payload."""
+        self._cache.set((member.guild.id, member.id), member)
+
+    def forget(self, guild_id: int, user_id: int) -> None:
+        """Drop a cached member, e.g. after it left or changed."""
+        self._cache.invalidate((guild_id, user_id))
+
+    async def resolve(self, guild: discord.Guild, user_id: int) -> Optional[discord.Member]:
+        """Get a member of a guild, or None if they are not in it."""
+        member = guild.get_member(user_id)
+        if member is not None:
+            return member
+
+        key = (guild.id, user_id)
+        cached = self._cache.get(key)
+        if cached is not None:
+            return None if cached is _LEFT else cached
+
+        self.fetches += 1
+        try:
+            member = await self.rest.run(
+                'member', guild.id,
+                lambda: guild.fetch_member(user_id),
+                Priority.USER,
+                coalesce_key=('member', guild.id, user_id)
+            )
+        except discord.NotFound:
+            self._cache.set(key, _LEFT)
+            return None
+
+        self._cache.set(key, member)
+        return member
+
+    async def resolve_many(
+        self,
+        guild: discord.Guild,
+        user_ids: Iterable[int]
+    ) -> Dict[int, Optional[discord.Member]]:
+        """Resolve several members of a guild concurrently."""
+        user_ids = list(dict.fromkeys(user_ids))
+        members = await asyncio.gather(*(self.resolve(guild, user_id) for user_id in user_ids))
+        return dict(zip(user_ids, members))
+
+    def stats(self) -> Dict[str, int]:
+        """Get resolver metrics."""
+        return {**self._cache.stats(), 'fetches': self.fetches}
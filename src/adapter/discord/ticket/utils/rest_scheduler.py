@@ -0,0 +1,378 @@
+"""Rate-limit-aware scheduler for outbound Discord REST calls."""
+
+import asyncio
+import heapq
+import logging
+import time
+from enum import IntEnum
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional, Set, Tuple, TypeVar
+
+import discord
+
+
+T = TypeVar('T')
+
+logger = logging.getLogger(__name__)
+
+
+class Priority(IntEnum):
+    """Scheduling priority; lower values run first."""
+    INTERACTION = 0  # Followups the user is waiting on
+    USER = 1         # Work a user action triggered, like creating a ticket channel
+    BACKGROUND = 2   # Deletions, transcript and log posts
+
+
+# Route name -> (requests, per seconds). Discord keys buckets by route and
+# major parameter (channel, guild or webhook); these stay below the limits
+# it reports for the routes the ticket flows use.
+ROUTE_LIMITS: Dict[str, Tuple[int, float]] = {
+    'interaction': (5, 1.0),
+    'message': (5, 5.0),
+    'message_edit': (5, 5.0),
+    'channel_create': (5, 10.0),
+    'channel_edit': (2, 600.0),
+    'channel_delete': (5, 5.0),
+    'channel_history': (5, 1.0),
+    'member': (5, 1.0),
+    'default': (5, 5.0),
+}
+
+# Interaction webhooks do not count towards the global limit
+GLOBAL_EXEMPT_ROUTES = frozenset({'interaction'})
+
+
+class TokenBucket:
+    """Token bucket refilled continuously at capacity / per tokens per second."""
+
+    __slots__ = ('capacity', 'rate', 'tokens', 'updated', 'blocked_until')
+
+    def __init__(self, capacity: int, per: float):
+        self.capacity = capacity
+        self.rate = capacity / per
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+
+    def delay(self, now: float) -> float:
+        """Seconds until a token is available."""
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if now < self.blocked_until:
+            return self.blocked_until - now
+        if self.tokens >= 1:
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    def take(self) -> None:
+        """Spend a token; call only when delay() returned 0."""
+        self.tokens -= 1
+
+    def block(self, now: float, seconds: float) -> None:
+        """Hold the bucket after Discord reported a rate limit."""
+        self.tokens = 0.0
+        self.blocked_until = max(self.blocked_until, now + seconds)
+
+
+class _Job:
+    """A queued REST call."""
+
+    __slots__ = ('priority', 'seq', 'route', 'call', 'future', 'enqueued_at', 'coalesce_key')
+
+    def __init__(self, priority, seq, route, call, future, enqueued_at, coalesce_key):
+        self.priority = priority
+        self.seq = seq
+        self.route = route
+        self.call = call
+        self.future = future
+        self.enqueued_at = enqueued_at
+        self.coalesce_key = coalesce_key
+
+    def __lt__(self, other: "_Job") -> bool:
+        return (self.priority, self.seq) < (other.priority, other.seq)
+
+
+class RestScheduler:
+    """Queues REST calls per Discord route bucket and runs them within its limits.
+
+    Each bucket runs one call at a time, as Discord serialises them anyway.
+    Across buckets, the next call is the highest-priority one whose bucket
+    has a token, subject to a shared global token bucket. Queued calls with
+    the same coalesce key are merged so only the latest one is sent.
+    """
+
+    def __init__(self, global_rate: float = 45.0):
+        self._global = TokenBucket(max(1, int(global_rate)), 1.0)
+        self._queues: Dict[str, List[_Job]] = {}
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._busy: Set[str] = set()
+        self._coalescing: Dict[Hashable, _Job] = {}
+        self._pending_edits: Dict[Hashable, Dict[str, Any]] = {}
+        self._seq = 0
+        self._wakeup: Optional[asyncio.Event] = None
+        self._dispatcher: Optional[asyncio.Task] = None
+        self._running: Set[asyncio.Task] = set()
+
+        self.executed = 0
+        self.failed = 0
+        self.coalesced = 0
+        self.rate_limited = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+        self._waits_by_priority: Dict[Priority, float] = {p: 0.0 for p in Priority}
+        self._runs_by_priority: Dict[Priority, int] = {p: 0 for p in Priority}
+
+    def _bucket(self, key: str, route: str) -> TokenBucket:
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            capacity, per = ROUTE_LIMITS.get(route, ROUTE_LIMITS['default'])
+            bucket = self._buckets[key] = TokenBucket(capacity, per)
+        return bucket
+
+    async def run(
+        self,
+        route: str,
+        major_id: int,
+        call: Callable[[], Awaitable[T]],
+        priority: Priority = Priority.USER,
+        coalesce_key: Optional[Hashable] = None
+    ) -> T:
+        """Queue call() in the bucket of (route, major_id) and wait for its result.
+
+        If a call with the same coalesce_key is still queued, it is replaced
+        by this one and both callers get this call's result.
+        """
+        loop = asyncio.get_running_loop()
+        if coalesce_key is not None:
+            queued = self._coalescing.get(coalesce_key)
+            if queued is not None:
+                queued.call = call
+                queued.priority = min(queued.priority, priority)
+                self.coalesced += 1
+                key = f"{queued.route}:{major_id}"
+                heapq.heapify(self._queues[key])
+                return await asyncio.shield(queued.future)
+
+        self._seq += 1
+        job = _Job(priority, self._seq, route, call, loop.create_future(), time.monotonic(), coalesce_key)
+        if coalesce_key is not None:
+            self._coalescing[coalesce_key] = job
+
+        heapq.heappush(self._queues.setdefault(f"{route}:{major_id}", []), job)
+        self._ensure_dispatcher()
+        self._wakeup.set()
+        return await asyncio.shield(job.future)
+
+    def _ensure_dispatcher(self) -> None:
+        if self._wakeup is None:
+            self._wakeup = asyncio.Event()
+        if self._dispatcher is None or self._dispatcher.done():
+            self._dispatcher = asyncio.create_task(self._dispatch())
+
+    def _next_job(self, now: float) -> Tuple[Optional[str], Optional[float]]:
+        """Pick the bucket whose head job should run now, or how long to wait."""
+        global_delay = self._global.delay(now)
+        best_key = None
+        best_job = None
+        wait = None
+
+        for key, queue in self._queues.items():
+            if not queue or key in self._busy:
+                continue
+            job = queue[0]
+            delay = self._bucket(key, job.route).delay(now)
+            if job.route not in GLOBAL_EXEMPT_ROUTES:
+                delay = max(delay, global_delay)
+            if delay > 0:
+                wait = delay if wait is None else min(wait, delay)
+            elif best_job is None or job < best_job:
+                best_key, best_job = key, job
+
+        return best_key, wait
+
+    async def _dispatch(self) -> None:
+        """Start queued calls as soon as their buckets allow it."""
+        while True:
+            self._wakeup.clear()
+            now = time.monotonic()
+            key, wait = self._next_job(now)
+
+            if key is None:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=wait)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            job = heapq.heappop(self._queues[key])
+            if not self._queues[key]:
+                del self._queues[key]
+            if job.coalesce_key is not None:
+                self._coalescing.pop(job.coalesce_key, None)
+
+            self._bucket(key, job.route).take()
+            if job.route not in GLOBAL_EXEMPT_ROUTES:
+                self._global.take()
+
+            waited = now - job.enqueued_at
+            self._wait_total += waited
+            self._wait_max = max(self._wait_max, waited)
+            self._waits_by_priority[job.priority] += waited
+            self._runs_by_priority[job.priority] += 1
+
+            self._busy.add(key)
+            task = asyncio.create_task(self._execute(key, job))
+            self._running.add(task)
+            task.add_done_callback(self._running.discard)
+
+    async def _execute(self, key: str, job: _Job) -> None:
+        """Run one call and hand its outcome to the waiting callers."""
+        try:
+            result = await job.call()
+        except discord.RateLimited as e:
+            # discord.py gave up waiting: hold the bucket and retry the call
+            self.rate_limited += 1
+            logger.warning(f"Rate limited on {key}, retrying in {e.retry_after:.1f}s")
+            self._bucket(key, job.route).block(time.monotonic(), e.retry_after)
+            job.enqueued_at = time.monotonic()
+            # Later calls with the same key merge into the retry again
+            if job.coalesce_key is not None and job.coalesce_key not in self._coalescing:
+                self._coalescing[job.coalesce_key] = job
+            heapq.heappush(self._queues.setdefault(key, []), job)
+        except Exception as e:
+            self.failed += 1
+            if not job.future.done():
+                job.future.set_exception(e)
+        else:
+            self.executed += 1
+            if not job.future.done():
+                job.future.set_result(result)
+        finally:
+            self._busy.discard(key)
+            self._wakeup.set()
+
+    # Convenience wrappers for the calls the ticket flows make
+
+    async def send(self, channel, priority: Priority = Priority.USER, **kwargs) -> discord.Message:
+        """Send a message to a channel."""
+        return await self.run('message', channel.id, lambda: channel.send(**kwargs), priority)
+
+    async def followup(self, interaction: discord.Interaction, **kwargs) -> Optional[discord.WebhookMessage]:
+        """Send an interaction followup ahead of background work."""
+        return await self.run(
+            'interaction', interaction.id,
+            lambda: interaction.followup.send(**kwargs),
+            Priority.INTERACTION
+        )
+
+    async def create_text_channel(
+        self,
+        guild: discord.Guild,
+        name: str,
+        priority: Priority = Priority.USER,
+        **kwargs
+    ) -> discord.TextChannel:
+        """Create a text channel in a guild."""
+        return await self.run(
+            'channel_create', guild.id,
+            lambda: guild.create_text_channel(name=name, **kwargs),
+            priority
+        )
+
+    async def create_category(
+        self,
+        guild: discord.Guild,
+        name: str,
+        priority: Priority = Priority.BACKGROUND,
+        **kwargs
+    ) -> discord.CategoryChannel:
+        """Create a channel category in a guild."""
+        return await self.run(
+            'channel_create', guild.id,
+            lambda: guild.create_category(name=name, **kwargs),
+            priority
+        )
+    
+    async def delete_channel(self, channel, reason: Optional[str] = None) -> None:
+        """Delete a channel as background work."""
+        await self.run(
+            'channel_delete', channel.id,
+            lambda: channel.delete(reason=reason),
+            Priority.BACKGROUND,
+            coalesce_key=('delete', channel.id)
+        )
+
+    async def edit_channel(self, channel, priority: Priority = Priority.BACKGROUND, **kwargs) -> Any:
+        """Edit a channel, merging with any edit of it that is still queued."""
+        return await self._coalesced_edit('channel_edit', channel.id, channel.id, channel.edit, priority, kwargs)
+
+    async def edit_message(self, message, priority: Priority = Priority.USER, **kwargs) -> Any:
+        """Edit a message, merging with any edit of it that is still queued."""
+        return await self._coalesced_edit(
+            'message_edit', message.channel.id, message.id, message.edit, priority, kwargs
+        )
+
+    async def _coalesced_edit(self, route, major_id, target_id, edit, priority, kwargs) -> Any:
+        key = (route, target_id)
+        # Later fields override earlier ones; the merged edit is sent once
+        self._pending_edits.setdefault(key, {}).update(kwargs)
+
+        async def _edit():
+            fields = self._pending_edits.pop(key, None)
+            # Already sent by an earlier edit that picked up these fields
+            if not fields:
+                return None
+            try:
+                return await edit(**fields)
+            except discord.RateLimited:
+                # The call is retried; give it the fields back, keeping any newer ones
+                self._pending_edits[key] = {**fields, **self._pending_edits.get(key, {})}
+                raise
+
+        return await self.run(route, major_id, _edit, priority, coalesce_key=key)
+
+    def stats(self) -> Dict[str, Any]:
+        """Get scheduler metrics."""
+        by_priority = {}
+        for priority in Priority:
+            runs = self._runs_by_priority[priority]
+            queued = sum(1 for queue in self._queues.values() for job in queue if job.priority == priority)
+            by_priority[priority.name.lower()] = {
+                'queued': queued,
+                'executed': runs,
+                'avg_wait_ms': self._waits_by_priority[priority] / runs * 1000 if runs else 0.0
+            }
+
+        started = sum(self._runs_by_priority.values())
+        return {
+            'queue_depth': sum(len(queue) for queue in self._queues.values()),
+            'buckets': len(self._queues),
+            'in_flight': len(self._busy),
+            'executed': self.executed,
+            'failed': self.failed,
+            'coalesced': self.coalesced,
+            'rate_limited': self.rate_limited,
+            'avg_wait_ms': self._wait_total / started * 1000 if started else 0.0,
+            'max_wait_ms': self._wait_max * 1000,
+            'priorities': by_priority
+        }
+
+    async def close(self) -> None:
+        """Stop dispatching and fail calls that are still queued."""
+        if self._dispatcher is not None:
+            self._dispatcher.cancel()
+            try:
+                await self._dispatcher
+            except asyncio.CancelledError:
+                pass
+            self._dispatcher = None
+
+        for queue in self._queues.values():
+            for job in queue:
+                if not job.future.done():
+                    job.future.cancel()
+        self._queues.clear()
+        self._coalescing.clear()
+        self._pending_edits.clear()
+
+        if self._running:
+            await asyncio.gather(*self._running, return_exceptions=True)
@@ -0,0 +1,124 @@
+"""Compact in-memory index of open tickets."""
+
+from array import array
+from typing import Dict, Iterable, List, Optional, Tuple
+
+
+# Ticket id, guild id, user id, channel id
+IndexEntry = Tuple[int, int, int, int]
+
+
+def owner_key(guild_id: int, user_id: int) -> int:
+    """Pack a (guild, user) pair into a single int key."""
+    return (guild_id << 64) | user_id
+
+
+class OpenTicketIndex:
+    """Open tickets keyed by channel id and by (guild, user).
+
+    Rows live in parallel 64-bit arrays, so an entry costs a few dict slots
+    and 32 bytes of column storage instead of a full Ticket object. Slots
+    of removed tickets are reused.
+    """
+
+    def __init__(self):
+        self._ids = array('q')
+        self._guilds = array('q')
+        self._users = array('q')
+        self._channels = array('q')
+        self._free: List[int] = []
+        self._by_channel: Dict[int, int] = {}
+        self._by_owner: Dict[int, int] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._by_channel)
+
+    def __contains__(self, channel_id: int) -> bool:
+        return channel_id in self._by_channel
+
+    def _entry(self, slot: int) -> IndexEntry:
+        return (
+            self._ids[slot],
+            self._guilds[slot],
+            self._users[slot],
+            self._channels[slot]
+        )
+
+    def add(self, ticket_id: int, guild_id: int, user_id: int, channel_id: int) -> None:
+        """Add an open ticket, replacing any entry for the same channel."""
+        self.remove(channel_id)
+
+        if self._free:
+            slot = self._free.pop()
+            self._ids[slot] = ticket_id
+            self._guilds[slot] = guild_id
+            self._users[slot] = user_id
+            self._channels[slot] = channel_id
+        else:
+            slot = len(self._ids)
+            self._ids.append(ticket_id)
+            self._guilds.append(guild_id)
+            self._users.append(user_id)
+            self._channels.append(channel_id)
+
+        self._by_channel[channel_id] = slot
+        self._by_owner[owner_key(guild_id, user_id)] = slot
+
+    def load(self, rows: Iterable[IndexEntry]) -> int:
+        """Add (id, guild_id, user_id, channel_id) rows. Returns how many were added."""
+        count = 0
+        for ticket_id, guild_id, user_id, channel_id in rows:
+            self.add(ticket_id, guild_id, user_id, channel_id)
+            count += 1
+        return count
+
+    def remove(self, channel_id: int) -> Optional[IndexEntry]:
+        """Remove the ticket of a channel. Returns the removed entry."""
+        slot = self._by_channel.pop(channel_id, None)
+        if slot is None:
+            return None
+
+        entry = self._entry(slot)
+        key = owner_key(entry[1], entry[2])
+        if self._by_owner.get(key) == slot:
+            del self._by_owner[key]
+        self._free.append(slot)
+        return entry
+
+    def get_by_channel(self, channel_id: int) -> Optional[IndexEntry]:
+        """Get the open ticket of a channel."""
+        slot = self._by_channel.get(channel_id)
+        if slot is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return self._entry(slot)
+
+    def get_by_owner(self, guild_id: int, user_id: int) -> Optional[IndexEntry]:
+        """Get the most recent open ticket of a user in a guild."""
+        slot = self._by_owner.get(owner_key(guild_id, user_id))
+        if slot is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return self._entry(slot)
+
+    def clear(self) -> None:
+        """Drop every entry."""
+        self.__init__()
+
+    def stats(self) -> Dict[str, int]:
+        """Get index metrics."""
+        return {
+            'open_tickets': len(self._by_channel),
+            'owners': len(self._by_owner),
+            'slots': len(self._ids),
+            'bytes': sum(
+                column.itemsize * len(column)
+                for column in (self._ids, self._guilds, self._users, self._channels)
+            ),
+            'hits': self.hits,
+            'misses': self.misses
+        }
@@ -0,0 +1,81 @@
+"""Rendering of transcript pages to compressed JSONL and HTML.
+
+These functions run in worker processes, so this module only imports the
+standard library. Every call returns complete gzip members: members
+appended one after another form a valid gzip file, which lets a transcript
+be written page by page.
+"""
+
+import gzip
+import html
+import json
+from typing import Any, Dict, List, Tuple
+
+
+_HTML_HEAD = """<!DOCTYPE html>
+<html lang="ru">
+<head>
+<meta charset="utf-8">
+<title>{title}</title>
+<style>
+body {{ font-family: sans-serif; background: #313338; color: #dbdee1; margin: 2em; }}
+.message {{ margin: 0 0 1em; }}
+.author {{ font-weight: bold; color: #f2f3f5; }}
+.time {{ font-size: 0.8em; color: #949ba4; margin-left: 0.5em; }}
+.content {{ white-space: pre-wrap; }}
+.attachment {{ display: block; color: #00a8fc; }}
+</style>
+</head>
+<body>
+<h1>{title}</h1>
+"""
+_HTML_FOOT = "</body>\n</html>\n"
+
+
+def message_record(payload: Dict[str, Any]) -> Dict[str, Any]:
+    """Reduce a raw message payload to the fields a transcript keeps."""
+    author = payload.get("author") or {}
+    return {
+        "id": payload["id"],
+        "timestamp": payload.get("timestamp"),
+        "author_id": author.get("id"),
+        "author": author.get("global_name") or author.get("username"),
+        "content": payload.get("content", ""),
+        "attachments": [attachment["url"] for attachment in payload.get("attachments", ())],
+        "embeds": len(payload.get("embeds", ())),
+    }
+
+
+def _html_message(record: Dict[str, Any]) -> str:
+    attachments = "".join(
+        f'<a class="attachment" href="{html.escape(url)}">{html.escape(url.rsplit("/", 1)[-1])}</a>'
+        for url in record["attachments"]
+    )
+    return (
+        f'<div class="message" id="m{record["id"]}">'
+        f'<span class="author">{html.escape(record["author"] or "")}</span>'
+        f'<span class="time">{html.escape(record["timestamp"] or "")}</span>'
+        f'<div class="content">{html.escape(record["content"])}</div>'
+        f'{attachments}</div>\n'
+    )
+
+
+def render_page(payloads: List[Dict[str, Any]], level: int = 6) -> Tuple[bytes, bytes]:
+    """Render a page of raw message payloads. Returns (JSONL member, HTML member)."""
+    records = [message_record(payload) for payload in payloads]
+    jsonl = "".join(json.dumps(record, ensure_ascii=False) + "\n" for record in records)
+    rows = "".join(_html_message(record) for record in records)
+    return (
+        gzip.compress(jsonl.encode(), level, mtime=0),
+        gzip.compress(rows.encode(), level, mtime=0)
+    )
+
+
+def render_head(title: str, level: int = 6) -> bytes:
+    """Render the start of the HTML document."""
+    return gzip.compress(_HTML_HEAD.format(title=html.escape(title)).encode(), level, mtime=0)
+
+
+def render_foot(level: int = 6) -> bytes:
+    """Render the end of the HTML document."""
+    return gzip.compress(_HTML_FOOT.encode(), level, mtime=0)
@@ -1,18 +1,50 @@
 """Test script for basic bot functionality."""
 
 import asyncio
+import dataclasses
 import os
+import sqlite3
 import sys
+import time
+import tracemalloc
 from pathlib import Path
+from datetime import datetime, timezone
+from types import SimpleNamespace
 
 # Add src to path for imports
 sys.path.insert(0, str(Path(__file__).parent / "src"))
 
 from src.adapter.discord.ticket.database.models import DatabaseManager
+from src.adapter.discord.ticket.database.migrations import MIGRATIONS
+from src.adapter.discord.ticket.database.write_queue import WriteQueue
+from src.adapter.discord.ticket.repository import ticket_repository
 from src.adapter.discord.ticket.repository.ticket_repository import TicketRepository
+from src.adapter.discord.ticket.repository.bot_settings_repository import BotSettingsRepository
 from src.adapter.discord.ticket.use_case.ticket_service import TicketService
-from src.adapter.discord.ticket.domain.entities import TicketType, GuildSettings, FormQuestion
+from src.adapter.discord.ticket.domain.entities import (
+    TicketType, TicketStatus, GuildSettings, FormQuestion, FormResponse, Ticket, FormSession
+)
 from src.adapter.discord.ticket.config.settings import Settings
+from src.adapter.discord.ticket.utils.rest_scheduler import Priority, RestScheduler
+from src.adapter.discord.ticket.use_case.channel_pool import TicketChannelPool
+from src.adapter.discord.ticket.use_case.deletion_queue import ChannelDeletionQueue
+from src.adapter.discord.ticket.use_case.command_sync import CommandSyncer
+from src.adapter.discord.ticket.use_case.form_sessions import FormSessionStore
+from src.adapter.discord.ticket.use_case.transcripts import TranscriptExporter
+from src.adapter.discord.ticket.use_case.idle_closer import IdleTicketCloser
+from src.adapter.discord.ticket.use_case.activity_tracker import ActivityTracker
+from src.adapter.discord.ticket.use_case.category_resolver import TicketCategoryResolver
+from src.adapter.discord.ticket.use_case.blob_store import BlobStore, parse_blob_url
+from src.adapter.discord.ticket.repository.blob_repository import BlobRepository
+from src.adapter.discord.ticket.utils.member_resolver import MemberResolver
+from src.adapter.discord.ticket.utils.form_dispatcher import FormAnswerDispatcher
+from src.adapter.discord.ticket.utils.form_pages import (
+    check_answer, format_question_spec, paginate, parse_question_spec, parse_questions
+)
+from src.adapter.discord.ticket.repository.command_sync_repository import CommandSyncRepository
+from src.adapter.discord.cluster import (
+    ClusterClient, ClusterHub, ClusterLauncher, aggregate_stats, shard_for_guild, shard_ranges
+)
 
 
 async def test_database_initialization():
@@ -166,6 +198,2055 @@ async def test_service_layer(db_manager):
         return False
 
 
+async def test_connection_pool(db_manager):
+    """Test pooled connections and WAL journaling."""
+    print("\n🔌 Testing connection pool...")
+    
+    repository = TicketRepository(db_manager)
+    
+    try:
+        result = await db_manager.execute_one("PRAGMA journal_mode")
+        if result and result['journal_mode'] == 'wal':
+            print("✅ WAL journal mode enabled")
+        else:
+            print(f"❌ Unexpected journal mode: {result}")
+            return False
+        
+        # Long-lived connections must not leak lastrowid into deletes
+        removed = await repository.remove_ticket_role(123456789, 1)
+        if not removed:
+            print("✅ Delete of missing row reports nothing removed")
+        else:
+            print("❌ Delete of missing row reported a removal")
+            return False
+        
+        await asyncio.gather(*[
+            repository.get_ticket_roles(123456789) for _ in range(20)
+        ])
+        stats = db_manager.stats()
+        if stats['executor']['completed'] > 0 and stats['executor']['queue_depth'] == 0:
+            print(f"✅ Executor stats: {stats['executor']}")
+        else:
+            print(f"❌ Unexpected executor stats: {stats}")
+            return False
+        
+        # A stream stopped early returns its reader; with none idle it fails instead of waiting
+        from contextlib import aclosing
+        pool = db_manager.pool
+        async with aclosing(db_manager.stream("SELECT id FROM tickets", chunk_size=1)) as chunks:
+            async for rows in chunks:
+                break
+        idle, opened = pool._idle_readers.qsize(), len(pool._all_readers)
+        borrowed = [pool.checkout_reader() for _ in range(idle)]
+        try:
+            while len(pool._all_readers) < pool.readers:
+                borrowed.append(pool.checkout_reader())
+            async with aclosing(db_manager.stream("SELECT id FROM tickets")) as chunks:
+                await chunks.__anext__()
+            print("❌ Stream waited for a busy reader")
+            return False
+        except RuntimeError:
+            pass
+        finally:
+            for conn in borrowed:
+                pool.release_reader(conn)
+        if idle == opened and pool._idle_readers.qsize() == pool.readers:
+            print("✅ Streams return their reader when closed early and never wait for one")
+        else:
+            print(f"❌ Reader not returned: {idle} of {opened} idle")
+            return False
+        
+        return True
+        
+    except Exception as e:
+        print(f"❌ Connection pool test failed: {e}")
+        return False
+
+
+async def test_group_commit(db_manager):
+    """Test that concurrent writes are group-committed."""
+    print("\n📦 Testing group commit...")
+    
+    repository = TicketRepository(db_manager)
+    
+    try:
+        before = db_manager.write_queue.stats()
+        tickets = [
+            Ticket(
+                guild_id=555,
+                user_id=1000 + i,
+                channel_id=2000 + i,
+                ticket_type=TicketType.SIMPLE
+            )
+            for i in range(50)
+        ]
+        ticket_ids = await asyncio.gather(*[
+            repository.create_ticket(ticket) for ticket in tickets
+        ])
+        after = db_manager.write_queue.stats()
+        
+        if len(set(ticket_ids)) == len(tickets) and all(ticket_ids):
+            print("✅ Each caller received its own ticket ID")
+        else:
+            print(f"❌ Ticket IDs not unique: {ticket_ids}")
+            return False
+        
+        batches = after['batches'] - before['batches']
+        if batches < len(tickets):
+            print(f"✅ {len(tickets)} writes committed in {batches} transaction(s)")
+        else:
+            print(f"❌ Writes were not grouped ({batches} transactions)")
+            return False
+        
+        # A failing statement must not roll back its neighbours
+        results = await asyncio.gather(
+            db_manager.execute_write("INSERT INTO missing_table VALUES (1)"),
+            repository.add_ticket_role(555, 777),
+            return_exceptions=True
+        )
+        roles = await repository.get_ticket_roles(555)
+        if isinstance(results[0], Exception) and any(r.role_id == 777 for r in roles):
+            print("✅ Failed write isolated from the rest of the batch")
+        else:
+            print(f"❌ Failed write affected the batch: {results}")
+            return False
+        
+        # Submitters block once max_pending writes are queued or in flight
+        queue = WriteQueue(db_manager.pool, db_manager.executor, max_batch=2, max_latency=0, max_pending=2)
+        seen = []
+        
+        def slow_job(conn):
+            seen.append(queue.stats()['outstanding'])
+            time.sleep(0.01)
+            return conn.execute("SELECT 1").fetchone()[0]
+        
+        results = await asyncio.gather(*[queue.submit(slow_job) for _ in range(10)])
+        stats = queue.stats()
+        if results == [1] * 10 and max(seen) <= 2 and stats['blocked_submits'] > 0 and stats['outstanding'] == 0:
+            print(f"✅ Backpressure held outstanding writes at 2 ({stats['blocked_submits']} submit(s) waited)")
+        else:
+            print(f"❌ Backpressure did not apply: {seen}, {stats}")
+            return False
+        
+        return True
+        
+    except Exception as e:
+        print(f"❌ Group commit test failed: {e}")
+        return False
+
+
+async def test_bulk_writes(db_manager):
+    """Test bulk writes run in a single transaction."""
+    print("\n📚 Testing bulk writes...")
+    
+    repository = TicketRepository(db_manager)
+    test_guild_id = 666
+    
+    try:
+        questions = [FormQuestion(order=i + 1, text=f"Question {i + 1}") for i in range(10)]
+        before = db_manager.write_queue.stats()['batches']
+        await repository.save_form_questions(test_guild_id, questions)
+        batches = db_manager.write_queue.stats()['batches'] - before
+        
+        if batches == 1:
+            print("✅ 10 form questions saved in one commit")
+        else:
+            print(f"❌ Form questions took {batches} commits")
+            return False
+        
+        # A failing batch must leave the previous question set untouched
+        try:
+            await db_manager.execute_batch([
+                ("DELETE FROM form_questions WHERE guild_id = ?", (test_guild_id,)),
+                ("INSERT INTO missing_table VALUES (?)", (1,))
+            ])
+            print("❌ Failing batch did not raise")
+            return False
+        except Exception:
+            pass
+        
+        remaining = await repository.get_form_questions(test_guild_id)
+        if len(remaining) == 10:
+            print("✅ Failed batch rolled back atomically")
+        else:
+            print(f"❌ Failed batch left {len(remaining)} questions")
+            return False
+        
+        return True
+        
+    except Exception as e:
+        print(f"❌ Bulk write test failed: {e}")
+        return False
+
+
+async def test_migrations(db_manager):
+    """Test schema versioning and unique indexes."""
+    print("\n🗂️ Testing migrations...")
+    
+    import tempfile
+    
+    repository = TicketRepository(db_manager)
+    
+    try:
+        result = await db_manager.execute_one("SELECT MAX(version) AS version FROM schema_version")
+        latest = max(m.version for m in MIGRATIONS)
+        if result and result['version'] == latest:
+            print(f"✅ Schema at version {latest}")
+        else:
+            print(f"❌ Schema version {result} != {latest}")
+            return False
+        
+        applied = await db_manager.migrate()
+        if not applied:
+            print("✅ Re-running migrations is a no-op")
+        else:
+            print(f"❌ Migrations re-applied: {applied}")
+            return False
+        
+        # Two clusters migrating a fresh database: the second read its version before the first finished
+        from src.adapter.discord.ticket.database import migrations
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "fresh.db")
+            first, second = (sqlite3.connect(path, timeout=5, isolation_level=None) for _ in range(2))
+            get_schema_version = migrations.get_schema_version
+            
+            def racing_version(conn):
+                version = get_schema_version(conn)
+                if conn is second and migrations.get_schema_version is racing_version:
+                    migrations.get_schema_version = get_schema_version
+                    migrations.apply_migrations(first)
+                return version
+            
+            migrations.get_schema_version = racing_version
+            try:
+                applied = migrations.apply_migrations(second)
+                versions = [row[0] for row in second.execute("SELECT version FROM schema_version ORDER BY version")]
+            finally:
+                migrations.get_schema_version = get_schema_version
+                first.close()
+                second.close()
+        if not applied and versions == sorted(m.version for m in MIGRATIONS):
+            print("✅ Concurrent migrations skip steps another process applied")
+        else:
+            print(f"❌ Concurrent migration replayed {applied}: {versions}")
+            return False
+        
+        await repository.add_ticket_role(777, 888)
+        await repository.add_ticket_role(777, 888)
+        roles = await repository.get_ticket_roles(777)
+        if len(roles) == 1:
+            print("✅ Duplicate ticket role ignored")
+        else:
+            print(f"❌ Duplicate ticket role stored ({len(roles)} rows)")
+            return False
+        
+        plan = await db_manager.execute(
+            "EXPLAIN QUERY PLAN SELECT * FROM tickets WHERE channel_id = ?", (1,)
+        )
+        if any('idx_tickets_channel' in row['detail'] for row in plan):
+            print("✅ Channel lookup uses index")
+        else:
+            print(f"❌ Channel lookup does not use index: {plan}")
+            return False
+        
+        return True
+        
+    except Exception as e:
+        print(f"❌ Migration test failed: {e}")
+        return False
+
+
+async def test_unit_of_work(db_manager):
+    """Test repository operations sharing one transaction."""
+    print("\n🧾 Testing unit of work...")
+    
+    repository = TicketRepository(db_manager)
+    service = TicketService(repository)
+    guild = SimpleNamespace(id=888)
+    user = SimpleNamespace(id=999)
+    settings = GuildSettings(guild_id=888, ticket_type=TicketType.FORM, target_channel_id=31337)
+    responses = [
+        FormResponse(question_order=i + 1, question_text=f"Q{i + 1}", response_text=f"A{i + 1}")
+        for i in range(3)
+    ]
+    
+    try:
+        before = db_manager.write_queue.stats()['batches']
+        ticket = await service.create_form_ticket(guild, user, settings, responses)
+        batches = db_manager.write_queue.stats()['batches'] - before
+        
+        saved = await repository.get_form_responses(ticket.id)
+        if ticket.id and len(saved) == 3 and batches == 1:
+            print("✅ Form ticket and responses created in one commit")
+        else:
+            print(f"❌ Form ticket creation not atomic ({len(saved)} responses, {batches} commits)")
+            return False
+        
+        # Nothing is written when the block raises
+        try:
+            async with repository.transaction() as tx:
+                tx.create_ticket(Ticket(guild_id=888, user_id=1, channel_id=424242, ticket_type=TicketType.SIMPLE))
+                raise RuntimeError("abort")
+        except RuntimeError:
+            pass
+        
+        if await repository.get_ticket_by_channel(424242) is None:
+            print("✅ Aborted transaction wrote nothing")
+        else:
+            print("❌ Aborted transaction was committed")
+            return False
+        
+        closes = await asyncio.gather(*[service.close_ticket(31337) for _ in range(5)])
+        if sum(1 for closed in closes if closed) == 1:
+            print("✅ Concurrent closes resolved to a single close")
+        else:
+            print(f"❌ Ticket closed {sum(1 for closed in closes if closed)} times")
+            return False
+        
+        return True
+        
+    except Exception as e:
+        print(f"❌ Unit of work test failed: {e}")
+        return False
+
+
+async def test_bot_settings_store(db_manager):
+    """Test the cached per-guild bot settings store."""
+    print("\n🧩 Testing bot settings store...")
+    
+    store = BotSettingsRepository(db_manager)
+    
+    try:
+        await store.save_settings(BotSettingsRepository.DEFAULTS_GUILD_ID, welcome_message="Default")
+        await store.save_settings(1001, ticket_type="form")
+        await store.load_all()
+        
+        misses = store.misses
+        first = await store.get_settings(1001)
+        other = await store.get_settings(1002)
+        if store.misses == misses:
+            print("✅ Warm cache answered without database access")
+        else:
+            print(f"❌ Warm cache missed {store.misses - misses} time(s)")
+            return False
+        
+        if first == {"welcome_message": "Default", "ticket_type": "form"} and other == {"welcome_message": "Default"}:
+            print("✅ Guild settings override shared defaults")
+        else:
+            print(f"❌ Unexpected settings: {first}, {other}")
+            return False
+        
+        await store.save_settings(1002, welcome_message="Hello")
+        fresh = BotSettingsRepository(db_manager)
+        if (await store.get_settings(1002))["welcome_message"] == "Hello" and \
+                (await fresh.get_settings(1002))["welcome_message"] == "Hello":
+            print("✅ Writes go through to cache and database")
+        else:
+            print("❌ Written setting not visible")
+            return False
+        
+        # A load that overlaps an invalidation must not cache what it read
+        cold = BotSettingsRepository(db_manager)
+        load = asyncio.create_task(cold.get_settings(1003))
+        await asyncio.sleep(0)
+        cold.invalidate(1003)
+        await load
+        if 1003 not in cold._cache:
+            print("✅ Loads racing an invalidation are not cached")
+        else:
+            print("❌ Stale load cached after invalidation")
+            return False
+        
+        return True
+        
+    except Exception as e:
+        print(f"❌ Bot settings store test failed: {e}")
+        return False
+
+
+async def test_guild_config_cache(db_manager):
+    """Test the guild configuration bundle cache."""
+    print("\n🗃️ Testing guild config cache...")
+    
+    repository = TicketRepository(db_manager)
+    service = TicketService(repository)
+    test_guild_id = 4242
+    
+    try:
+        await service.setup_guild_settings(test_guild_id, TicketType.SIMPLE, "Hi")
+        await service.add_ticket_role(test_guild_id, 11)
+        
+        completed = db_manager.executor.stats()['completed']
+        await service.get_guild_settings(test_guild_id)
+        await service.get_ticket_roles(test_guild_id)
+        await service.get_form_questions(test_guild_id)
+        await service.is_co_owner(test_guild_id, 1)
+        hops = db_manager.executor.stats()['completed'] - completed
+        
+        if hops == 1:
+            print("✅ Guild config loaded in one round trip")
+        else:
+            print(f"❌ Guild config took {hops} round trips")
+            return False
+        
+        stats = service.cache_stats()
+        if stats['hits'] == 3 and stats['misses'] == 1:
+            print(f"✅ Cache counters: {stats['hits']} hits, {stats['misses']} miss")
+        else:
+            print(f"❌ Unexpected cache counters: {stats}")
+            return False
+        
+        await service.add_co_owner(test_guild_id, 77, 1)
+        if await service.is_co_owner(test_guild_id, 77):
+            print("✅ Mutations invalidate the cached bundle")
+        else:
+            print("❌ Stale guild config after mutation")
+            return False
+        
+        service.invalidate_guild_config(test_guild_id)
+        load = asyncio.create_task(service.get_guild_config(test_guild_id))
+        await asyncio.sleep(0)
+        service.invalidate_guild_config(test_guild_id)
+        await load
+        if test_guild_id not in service._config_cache:
+            print("✅ Config loaded before an invalidation is not cached")
+        else:
+            print("❌ Stale guild config cached after invalidation")
+            return False
+        
+        return True
+        
+    except Exception as e:
+        print(f"❌ Guild config cache test failed: {e}")
+        return False
+
+
+async def test_authorization(db_manager):
+    """Test in-memory permission checks."""
+    print("\n🔐 Testing authorization...")
+    
+    repository = TicketRepository(db_manager)
+    service = TicketService(repository)
+    test_guild_id = 5151
+    guild = SimpleNamespace(id=test_guild_id, owner_id=1)
+    
+    def member(user_id, *role_ids):
+        return SimpleNamespace(id=user_id, roles=[SimpleNamespace(id=r) for r in role_ids])
+    
+    try:
+        await service.add_ticket_role(test_guild_id, 500)
+        await service.add_co_owner(test_guild_id, 2, 1)
+        ticket = Ticket(guild_id=test_guild_id, user_id=3, channel_id=1, ticket_type=TicketType.SIMPLE)
+        
+        checks = [
+            ("owner", await service.can_manage(guild, member(1)), True),
+            ("co-owner", await service.can_manage(guild, member(2)), True),
+            ("staff without ticket", await service.can_manage(guild, member(4, 500)), False),
+            ("staff on ticket", await service.can_manage(guild, member(4, 9, 500), ticket), True),
+            ("ticket creator", await service.can_manage(guild, member(3), ticket), True),
+            ("stranger", await service.can_manage(guild, member(5, 9), ticket), False),
+        ]
+        
+        failed = [name for name, actual, expected in checks if actual != expected]
+        if not failed:
+            print("✅ Permission decisions match expectations")
+        else:
+            print(f"❌ Wrong permission decision for: {', '.join(failed)}")
+            return False
+        
+        await service.remove_ticket_role(test_guild_id, 500)
+        if not await service.can_manage(guild, member(4, 500), ticket):
+            print("✅ Role removal invalidates the authorization index")
+        else:
+            print("❌ Removed role still grants access")
+            return False
+        
+        return True
+        
+    except Exception as e:
+        print(f"❌ Authorization test failed: {e}")
+        return False
+
+
+async def test_ticket_index(db_manager):
+    """Test the in-memory open ticket index."""
+    print("\n🗂️ Testing open ticket index...")
+    
+    repository = TicketRepository(db_manager)
+    test_guild_id = 6161
+    
+    try:
+        for user_id in range(1, 6):
+            await repository.create_ticket(Ticket(
+                guild_id=test_guild_id, user_id=user_id,
+                channel_id=616100 + user_id, ticket_type=TicketType.SIMPLE
+            ))
+        await repository.create_ticket(Ticket(
+            guild_id=test_guild_id, user_id=9, channel_id=616199, ticket_type=TicketType.FORM
+        ))
+        
+        service = TicketService(repository)
+        loaded = await service.load_ticket_index()
+        entry = service.ticket_index.get_by_channel(616103)
+        if loaded >= 5 and entry and entry[2] == 3 and 616199 not in service.ticket_index:
+            print(f"✅ Streamed {loaded} open channel tickets into the index")
+        else:
+            print("❌ Index was not loaded correctly")
+            return False
+        
+        ticket = await service.get_open_ticket(test_guild_id, 4)
+        if ticket and ticket.channel_id == 616104:
+            print("✅ Open ticket found by guild and user")
+        else:
+            print("❌ Lookup by guild and user failed")
+            return False
+        
+        await service.close_ticket(616102)
+        if 616102 not in service.ticket_index and await service.get_open_ticket(test_guild_id, 2) is None:
+            print("✅ Closing removes the ticket from the index")
+        else:
+            print("❌ Closed ticket still indexed")
+            return False
+        
+        created = await service.register_channel_ticket(test_guild_id, 7, 616107)
+        indexed = await service.get_ticket_by_channel(616107)
+        if indexed and indexed.id == created.id:
+            print("✅ New tickets are indexed on creation")
+        else:
+            print("❌ New ticket missing from the index")
+            return False
+        
+        # A ticket written behind the service's back is found in the database
+        service.ticket_index.remove(616105)
+        fallback = await service.get_ticket_by_channel(616105)
+        if fallback and fallback.user_id == 5 and 616105 in service.ticket_index:
+            print("✅ Index misses fall back to the database")
+        else:
+            print("❌ Database fallback failed")
+            return False
+        
+        return True
+        
+    except Exception as e:
+        print(f"❌ Ticket index test failed: {e}")
+        return False
+
+
+def _unslotted(cls):
+    """Rebuild an entity as a plain dataclass, as entities were before slots."""
+    return dataclasses.make_dataclass(cls.__name__, [
+        (f.name, f.type, dataclasses.field(default=f.default, default_factory=f.default_factory))
+        for f in dataclasses.fields(cls)
+    ])
+
+
+def _measure_mapping(mapper, rows):
+    """Map rows and return (µs per row, allocated blocks per row, bytes per row)."""
+    started = time.perf_counter()
+    for row in rows:
+        mapper(row)
+    seconds = time.perf_counter() - started
+    
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    mapped = [mapper(row) for row in rows]
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    
+    diff = after.compare_to(before, 'filename')
+    blocks = sum(stat.count_diff for stat in diff)
+    size = sum(stat.size_diff for stat in diff)
+    del mapped
+    return seconds / len(rows) * 1_000_000, blocks / len(rows), size / len(rows)
+
+
+async def test_row_mapping():
+    """Micro-benchmark entity row mapping before and after slotted entities."""
+    print("\n🧮 Testing row mapping...")
+    
+    row_count = 20000
+    conn = sqlite3.connect(":memory:")
+    try:
+        conn.executescript("""
+            CREATE TABLE tickets (id INTEGER PRIMARY KEY, guild_id INTEGER, user_id INTEGER,
+                channel_id INTEGER, ticket_type TEXT, status TEXT);
+            CREATE TABLE form_responses (id INTEGER PRIMARY KEY, question_order INTEGER,
+                question_text TEXT, response_text TEXT);
+            CREATE TABLE guild_settings (guild_id INTEGER PRIMARY KEY, ticket_type TEXT,
+                welcome_message TEXT, target_channel_id INTEGER);
+        """)
+        conn.executemany(
+            "INSERT INTO tickets VALUES (?, ?, ?, ?, ?, ?)",
+            [(i, 10**17 + i, 10**17 + i, 10**18 + i, 'simple' if i % 2 else 'form',
+              'open' if i % 3 else 'closed') for i in range(1, row_count + 1)]
+        )
+        conn.executemany(
+            "INSERT INTO form_responses VALUES (?, ?, ?, ?)",
+            [(i, i % 10, 'What is your question?', 'An answer') for i in range(1, row_count + 1)]
+        )
+        conn.executemany(
+            "INSERT INTO guild_settings VALUES (?, ?, ?, ?)",
+            [(10**17 + i, 'form', 'Welcome!', 10**18 + i) for i in range(1, row_count + 1)]
+        )
+        
+        legacy_ticket = _unslotted(Ticket)
+        legacy_response = _unslotted(FormResponse)
+        legacy_settings = _unslotted(GuildSettings)
+        
+        cases = [
+            (
+                "Ticket", "tickets", ticket_repository.TICKET_COLUMNS,
+                lambda r: legacy_ticket(
+                    id=r['id'], guild_id=r['guild_id'], user_id=r['user_id'],
+                    channel_id=r['channel_id'], ticket_type=TicketType(r['ticket_type']),
+                    status=TicketStatus(r['status'])
+                ),
+                ticket_repository._ticket_from_row
+            ),
+            (
+                "FormResponse", "form_responses", ticket_repository.FORM_RESPONSE_COLUMNS,
+                lambda r: legacy_response(
+                    id=r['id'], question_order=r['question_order'],
+                    question_text=r['question_text'], response_text=r['response_text']
+                ),
+                ticket_repository._form_response_from_row
+            ),
+            (
+                "GuildSettings", "guild_settings", ticket_repository.GUILD_SETTINGS_COLUMNS,
+                lambda r: legacy_settings(
+                    guild_id=r['guild_id'], ticket_type=TicketType(r['ticket_type']),
+                    welcome_message=r['welcome_message'], target_channel_id=r['target_channel_id']
+                ),
+                ticket_repository._guild_settings_from_row
+            ),
+        ]
+        
+        all_smaller = True
+        for name, table, columns, legacy_mapper, mapper in cases:
+            conn.row_factory = sqlite3.Row
+            dict_rows = [dict(row) for row in conn.execute(f"SELECT * FROM {table}")]
+            conn.row_factory = None
+            tuple_rows = conn.execute(f"SELECT {columns} FROM {table}").fetchall()
+            
+            if dataclasses.astuple(legacy_mapper(dict_rows[0])) != dataclasses.astuple(mapper(tuple_rows[0])):
+                print(f"❌ {name} mappers disagree")
+                return False
+            
+            old_us, old_blocks, old_bytes = _measure_mapping(legacy_mapper, dict_rows)
+            new_us, new_blocks, new_bytes = _measure_mapping(mapper, tuple_rows)
+            print(f"✅ {name}: {old_us:.2f} → {new_us:.2f} µs/row, "
+                  f"{old_blocks:.1f} → {new_blocks:.1f} allocations/row, "
+                  f"{old_bytes:.0f} → {new_bytes:.0f} bytes/row")
+            all_smaller = all_smaller and new_bytes < old_bytes
+        
+        if not all_smaller:
+            print("❌ Slotted entities did not reduce memory per row")
+            return False
+        return True
+        
+    except Exception as e:
+        print(f"❌ Row mapping test failed: {e}")
+        return False
+    finally:
+        conn.close()
+
+
+async def test_rest_scheduler():
+    """Test priorities, coalescing and rate limit handling of the REST scheduler."""
+    print("\n🚦 Testing REST scheduler...")
+    
+    import discord
+    
+    scheduler = RestScheduler(global_rate=1)
+    order = []
+    
+    def call(name):
+        async def _call():
+            order.append(name)
+            return name
+        return _call
+    
+    try:
+        # One global token per second: the first call spends it, the rest queue
+        first = asyncio.create_task(scheduler.run('message', 1, call("first"), Priority.USER))
+        await asyncio.sleep(0.05)
+        background = asyncio.create_task(scheduler.run('channel_delete', 2, call("delete"), Priority.BACKGROUND))
+        user = asyncio.create_task(scheduler.run('message', 3, call("user"), Priority.USER))
+        ack = asyncio.create_task(scheduler.run('interaction', 4, call("ack"), Priority.INTERACTION))
+        await asyncio.gather(first, background, user, ack)
+        
+        if order == ["first", "ack", "user", "delete"]:
+            print("✅ User-facing calls run ahead of background work")
+        else:
+            print(f"❌ Unexpected call order: {order}")
+            return False
+        
+        edits = []
+        
+        class FakeChannel:
+            id = 99
+            
+            async def edit(self, **fields):
+                edits.append(fields)
+        
+        channel = FakeChannel()
+        # Spend the remaining global token so the edits queue up together
+        blocker = asyncio.create_task(scheduler.run('message', 5, call("blocker")))
+        await asyncio.sleep(0)
+        await asyncio.gather(
+            blocker,
+            scheduler.edit_channel(channel, name="a"),
+            scheduler.edit_channel(channel, topic="t"),
+            scheduler.edit_channel(channel, name="b"),
+        )
+        if edits == [{"name": "b", "topic": "t"}] and scheduler.stats()['coalesced'] == 2:
+            print("✅ Queued edits are coalesced into one request")
+        else:
+            print(f"❌ Edits were not coalesced: {edits}")
+            return False
+        
+        attempts = []
+        
+        async def limited():
+            attempts.append(1)
+            if len(attempts) == 1:
+                raise discord.RateLimited(0.1)
+            return "ok"
+        
+        result = await scheduler.run('interaction', 6, limited, Priority.INTERACTION)
+        stats = scheduler.stats()
+        if result == "ok" and len(attempts) == 2 and stats['rate_limited'] == 1:
+            print("✅ Rate limited calls are retried after the bucket reopens")
+        else:
+            print("❌ Rate limited call was not retried")
+            return False
+        
+        # A rate limited edit keeps its fields for the retry
+        edits.clear()
+        limited_edits = []
+        
+        class LimitedMessage:
+            id = 97
+            channel = SimpleNamespace(id=98)
+            
+            async def edit(self, **fields):
+                limited_edits.append(fields)
+                if len(limited_edits) == 1:
+                    raise discord.RateLimited(0.1)
+                edits.append(fields)
+                return "edited"
+        
+        result = await scheduler.edit_message(LimitedMessage(), content="updated")
+        if result == "edited" and edits == [{"content": "updated"}] and len(limited_edits) == 2:
+            print("✅ Rate limited edits are sent on retry")
+        else:
+            print(f"❌ Rate limited edit was lost: {result}, {limited_edits}")
+            return False
+        stats = scheduler.stats()
+        
+        if stats['queue_depth'] == 0 and stats['executed'] == 8 and stats['max_wait_ms'] > 0:
+            print(f"✅ Metrics: avg wait {stats['avg_wait_ms']:.0f} ms, max wait {stats['max_wait_ms']:.0f} ms")
+        else:
+            print(f"❌ Unexpected metrics: {stats}")
+            return False
+        
+        return True
+        
+    except Exception as e:
+        print(f"❌ REST scheduler test failed: {e}")
+        return False
+    finally:
+        await scheduler.close()
+
+
+class FakeChannel:
+    """Minimal stand-in for a guild text channel."""
+    
+    def __init__(self, guild, channel_id, name, overwrites):
+        self.guild = guild
+        self.id = channel_id
+        self.name = name
+        self.overwrites = overwrites
+    
+    def overwrites_for(self, target):
+        import discord
+        return self.overwrites.get(target, discord.PermissionOverwrite())
+    
+    async def edit(self, name=None, overwrites=None, reason=None):
+        self.guild.edits += 1
+        self.name = name or self.name
+        self.overwrites = overwrites if overwrites is not None else self.overwrites
+        return self
+    
+    async def delete(self, reason=None):
+        del self.guild.channels[self.id]
+
+
+class FakeGuild:
+    """Minimal stand-in for a guild that can create channels."""
+    
+    def __init__(self, guild_id):
+        self.id = guild_id
+        self.default_role = object()
+        self.me = object()
+        self.categories = []
+        self.channels = {}
+        self.created = 0
+        self.edits = 0
+        self.member_ids = set()
+        self.fetched = 0
+    
+    @property
+    def text_channels(self):
+        return list(self.channels.values())
+    
+    def get_channel(self, channel_id):
+        return self.channels.get(channel_id)
+    
+    def add_channel(self, name, overwrites):
+        channel = FakeChannel(self, self.id * 1000 + len(self.channels) + 1, name, overwrites)
+        self.channels[channel.id] = channel
+        return channel
+    
+    async def create_text_channel(self, name, overwrites=None, category=None, reason=None):
+        self.created += 1
+        return self.add_channel(name, overwrites or {})
+    
+    def get_member(self, user_id):
+        return None  # Nothing is cached, as with the lean gateway profile
+    
+    async def fetch_member(self, user_id):
+        import discord
+        self.fetched += 1
+        if user_id not in self.member_ids:
+            raise discord.NotFound(SimpleNamespace(status=404, reason="Not Found"), "Unknown Member")
+        return SimpleNamespace(id=user_id, guild=self, display_name=f"user-{user_id}")
+
+
+async def test_channel_pool():
+    """Test the warm pool of hidden ticket channels."""
+    print("\n🏊 Testing ticket channel pool...")
+    
+    import discord
+    
+    rest = RestScheduler(global_rate=50)
+    pool = TicketChannelPool(rest, size=2, refill_interval=0)
+    guild = FakeGuild(7171)
+    prefix = Settings.TICKET_POOL_CHANNEL_PREFIX
+    hidden = {guild.default_role: discord.PermissionOverwrite(view_channel=False)}
+    
+    try:
+        # Three leftovers from a previous run, one of which was made visible
+        for suffix in ("a", "b", "c"):
+            guild.add_channel(f"{prefix}{suffix}", dict(hidden))
+        visible = guild.add_channel(f"{prefix}d", {})
+        
+        await pool.start([guild])
+        stats = pool.stats()
+        if stats['adopted'] == 2 and stats['removed'] == 1 and visible.id in guild.channels:
+            print("✅ Orphaned pool channels are adopted or removed at startup")
+        else:
+            print(f"❌ Unexpected reconcile result: {stats}")
+            return False
+        
+        member = object()
+        overwrites = {
+            guild.default_role: discord.PermissionOverwrite(view_channel=False),
+            member: discord.PermissionOverwrite(view_channel=True)
+        }
+        channel = await pool.claim(guild, "ticket-alice", overwrites)
+        if channel and channel.name == "ticket-alice" and member in channel.overwrites and guild.edits == 1:
+            print("✅ Claiming renames a pooled channel with one edit")
+        else:
+            print("❌ Claim did not reuse a pooled channel")
+            return False
+        
+        for _ in range(50):
+            if pool.pooled(guild.id) == 2:
+                break
+            await asyncio.sleep(0.01)
+        if pool.pooled(guild.id) == 2 and guild.created == 1:
+            print("✅ Refiller tops the pool back up")
+        else:
+            print(f"❌ Pool was not refilled: {pool.pooled(guild.id)} channels")
+            return False
+        
+        # An edit that was not applied must not hand out the hidden channel
+        unedited = guild.get_channel(pool._pools[guild.id][0])
+        
+        async def lost_edit(**fields):
+            return None
+        
+        unedited.edit = lost_edit
+        removed = pool.stats()['removed']
+        channel = await pool.claim(guild, "ticket-carol", overwrites)
+        for _ in range(50):
+            if pool.stats()['removed'] > removed:
+                break
+            await asyncio.sleep(0.01)
+        if (channel is not None and channel is not unedited and channel.name == "ticket-carol"
+                and guild.get_channel(unedited.id) is not unedited and pool.stats()['removed'] == removed + 1):
+            print("✅ Claims whose edit was not applied move on to the next channel and delete the failed one")
+        else:
+            print(f"❌ Unedited pooled channel handed out: {channel and channel.name}")
+            return False
+        
+        empty_guild = FakeGuild(7272)
+        pool.forget(empty_guild.id)
+        if await pool.claim(empty_guild, "ticket-bob", overwrites) is None:
+            print("✅ Empty pools fall back to channel creation")
+        else:
+            print("❌ Claim from an empty pool returned a channel")
+            return False
+        
+        stats = pool.stats()
+        print(f"✅ Pool metrics: {stats['claims']} claims, {stats['misses']} misses, "
+              f"avg claim {stats['avg_claim_ms']:.1f} ms")
+        return True
+        
+    except Exception as e:
+        print(f"❌ Channel pool test failed: {e}")
+        return False
+    finally:
+        await pool.close()
+        await rest.close()
+
+
+async def test_deletion_queue(db_manager):
+    """Test the durable delayed channel deletion queue."""
+    print("\n🗑️ Testing channel deletion queue...")
+    
+    repository = TicketRepository(db_manager)
+    rest = RestScheduler(global_rate=50)
+    
+    class FakeHttp:
+        def __init__(self):
+            self.deleted = []
+        
+        async def delete_channel(self, channel_id, reason=None):
+            if channel_id == 8103:
+                raise RuntimeError("Missing access")
+            self.deleted.append(channel_id)
+    
+    http = FakeHttp()
+    queue = ChannelDeletionQueue(repository, rest, http, max_attempts=1)
+    
+    try:
+        await queue.start()
+        started = asyncio.get_running_loop().time()
+        await queue.schedule(8101, 1, delay=0.05, reason="closed")
+        await queue.schedule(8102, 1, delay=60, reason="closed")
+        if asyncio.get_running_loop().time() - started < 0.5:
+            print("✅ Scheduling returns without waiting for the delay")
+        else:
+            print("❌ Scheduling blocked the caller")
+            return False
+        
+        await asyncio.sleep(0.3)
+        stored = [row[0] for row in await repository.get_channel_deletions()]
+        if http.deleted == [8101] and stored == [8102]:
+            print("✅ Due channels are deleted and removed from storage")
+        else:
+            print(f"❌ Unexpected state: deleted {http.deleted}, stored {stored}")
+            return False
+        
+        # Simulate a restart: a new queue picks up the stored job
+        await queue.close()
+        queue = ChannelDeletionQueue(repository, rest, http, max_attempts=1)
+        resumed = await queue.start()
+        if resumed == 1 and 8102 in queue:
+            print("✅ Pending deletions resume after a restart")
+        else:
+            print("❌ Pending deletion was lost on restart")
+            return False
+        
+        await queue.schedule(8102, 1, delay=0)
+        await queue.schedule(8103, 1, delay=0)
+        await asyncio.sleep(0.2)
+        stats = queue.stats()
+        if 8102 in http.deleted and stats['failed'] == 1 and not await repository.get_channel_deletions():
+            print(f"✅ Failed deletions are dropped after {queue.max_attempts} attempt(s)")
+        else:
+            print(f"❌ Unexpected queue stats: {stats}")
+            return False
+        
+        # A batch that fails on storage is retried instead of stranded
+        remove = repository.remove_channel_deletions
+        calls = []
+        
+        async def failing_remove(channel_ids):
+            calls.append(list(channel_ids))
+            if len(calls) == 1:
+                raise sqlite3.OperationalError("database is locked")
+            await remove(channel_ids)
+        
+        repository.remove_channel_deletions = failing_remove
+        await queue.schedule(8104, 1, delay=0)
+        await asyncio.sleep(1.5)
+        repository.remove_channel_deletions = remove
+        if (len(calls) == 2 and queue.stats()['batch_failures'] == 1
+                and 8104 not in queue and not await repository.get_channel_deletions()):
+            print("✅ Failed batches are pushed back with a backoff")
+        else:
+            print(f"❌ Failed batch was stranded: {calls}, {queue.stats()}")
+            return False
+        
+        return True
+        
+    except Exception as e:
+        print(f"❌ Deletion queue test failed: {e}")
+        return False
+    finally:
+        await queue.close()
+        await rest.close()
+
+
+async def test_persistent_views():
+    """Test that ticket buttons are routed by custom_id without per-message views."""
+    print("\n🔘 Testing persistent ticket buttons...")
+    
+    from discord.ui.view import ViewStore
+    from src.adapter.discord.ticket.cogs.ticket_commands import (
+        TicketCloseButton, TicketCloseView, TicketCreateView, TicketFormView, CloseTicketView
+    )
+    
+    try:
+        store = ViewStore(None)
+        for ticket_id in range(1000):
+            store.add_view(TicketCloseView(ticket_id), message_id=900_000 + ticket_id)
+        for view in (TicketCreateView(), TicketFormView(), CloseTicketView()):
+            store.add_view(view, message_id=1)
+        
+        if not store.persistent_views and len(store._dynamic_items) == 4:
+            print("✅ 1000 ticket close buttons keep no View objects alive")
+        else:
+            print("❌ Views are stored per message")
+            return False
+        
+        item = TicketCloseView(4242).children[0]
+        match = TicketCloseButton.__discord_ui_compiled_template__.fullmatch(item.custom_id)
+        restored = await TicketCloseButton.from_custom_id(None, item.item, match)
+        if restored.ticket_id == 4242:
+            print("✅ Ticket id round-trips through the custom_id")
+        else:
+            print("❌ Ticket id was not restored from the custom_id")
+            return False
+        
+        return True
+        
+    except Exception as e:
+        print(f"❌ Persistent views test failed: {e}")
+        return False
+
+
+async def test_command_sync(db_manager):
+    """Test that command sync is skipped while the command tree is unchanged."""
+    print("\n🔄 Testing command sync diffing...")
+    
+    import discord
+    from discord import app_commands
+    
+    client = discord.Client(intents=discord.Intents.none(), application_id=4242)
+    tree = app_commands.CommandTree(client)
+    
+    @tree.command(name="ping", description="Ping")
+    async def ping(interaction: discord.Interaction):
+        pass
+    
+    uploads = []
+    
+    async def fake_sync(*, guild=None):
+        uploads.append(guild.id if guild else None)
+        return tree.get_commands(guild=guild)
+    
+    tree.sync = fake_sync
+    syncer = CommandSyncer(tree, CommandSyncRepository(db_manager))
+    
+    try:
+        first = await syncer.sync_all()
+        second = await syncer.sync_all()
+        if first[0].synced and not second[0].synced and uploads == [None]:
+            print("✅ Unchanged command tree is not synced again")
+        else:
+            print(f"❌ Unexpected uploads: {uploads}")
+            return False
+        
+        @tree.command(name="pong", description="Pong")
+        async def pong(interaction: discord.Interaction):
+            pass
+        
+        changed = await syncer.sync_all()
+        if changed[0].synced and changed[0].command_count == 2 and uploads == [None, None]:
+            print("✅ Changed command tree is synced")
+        else:
+            print(f"❌ Changed tree was not synced: {uploads}")
+            return False
+        
+        staging = await syncer.sync_all([1001, 1002])
+        again = await syncer.sync_all([1001, 1002])
+        if uploads[2:] == [1001, 1002] and all(r.synced for r in staging) and not any(r.synced for r in again):
+            print("✅ Staging guilds are synced once each, without a global sync")
+        else:
+            print(f"❌ Unexpected staging uploads: {uploads}")
+            return False
+        
+        stats = syncer.stats()
+        print(f"✅ Sync stats: {stats['synced']} synced, {stats['skipped']} skipped")
+        return True
+        
+    except Exception as e:
+        print(f"❌ Command sync test failed: {e}")
+        return False
+
+
+# Guilds the fake gateway hands out to whichever cluster owns their shard
+FAKE_GATEWAY_GUILDS = [(n << 22) + n for n in range(1, 201)]
+
+
+def fake_gateway_cluster(token, cluster_id, shard_ids, shard_count, cluster_count, conn):
+    """Cluster process entry point that connects to a fake gateway instead of Discord."""
+    async def run():
+        client = ClusterClient(conn, cluster_id, cluster_count)
+        guilds = [g for g in FAKE_GATEWAY_GUILDS if shard_for_guild(g, shard_count) in shard_ids]
+        stopped = asyncio.Event()
+        client.stats_provider = lambda: {
+            'shards': len(shard_ids),
+            'guilds': len(guilds),
+            'misplaced': sum(1 for g in guilds if shard_for_guild(g, shard_count) not in shard_ids)
+        }
+        client.on_shutdown = stopped.set
+        client.start()
+        await stopped.wait()
+        client.close()
+    
+    asyncio.run(run())
+
+
+async def test_cluster(db_manager):
+    """Test shard ranges, cluster IPC and the launcher against a fake gateway."""
+    print("\n🧩 Testing cluster launcher...")
+    
+    import multiprocessing
+    
+    hub = ClusterHub(stats_timeout=2.0)
+    clients = []
+    launcher = None
+    run_task = None
+    
+    try:
+        if shard_ranges(10, 3) == [[0, 1, 2, 3], [4, 5, 6], [7, 8, 9]] and shard_ranges(2, 4) == [[0], [1]]:
+            print("✅ Shards are split into contiguous ranges")
+        else:
+            print(f"❌ Unexpected shard ranges: {shard_ranges(10, 3)}")
+            return False
+        
+        # Two clusters sharing a database, wired like DiscordBot wires them
+        stores = [BotSettingsRepository(db_manager), BotSettingsRepository(db_manager)]
+        for cluster_id, store in enumerate(stores):
+            parent_conn, child_conn = multiprocessing.Pipe()
+            hub.attach(cluster_id, parent_conn)
+            client = ClusterClient(child_conn, cluster_id, 2)
+            client.start()
+            client.stats_provider = lambda store=store: store.stats()
+            client.on_invalidate('bot_settings', store.invalidate)
+            store.invalidation_hook = (
+                lambda guild_id, client=client: client.publish_invalidation('bot_settings', guild_id)
+            )
+            clients.append(client)
+        
+        await stores[1].get_settings(7707)
+        await stores[0].save_settings(7707, language='de')
+        await asyncio.sleep(0.1)
+        if await stores[1].get_setting(7707, 'language') == 'de' and hub.relayed == 1:
+            print("✅ Settings saved in one cluster invalidate the other's cache")
+        else:
+            print("❌ Invalidation did not reach the other cluster")
+            return False
+        
+        clusters = await clients[1].cluster_stats()
+        if [c['cluster_id'] for c in clusters] == [0, 1]:
+            print(f"✅ Stats gathered from {len(clusters)} clusters")
+        else:
+            print(f"❌ Unexpected cluster stats: {clusters}")
+            return False
+        
+        # Real processes, each owning a range of shards of the fake gateway
+        launcher = ClusterLauncher('fake-token', clusters=3, shard_count=8,
+                                   target=fake_gateway_cluster, stats_interval=0)
+        run_task = asyncio.create_task(launcher.run())
+        deadline = time.monotonic() + 30
+        clusters = []
+        while len(clusters) < 3 and time.monotonic() < deadline:
+            await asyncio.sleep(0.2)
+            clusters = await launcher.hub.collect_stats()
+        
+        totals = aggregate_stats(clusters)
+        if (totals['clusters'] == 3 and totals['shards'] == 8
+                and totals['guilds'] == len(FAKE_GATEWAY_GUILDS) and totals['misplaced'] == 0):
+            print(f"✅ 3 cluster processes own {totals['guilds']} fake guilds across 8 shards")
+        else:
+            print(f"❌ Unexpected launcher stats: {totals}")
+            return False
+        
+        launcher.stop()
+        await asyncio.wait_for(run_task, 15)
+        if all(process.exitcode == 0 for process in launcher._processes.values()):
+            print("✅ Clusters shut down cleanly")
+        else:
+            print("❌ A cluster did not exit cleanly")
+            return False
+        
+        return True
+        
+    except Exception as e:
+        print(f"❌ Cluster test failed: {e}")
+        return False
+    finally:
+        for client in clients:
+            client.close()
+        for cluster_id in range(2):
+            hub.detach(cluster_id)
+        if run_task is not None and not run_task.done():
+            for process in launcher._processes.values():
+                process.terminate()
+            run_task.cancel()
+
+
+async def test_member_resolver():
+    """Test the lean gateway profile and on-demand member resolution."""
+    print("\n👤 Testing member resolver...")
+    
+    import discord
+    from src.adapter.discord.bot import gateway_options
+    
+    rest = RestScheduler(global_rate=50)
+    resolver = MemberResolver(rest, maxsize=2, ttl=60)
+    guild = FakeGuild(7272)
+    guild.member_ids = {1, 2, 3}
+    
+    try:
+        lean = gateway_options('lean')
+        if (not lean['intents'].members and not lean['chunk_guilds_at_startup']
+                and lean['member_cache_flags'].value == discord.MemberCacheFlags.none().value):
+            print("✅ Lean profile disables member caching and chunking")
+        else:
+            print(f"❌ Unexpected lean options: {lean}")
+            return False
+        
+        members = await resolver.resolve_many(guild, [1, 2, 1, 9])
+        again = await resolver.resolve_many(guild, [2, 9])
+        if members[1].id == 1 and members[9] is None and again[2].id == 2 and guild.fetched == 3:
+            print("✅ Members and departed users are fetched once, then cached")
+        else:
+            print(f"❌ Unexpected fetches: {guild.fetched}")
+            return False
+        
+        await resolver.resolve(guild, 3)
+        await resolver.resolve(guild, 1)
+        if resolver.stats()['size'] == 2 and guild.fetched == 5:
+            print("✅ Resolver cache stays within its size limit")
+        else:
+            print(f"❌ Unexpected resolver stats: {resolver.stats()}")
+            return False
+        
+        # Members from interaction payloads are used without a fetch until they leave
+        resolver.remember(SimpleNamespace(guild=guild, id=4))
+        remembered = await resolver.resolve(guild, 4)
+        resolver.forget(guild.id, 4)
+        forgotten = await resolver.resolve(guild, 4)
+        if remembered is not None and remembered.id == 4 and forgotten is None and guild.fetched == 6:
+            print("✅ Remembered members skip the fetch until forgotten")
+        else:
+            print(f"❌ Unexpected remembered member: {remembered}, {forgotten}, {guild.fetched}")
+            return False
+        
+        return True
+        
+    except Exception as e:
+        print(f"❌ Member resolver test failed: {e}")
+        return False
+    finally:
+        await rest.close()
+
+
+async def test_form_dispatcher():
+    """Test routing of form answers by (user, channel)."""
+    print("\n📨 Testing form answer dispatcher...")
+    
+    def message(user_id, channel_id, content=""):
+        return SimpleNamespace(author=SimpleNamespace(id=user_id), channel=SimpleNamespace(id=channel_id), content=content)
+    
+    dispatcher = FormAnswerDispatcher()
+    
+    try:
+        waits = [asyncio.create_task(dispatcher.wait(user_id, 500 + user_id, timeout=5)) for user_id in range(3)]
+        await asyncio.sleep(0)
+        
+        routed = [
+            dispatcher.dispatch(message(1, 999)),        # Right user, other channel
+            dispatcher.dispatch(message(7, 501)),        # Other user, right channel
+            dispatcher.dispatch(message(1, 501, "yes")),
+        ]
+        if routed == [False, False, True] and (await waits[1]).content == "yes" and len(dispatcher) == 2:
+            print("✅ Only the waiting user's message in the expected channel is delivered")
+        else:
+            print(f"❌ Unexpected routing: {routed}")
+            return False
+        
+        replacement = asyncio.create_task(dispatcher.wait(0, 500, timeout=5))
+        await asyncio.sleep(0)
+        dispatcher.dispatch(message(0, 500, "again"))
+        await asyncio.gather(waits[0], return_exceptions=True)
+        if waits[0].cancelled() and (await replacement).content == "again":
+            print("✅ A restarted form replaces the previous wait")
+        else:
+            print("❌ Previous wait was not replaced")
+            return False
+        
+        try:
+            await dispatcher.wait(9, 9, timeout=0.01)
+            print("❌ Wait without an answer did not time out")
+            return False
+        except asyncio.TimeoutError:
+            pass
+        waits[2].cancel()
+        await asyncio.gather(waits[2], return_exceptions=True)
+        if len(dispatcher) == 0:
+            print("✅ Timed out and cancelled waits are cleaned up")
+        else:
+            print(f"❌ Waiters left behind: {dispatcher.stats()}")
+            return False
+        
+        return True
+        
+    except Exception as e:
+        print(f"❌ Form dispatcher test failed: {e}")
+        return False
+
+
+async def test_form_sessions(db_manager):
+    """Test the bounded, persisted form session store."""
+    print("\n📝 Testing form session store...")
+    
+    repository = TicketRepository(db_manager)
+    store = FormSessionStore(repository, ttl=60, max_sessions=2, flush_interval=0.05)
+    
+    try:
+        await store.start()
+        for user_id in (1, 2, 3):
+            store.put(FormSession(9090, user_id, ["Name?", "Issue?"]))
+        if len(store) == 2 and store.get(9090, 1) is None and store.stats()['evicted'] == 1:
+            print("✅ Store is capped, evicting the session closest to expiry")
+        else:
+            print(f"❌ Unexpected store state: {store.stats()}")
+            return False
+        
+        session = store.get(9090, 2)
+        session.answers[0] = "Alice"
+        session.current = 1
+        store.update(session)
+        await asyncio.sleep(0.2)
+        
+        # Simulate a restart: a new store resumes what the old one wrote
+        await store.close()
+        store = FormSessionStore(repository, ttl=60, max_sessions=2, flush_interval=0.05)
+        resumed = await store.start()
+        restored = store.get(9090, 2)
+        if resumed == 2 and restored and restored.answers == {0: "Alice"} and restored.current == 1:
+            print("✅ Partial answers survive a restart")
+        else:
+            print(f"❌ Sessions were not resumed: {resumed}")
+            return False
+        
+        store.complete(9090, 2)
+        expired = store.expire(now=time.time() + 61)
+        await asyncio.sleep(0.2)
+        stats = store.stats()
+        remaining = await repository.get_form_sessions(time.time())
+        if expired == 1 and stats['active'] == 0 and stats['completed'] == 1 and not remaining:
+            print(f"✅ Completed and expired sessions are removed from storage "
+                  f"({stats['completed']} completed, {stats['expired']} expired)")
+        else:
+            print(f"❌ Unexpected stats after expiry: {stats}, stored {len(remaining)}")
+            return False
+        
+        return True
+        
+    except Exception as e:
+        print(f"❌ Form session test failed: {e}")
+        return False
+    finally:
+        await store.close()
+
+
+async def test_form_pages(db_manager):
+    """Test question specs and paging form questions into modals."""
+    print("\n📄 Testing paged form modals...")
+    
+    import discord
+    from src.adapter.discord.ticket.cogs.ticket_commands import FormPageModal
+    
+    repository = TicketRepository(db_manager)
+    store = FormSessionStore(repository, ttl=60)
+    
+    try:
+        question = parse_question_spec("Your nickname [short, 2-32, optional]", order=1)
+        if (question.text, question.style, question.min_length, question.max_length, question.required) == (
+                "Your nickname", "short", 2, 32, False):
+            print(f"✅ Spec parsed: {format_question_spec(question)}")
+        else:
+            print(f"❌ Spec parsed incorrectly: {question}")
+            return False
+        
+        try:
+            parse_question_spec("Broken [huge]")
+            print("❌ Unknown option accepted")
+            return False
+        except ValueError:
+            print("✅ Unknown option rejected")
+        
+        await repository.save_form_questions(7171, [question, parse_question_spec("Describe it", order=2)])
+        stored = await repository.get_form_questions(7171)
+        if [(q.style, q.max_length, q.required) for q in stored] == [("short", 32, False), ("long", 1000, True)]:
+            print("✅ Question metadata stored in form_questions")
+        else:
+            print(f"❌ Question metadata lost: {stored}")
+            return False
+        
+        if check_answer(question, "-") == ("", None) and check_answer(stored[1], "")[1]:
+            print("✅ Optional questions can be skipped, required ones cannot")
+        else:
+            print("❌ Message answers checked incorrectly")
+            return False
+        
+        # Ten questions fill two modals instead of ten
+        specs = [f"Question {i + 1} [short]" if i % 2 else f"Question {i + 1}" for i in range(10)]
+        cog = SimpleNamespace(form_sessions=store, created=[])
+        
+        async def create_ticket(interaction, ticket_format, forum_channel_id, welcome_message, answers):
+            cog.created.append(answers)
+        
+        cog.create_ticket = create_ticket
+        # Panel forms read their questions from form_questions
+        service = TicketService(repository)
+        await service.setup_form_questions(7171, specs)
+        questions = await service.get_form_questions(7171)
+        session = FormSession(7171, 42, [format_question_spec(q) for q in questions])
+        store.put(session)
+        sent = []
+        
+        async def send_message(*args, **kwargs):
+            sent.append(kwargs)
+        
+        interaction = SimpleNamespace(
+            client=SimpleNamespace(get_cog=lambda name: cog),
+            response=SimpleNamespace(send_message=send_message),
+            guild_id=7171,
+            user=SimpleNamespace(id=42)
+        )
+        
+        modals = 0
+        while not cog.created:
+            modal = FormPageModal(session, questions)
+            for offset, text_input in enumerate(modal.inputs):
+                text_input._value = f"answer {modal.start + offset + 1}"
+            await modal.on_submit(interaction)
+            modals += 1
+            if modals > 10:
+                break
+        
+        first_page = FormPageModal(FormSession(7171, 43, session.questions), questions)
+        styles = [text_input.style for text_input in first_page.inputs]
+        if (modals == 2 and len(sent) == 1 and store.get(7171, 42) is None
+                and "answer 10" in cog.created[0]
+                and styles[:2] == [discord.TextStyle.long, discord.TextStyle.short]):
+            print(f"✅ {len(specs)} questions answered in {modals} modals")
+        else:
+            print(f"❌ Form took {modals} modals, {len(sent)} continue prompts")
+            return False
+        
+        if [len(page) for page in paginate(parse_questions(specs + ["Extra"]))] == [5, 5, 1]:
+            print("✅ Pages hold at most five questions")
+        else:
+            print("❌ Pages split incorrectly")
+            return False
+        
+        return True
+        
+    except Exception as e:
+        print(f"❌ Form pages test failed: {e}")
+        return False
+    finally:
+        await store.close()
+
+
+async def test_transcripts(db_manager):
+    """Test streaming transcript export ahead of channel deletion."""
+    print("\n📜 Testing transcript export...")
+    
+    import gzip
+    import json
+    import tempfile
+    
+    repository = TicketRepository(db_manager)
+    rest = RestScheduler(global_rate=1000)
+    channel_id = 8201
+    payloads = [
+        {
+            "id": str(1000 + i),
+            "timestamp": f"2024-01-01T00:{i // 60:02d}:{i % 60:02d}+00:00",
+            "author": {"id": "7", "username": "user", "global_name": None},
+            "content": f"<b>message {i}</b>",
+            "attachments": [{"url": "https://cdn.example/file.png"}] if i == 3 else [],
+            "embeds": []
+        }
+        for i in range(250)
+    ]
+    
+    class FakeHttp:
+        def __init__(self):
+            self.requests = 0
+            self.deleted = []
+        
+        async def logs_from(self, channel_id, limit, before=None, after=None, around=None):
+            self.requests += 1
+            newer = [payload for payload in payloads if int(payload["id"]) > (after or 0)][:limit]
+            return list(reversed(newer))  # Discord returns pages newest first
+        
+        async def delete_channel(self, channel_id, reason=None):
+            self.deleted.append((channel_id, len(exported)))
+    
+    http = FakeHttp()
+    client = SimpleNamespace(http=http, user=SimpleNamespace(id=99))
+    exported = []
+    
+    with tempfile.TemporaryDirectory() as directory:
+        exporter = TranscriptExporter(repository, rest, client, directory, workers=1, page_size=100)
+        
+        async def before_delete(channel_id):
+            exported.append(await exporter.export_channel(channel_id))
+        
+        queue = ChannelDeletionQueue(repository, rest, http, before_delete=before_delete)
+        try:
+            ticket_id = await repository.create_ticket(
+                Ticket(8200, 7, channel_id, TicketType.SIMPLE, TicketStatus.CLOSED)
+            )
+            await queue.start()
+            await queue.schedule(channel_id, 8200, delay=0)
+            for _ in range(100):
+                if http.deleted:
+                    break
+                await asyncio.sleep(0.1)
+            
+            if http.deleted == [(channel_id, 1)] and exported[0] is not None:
+                print(f"✅ Transcript written before the channel was deleted ({http.requests} history pages)")
+            else:
+                print(f"❌ Deletion did not wait for the transcript: {http.deleted}")
+                return False
+            
+            transcript = await repository.get_transcript(ticket_id)
+            jsonl_path, html_path = exporter.paths(8200, channel_id)
+            with gzip.open(jsonl_path, "rt", encoding="utf-8") as f:
+                records = [json.loads(line) for line in f]
+            with gzip.open(html_path, "rt", encoding="utf-8") as f:
+                page = f.read()
+            ordered = [int(record["id"]) for record in records] == sorted(int(p["id"]) for p in payloads)
+            if (transcript and transcript.message_count == 250 and transcript.transcript_url == jsonl_path
+                    and transcript.created_by == 99 and ordered and records[3]["attachments"]):
+                print("✅ ticket_transcripts records the message count and local path")
+            else:
+                print(f"❌ Unexpected transcript: {transcript}, {len(records)} records")
+                return False
+            
+            if "&lt;b&gt;message 249&lt;/b&gt;" in page and page.rstrip().endswith("</html>"):
+                print("✅ HTML transcript is escaped and complete")
+            else:
+                print("❌ HTML transcript is malformed")
+                return False
+            
+            requests = http.requests
+            again = await exporter.export_channel(channel_id)
+            if again.id == transcript.id and http.requests == requests:
+                print("✅ Retried deletions reuse the existing transcript")
+            else:
+                print("❌ Transcript was exported twice")
+                return False
+            
+            # History failing after the first page leaves no partial files behind
+            logs_from = http.logs_from
+            
+            async def failing_logs_from(channel_id, limit, before=None, after=None, around=None):
+                if after:
+                    raise RuntimeError("Service unavailable")
+                return await logs_from(channel_id, limit, before, after, around)
+            
+            http.logs_from = failing_logs_from
+            try:
+                await exporter.export(8200, 8202, "Ticket #failed")
+                failed = False
+            except RuntimeError:
+                failed = True
+            http.logs_from = logs_from
+            leftovers = [name for name in os.listdir(os.path.dirname(jsonl_path)) if "8202" in name]
+            if failed and not leftovers:
+                print("✅ A failed export removes its partial files")
+            else:
+                print(f"❌ Failed export left {leftovers}")
+                return False
+            
+            return True
+            
+        except Exception as e:
+            print(f"❌ Transcript test failed: {e}")
+            return False
+        finally:
+            await queue.close()
+            exporter.close()
+            await rest.close()
+
+
+async def test_blob_store(db_manager):
+    """Test the content-addressed blob store and transcripts stored in it."""
+    print("\n🧱 Testing blob store...")
+    
+    import gzip
+    import json
+    import tempfile
+    
+    repository = BlobRepository(db_manager)
+    rest = RestScheduler(global_rate=1000)
+    
+    with tempfile.TemporaryDirectory() as directory:
+        store = BlobStore(repository, os.path.join(directory, "blobs"), gc_interval=0, gc_grace=60)
+        try:
+            text = b"same screenshot bytes " * 4000
+            first = await store.put(text)
+            second = await store.put(text)
+            kind, codec, size, stored_size, refs = await repository.get_blob(first)
+            noise_data = os.urandom(100_000)
+            noise = await store.put(noise_data)
+            if (first == second and refs == 2 and stored_size < size // 10
+                    and store.locate(first)[0] == store.path(first, codec)
+                    and os.path.join(first[:2], first[2:4], first) in store.path(first, codec)
+                    and store.locate(noise)[1] == "raw"):
+                print(f"✅ Identical content stored once ({size} -> {stored_size} bytes, {codec}); noise kept raw")
+            else:
+                print(f"❌ Unexpected blob state: refs {refs}, {size} -> {stored_size}")
+                return False
+            
+            with store.open_stored(first) as (data, _):
+                mapped = type(data.obj).__name__
+            if b"".join(store.iter_chunks(first, chunk_size=4096)) == text and mapped == "mmap":
+                print("✅ Reads are memory-mapped and decompress in chunks")
+            else:
+                print(f"❌ Blob did not round-trip ({mapped})")
+                return False
+            
+            # A manifest takes over the references of its entries
+            manifest = await store.put_manifest({"text": first, "noise": noise})
+            await store.put(text)
+            await store.put(noise_data)
+            duplicate = await store.put_manifest({"text": first, "noise": noise})
+            refs = (await repository.get_blob(first))[4]
+            await store.release(manifest)
+            await store.release(manifest)
+            await store.release(first)
+            now = time.time()
+            collected = await store.collect(now + 61)
+            collected += await store.collect(now + 200)
+            remaining = [await repository.get_blob(h) for h in (first, noise, manifest)]
+            if duplicate == manifest and refs == 2 and collected == 3 and remaining == [None, None, None]:
+                print(f"✅ Unreferenced blobs and their manifest entries are collected ({store.bytes_collected} bytes)")
+            else:
+                print(f"❌ Collection left {remaining} (collected {collected}, refs {refs})")
+                return False
+            
+            # Another cluster shares the directory but not the lock
+            other = BlobStore(repository, store.directory, gc_interval=0, gc_grace=60)
+            shared = b"shared between clusters " * 100
+            shared_hash = await store.put(shared)
+            await store.release(shared_hash)
+            delete_unreferenced = repository.delete_unreferenced
+            
+            async def put_before_delete(blob_hash):
+                await other.put(shared)
+                return await delete_unreferenced(blob_hash)
+            
+            repository.delete_unreferenced = put_before_delete
+            kept = await store.collect(time.time() + 61)
+            repository.delete_unreferenced = delete_unreferenced
+            kept_intact = store.read(shared_hash) == shared
+            await store.release(shared_hash)
+            
+            async def put_after_delete(blob_hash):
+                deleted = await delete_unreferenced(blob_hash)
+                await other.put(shared)
+                return deleted
+            
+            repository.delete_unreferenced = put_after_delete
+            collected = await store.collect(time.time() + 61)
+            repository.delete_unreferenced = delete_unreferenced
+            row = await repository.get_blob(shared_hash)
+            if (kept == 0 and kept_intact and collected == 1 and row is not None and row[4] == 1
+                    and store.read(shared_hash) == shared):
+                print("✅ Collection racing a put from another cluster keeps the blob readable")
+            else:
+                print(f"❌ Blob lost to a racing collection: {kept}, {collected}, {row}")
+                return False
+            await store.release(shared_hash)
+            await store.collect(time.time() + 61)
+            
+            # Transcripts of two tickets sharing an attachment
+            attachment = b"PNG" + bytes(range(256)) * 64
+            downloads = []
+            
+            class FakeHttp:
+                async def logs_from(self, channel_id, limit, before=None, after=None, around=None):
+                    if after:
+                        return []
+                    return [{
+                        "id": str(channel_id * 10), "timestamp": "2024-01-01T00:00:00+00:00",
+                        "author": {"id": "7", "username": "user"}, "content": "see screenshot",
+                        "attachments": [{"url": f"https://cdn.example/{channel_id}/shot.png", "size": len(attachment)}]
+                    }]
+                
+                async def get_from_cdn(self, url):
+                    downloads.append(url)
+                    return attachment
+            
+            client = SimpleNamespace(http=FakeHttp(), user=SimpleNamespace(id=99))
+            exporter = TranscriptExporter(
+                TicketRepository(db_manager), rest, client, os.path.join(directory, "transcripts"),
+                workers=0, blobs=store
+            )
+            transcripts = []
+            for channel_id in (8301, 8302):
+                await TicketRepository(db_manager).create_ticket(
+                    Ticket(8300, 7, channel_id, TicketType.SIMPLE, TicketStatus.CLOSED)
+                )
+                transcripts.append(await exporter.export_channel(channel_id))
+            
+            entries = store.read_manifest(parse_blob_url(transcripts[0].transcript_url))
+            hashes = set(entries["attachments"].values())
+            records = gzip.decompress(store.read(entries["jsonl"])).decode().splitlines()
+            attachment_refs = (await repository.get_blob(hashes.pop()))[4] if len(hashes) == 1 else 0
+            if (len(downloads) == 2 and attachment_refs == 2 and json.loads(records[0])["content"] == "see screenshot"
+                    and not os.listdir(os.path.join(directory, "transcripts", "8300"))):
+                print("✅ Transcripts point into the blob store and share attachments")
+            else:
+                print(f"❌ Unexpected transcript storage: {entries}")
+                return False
+            
+            return True
+            
+        except Exception as e:
+            print(f"❌ Blob store test failed: {e}")
+            return False
+        finally:
+            await store.close()
+            await rest.close()
+
+
+async def test_idle_closer(db_manager):
+    """Test warning about and closing idle tickets."""
+    print("\n⏰ Testing idle ticket closer...")
+    
+    repository = TicketRepository(db_manager)
+    bot_settings = BotSettingsRepository(db_manager)
+    service = TicketService(repository)
+    rest = RestScheduler(global_rate=1000)
+    
+    class FakeTextChannel:
+        def __init__(self, channel_id, fail_close=False):
+            self.id = channel_id
+            self.sent = []
+            self.fail_close = fail_close
+        
+        async def send(self, embed=None, **kwargs):
+            if self.fail_close and embed.title == "Ticket Closed":
+                raise RuntimeError("Missing Access")
+            self.sent.append(embed.title)
+    
+    class FakeDeletions:
+        def __init__(self):
+            self.scheduled = []
+        
+        async def schedule(self, channel_id, guild_id=None, delay=0, reason=None):
+            self.scheduled.append(channel_id)
+    
+    channels = {channel_id: FakeTextChannel(channel_id) for channel_id in (8401, 8402, 8403)}
+    channels[8404] = FakeTextChannel(8404, fail_close=True)
+    client = SimpleNamespace(get_channel=channels.get)
+    deletions = FakeDeletions()
+    # One second threshold by default; the second guild turns closing off
+    closer = IdleTicketCloser(service, repository, bot_settings, deletions, rest, client,
+                              default_hours=1 / 3600, warning=0.2)
+    
+    try:
+        await bot_settings.save_settings(8410, idle_close_hours=0)
+        for guild_id, channel_id in ((8400, 8401), (8400, 8402), (8410, 8403), (8400, 8404)):
+            ticket_id = await repository.create_ticket(Ticket(guild_id, 7, channel_id, TicketType.SIMPLE))
+            await db_manager.execute_write(
+                "UPDATE tickets SET last_activity = datetime(?, 'unixepoch') WHERE id = ?",
+                (int(time.time()) - 60, ticket_id)
+            )
+        await service.load_ticket_index()
+        
+        plan = await db_manager.execute(
+            "EXPLAIN QUERY PLAN SELECT id FROM tickets WHERE status = 'open' ORDER BY last_activity"
+        )
+        if any('idx_tickets_status_activity' in row['detail'] for row in plan):
+            print("✅ Idle tickets are loaded through the (status, last_activity) index")
+        else:
+            print(f"❌ Idle query does not use the index: {plan}")
+            return False
+        
+        tracked = await closer.start()
+        await asyncio.sleep(0.1)
+        closer.touch(8402)  # Activity after the warning keeps the ticket open
+        await asyncio.sleep(0.4)
+        
+        statuses = {}
+        for channel_id in channels:
+            ticket = await repository.get_ticket_by_channel(channel_id)
+            statuses[channel_id] = ticket.status
+        if (tracked >= 4 and channels[8401].sent == ["⏰ Ticket Inactive", "Ticket Closed"]
+                and 8401 in deletions.scheduled and statuses[8401] == TicketStatus.CLOSED
+                and 8401 not in service.ticket_index):
+            print("✅ Idle ticket warned, then closed through TicketService.close_ticket")
+        else:
+            print(f"❌ Idle ticket not closed: {channels[8401].sent}, {deletions.scheduled}")
+            return False
+        
+        if (channels[8402].sent == ["⏰ Ticket Inactive"] and statuses[8402] == TicketStatus.OPEN
+                and not channels[8403].sent and statuses[8403] == TicketStatus.OPEN):
+            print("✅ Activity cancels the warning and guilds can turn closing off")
+        else:
+            print(f"❌ Unexpected state: {channels[8402].sent}, {channels[8403].sent}")
+            return False
+        
+        if sorted(deletions.scheduled) == [8401, 8404] and statuses[8404] == TicketStatus.CLOSED:
+            print("✅ A failed close notice does not keep the channel from being deleted")
+        else:
+            print(f"❌ Channel of a closed ticket not scheduled for deletion: {deletions.scheduled}")
+            return False
+        
+        return True
+        
+    except Exception as e:
+        print(f"❌ Idle closer test failed: {e}")
+        return False
+    finally:
+        await closer.close()
+        await rest.close()
+
+
+async def test_activity_tracker(db_manager):
+    """Test coalesced writes of ticket channel activity."""
+    print("\n📝 Testing activity tracker...")
+    
+    repository = TicketRepository(db_manager)
+    service = TicketService(repository)
+    tracker = ActivityTracker(service, repository, flush_interval=3600)
+    
+    def message(channel_id, when, bot=False):
+        return SimpleNamespace(
+            channel=SimpleNamespace(id=channel_id),
+            author=SimpleNamespace(bot=bot),
+            created_at=datetime.fromtimestamp(when, timezone.utc)
+        )
+    
+    try:
+        for channel_id in (8501, 8502):
+            await repository.create_ticket(Ticket(8500, 7, channel_id, TicketType.SIMPLE))
+        await service.load_ticket_index()
+        touched = []
+        tracker.activity_hook = lambda channel_id, when: touched.append(channel_id)
+        
+        base = 1_700_000_000
+        for i in range(500):
+            tracker.record(message(8501, base + i))
+        tracker.record(message(8502, base + 10))
+        tracker.record(message(8502, base + 5))  # Out of order: the newer time is kept
+        tracker.record(message(8502, base + 900, bot=True))
+        for i in range(1000):
+            tracker.record(message(9_000_000 + i, base))
+        
+        if len(tracker) == 2 and tracker.recorded == 502 and len(touched) == 502:
+            print("✅ Non-ticket and bot messages are discarded, ticket times coalesced in memory")
+        else:
+            print(f"❌ Unexpected tracker state: {tracker.stats()}")
+            return False
+        
+        updated = await tracker.flush()
+        rows = await db_manager.fetch_rows(
+            "SELECT channel_id, CAST(strftime('%s', last_activity) AS INTEGER) FROM tickets "
+            "WHERE channel_id IN (8501, 8502) ORDER BY channel_id"
+        )
+        stats = tracker.stats()
+        if (updated == 2 and rows == [(8501, base + 499), (8502, base + 10)]
+                and stats['seen'] == 1503 and stats['rows_written'] == 2 and stats['messages_per_row'] == 251):
+            print(f"✅ {stats['seen']} messages written as {stats['rows_written']} rows in one flush")
+        else:
+            print(f"❌ Unexpected flush result: {updated}, {rows}, {stats}")
+            return False
+        
+        # Closing flushes what is still pending
+        tracker.record(message(8501, base + 2000))
+        await tracker.close()
+        last = await db_manager.fetch_row(
+            "SELECT CAST(strftime('%s', last_activity) AS INTEGER) FROM tickets WHERE channel_id = 8501"
+        )
+        if last == (base + 2000,) and len(tracker) == 0:
+            print("✅ Pending activity is written on shutdown")
+        else:
+            print(f"❌ Activity lost on shutdown: {last}")
+            return False
+        
+        return True
+        
+    except Exception as e:
+        print(f"❌ Activity tracker test failed: {e}")
+        return False
+    finally:
+        await tracker.close()
+
+
+async def test_category_resolver(db_manager):
+    """Test per-guild ticket category partitions."""
+    print("\n🗂️ Testing ticket category resolver...")
+    
+    import discord
+    
+    class FakeGuildChannel:
+        def __init__(self, guild, channel_id, name, channel_type, category_id=None):
+            self.guild = guild
+            self.id = channel_id
+            self.name = name
+            self.type = channel_type
+            self.category_id = category_id
+            self.overwrites = {}
+    
+    class FakeCategoryGuild:
+        def __init__(self, guild_id):
+            self.id = guild_id
+            self.by_id = {}
+            self.created_categories = 0
+        
+        @property
+        def channels(self):
+            return list(self.by_id.values())
+        
+        @property
+        def categories(self):
+            return [c for c in self.by_id.values() if c.type == discord.ChannelType.category]
+        
+        def get_channel(self, channel_id):
+            return self.by_id.get(channel_id)
+        
+        def add(self, name, channel_type, category_id=None):
+            channel = FakeGuildChannel(self, self.id * 1000 + len(self.by_id) + 1, name, channel_type, category_id)
+            self.by_id[channel.id] = channel
+            resolver.channel_created(channel)  # As on_guild_channel_create would
+            return channel
+        
+        async def create_category(self, name, overwrites=None, reason=None):
+            self.created_categories += 1
+            category = self.add(name, discord.ChannelType.category)
+            category.overwrites = overwrites or {}
+            return category
+    
+    repository = TicketRepository(db_manager)
+    rest = RestScheduler(global_rate=1000)
+    resolver = TicketCategoryResolver(repository, rest, capacity=4, headroom=1)
+    guild = FakeCategoryGuild(8600)
+    
+    try:
+        # A hand-made "Tickets" category with two channels already in it
+        first = guild.add("Tickets", discord.ChannelType.category)
+        first.overwrites = {"everyone": "hidden"}
+        for i in range(2):
+            guild.add(f"ticket-{i}", discord.ChannelType.text, first.id)
+        guild.add("general", discord.ChannelType.text)
+        
+        category = await resolver.resolve(guild)
+        stored = await repository.get_category_partitions(guild.id, "tickets")
+        if category is first and [(c.partition, c.discord_category_id) for c in stored] == [(1, first.id)]:
+            print("✅ Existing category adopted and mapped in ticket_categories")
+        else:
+            print(f"❌ Unexpected category: {category and category.name}, {stored}")
+            return False
+        resolver.release(guild.id, category.id)  # No channel was created in it
+        
+        # Fill the first partition; the overflow category is created once it is down to the headroom
+        names = []
+        for i in range(2, 8):
+            category = await resolver.resolve(guild)
+            names.append(category.name)
+            guild.add(f"ticket-{i}", discord.ChannelType.text, category.id)
+            await asyncio.sleep(0)
+        if names == ["Tickets", "Tickets", "tickets-2", "tickets-2", "tickets-2", "tickets-2"]:
+            print("✅ Channels roll over to \"tickets-2\" when a category is full")
+        else:
+            print(f"❌ Unexpected rollover: {names}")
+            return False
+        
+        second = guild.get_channel(resolver._guilds[guild.id].partitions[2])
+        stats = resolver.stats()
+        if (second.overwrites == first.overwrites and stats['loads'] == 1
+                and stats['hits'] == 6 and guild.created_categories == 1):
+            print("✅ Partitions created ahead of time with the first one's permissions, from cache")
+        else:
+            print(f"❌ Unexpected resolver state: {stats}, {guild.created_categories} categories")
+            return False
+        
+        # Freed slots are reused; deleting a partition category reloads the guild
+        freed = next(c for c in guild.channels if c.category_id == first.id)
+        del guild.by_id[freed.id]
+        resolver.channel_deleted(freed)
+        category = await resolver.resolve(guild)
+        del guild.by_id[second.id]
+        resolver.channel_deleted(second)
+        await resolver.resolve(guild)
+        if category is first and resolver.stats()['invalidations'] == 1 and resolver.stats()['loads'] == 2:
+            print("✅ Channel events keep counts current and invalidate changed categories")
+        else:
+            print(f"❌ Events not applied: {resolver.stats()}")
+            return False
+        
+        # Concurrent resolves each reserve a slot before any create event arrives
+        busy = FakeCategoryGuild(8700)
+        busy_first = busy.add("Tickets", discord.ChannelType.category)
+        for i in range(3):
+            busy.add(f"ticket-{i}", discord.ChannelType.text, busy_first.id)
+        await resolver.resolve(busy)
+        resolver.release(busy.id, busy_first.id)
+        categories = await asyncio.gather(*(resolver.resolve(busy) for _ in range(6)))
+        for i, category in enumerate(categories):
+            busy.add(f"ticket-busy-{i}", discord.ChannelType.text, category.id)
+        actual = {}
+        for channel in busy.channels:
+            if channel.category_id is not None:
+                actual[channel.category_id] = actual.get(channel.category_id, 0) + 1
+        state = resolver._guilds[busy.id]
+        if ([c.name for c in categories] == ["Tickets"] + ["tickets-2"] * 4 + ["tickets-3"]
+                and max(actual.values()) <= resolver.capacity
+                and all(state.counts[c] == n for c, n in actual.items()) and not any(state.reserved.values())):
+            print("✅ Concurrent resolves near capacity do not overfill a category")
+        else:
+            print(f"❌ Category overfilled: {[c.name for c in categories]}, {actual}, {state.counts}")
+            return False
+        
+        return True
+        
+    except Exception as e:
+        print(f"❌ Category resolver test failed: {e}")
+        return False
+    finally:
+        await resolver.close()
+        await rest.close()
+
+
 async def test_configuration():
     """Test configuration settings."""
     print("\n⚙️ Testing configuration...")
@@ -197,7 +2278,7 @@ async def cleanup_test_files():
     """Clean up test files."""
     print("\n🧹 Cleaning up test files...")
     
-    test_files = ["test_bot.db", "test_bot.db-journal"]
+    test_files = ["test_bot.db", "test_bot.db-journal", "test_bot.db-wal", "test_bot.db-shm"]
     
     for file in test_files:
         if os.path.exists(file):
@@ -227,6 +2308,81 @@ async def main():
     # Test service layer
     service_ok = await test_service_layer(db_manager)
     
+    # Test connection pool
+    pool_ok = await test_connection_pool(db_manager)
+    
+    # Test group commit
+    commit_ok = await test_group_commit(db_manager)
+    
+    # Test bulk writes
+    bulk_ok = await test_bulk_writes(db_manager)
+    
+    # Test migrations
+    migrations_ok = await test_migrations(db_manager)
+    
+    # Test unit of work
+    uow_ok = await test_unit_of_work(db_manager)
+    
+    # Test bot settings store
+    settings_ok = await test_bot_settings_store(db_manager)
+    
+    # Test guild config cache
+    config_cache_ok = await test_guild_config_cache(db_manager)
+    
+    # Test authorization
+    auth_ok = await test_authorization(db_manager)
+    
+    # Test open ticket index
+    index_ok = await test_ticket_index(db_manager)
+    
+    # Test row mapping
+    mapping_ok = await test_row_mapping()
+    
+    # Test REST scheduler
+    rest_ok = await test_rest_scheduler()
+    
+    # Test channel pool
+    pool_channels_ok = await test_channel_pool()
+    
+    # Test channel deletion queue
+    deletion_ok = await test_deletion_queue(db_manager)
+    
+    # Test persistent views
+    views_ok = await test_persistent_views()
+    
+    # Test command sync diffing
+    sync_ok = await test_command_sync(db_manager)
+    
+    # Test cluster launcher
+    cluster_ok = await test_cluster(db_manager)
+    
+    # Test member resolver
+    members_ok = await test_member_resolver()
+    
+    # Test form answer dispatcher
+    dispatcher_ok = await test_form_dispatcher()
+    
+    # Test form session store
+    sessions_ok = await test_form_sessions(db_manager)
+    
+    # Test paged form modals
+    pages_ok = await test_form_pages(db_manager)
+    
+    # Test transcript export
+    transcripts_ok = await test_transcripts(db_manager)
+    
+    # Test blob store
+    blobs_ok = await test_blob_store(db_manager)
+    
+    # Test idle ticket closer
+    idle_ok = await test_idle_closer(db_manager)
+    
+    # Test activity tracker
+    activity_ok = await test_activity_tracker(db_manager)
+    
+    # Test ticket category resolver
+    categories_ok = await test_category_resolver(db_manager)
+    
     # Summary
     print("\n" + "="*50)
     print("📊 TEST SUMMARY")
@@ -235,8 +2391,40 @@ async def main():
     print(f"Database: {'✅ PASS' if db_manager else '❌ FAIL'}")
     print(f"Repository: {'✅ PASS' if repo_ok else '❌ FAIL'}")
     print(f"Service Layer: {'✅ PASS' if service_ok else '❌ FAIL'}")
+    print(f"Connection Pool: {'✅ PASS' if pool_ok else '❌ FAIL'}")
+    print(f"Group Commit: {'✅ PASS' if commit_ok else '❌ FAIL'}")
+    print(f"Bulk Writes: {'✅ PASS' if bulk_ok else '❌ FAIL'}")
+    print(f"Migrations: {'✅ PASS' if migrations_ok else '❌ FAIL'}")
+    print(f"Unit of Work: {'✅ PASS' if uow_ok else '❌ FAIL'}")
+    print(f"Bot Settings Store: {'✅ PASS' if settings_ok else '❌ FAIL'}")
+    print(f"Guild Config Cache: {'✅ PASS' if config_cache_ok else '❌ FAIL'}")
+    print(f"Authorization: {'✅ PASS' if auth_ok else '❌ FAIL'}")
+    print(f"Ticket Index: {'✅ PASS' if index_ok else '❌ FAIL'}")
+    print(f"Row Mapping: {'✅ PASS' if mapping_ok else '❌ FAIL'}")
+    print(f"REST Scheduler: {'✅ PASS' if rest_ok else '❌ FAIL'}")
+    print(f"Channel Pool: {'✅ PASS' if pool_channels_ok else '❌ FAIL'}")
+    print(f"Deletion Queue: {'✅ PASS' if deletion_ok else '❌ FAIL'}")
+    print(f"Persistent Views: {'✅ PASS' if views_ok else '❌ FAIL'}")
+    print(f"Command Sync: {'✅ PASS' if sync_ok else '❌ FAIL'}")
+    print(f"Cluster: {'✅ PASS' if cluster_ok else '❌ FAIL'}")
+    print(f"Member Resolver: {'✅ PASS' if members_ok else '❌ FAIL'}")
+    print(f"Form Dispatcher: {'✅ PASS' if dispatcher_ok else '❌ FAIL'}")
+    print(f"Form Sessions: {'✅ PASS' if sessions_ok else '❌ FAIL'}")
+    print(f"Form Pages: {'✅ PASS' if pages_ok else '❌ FAIL'}")
+    print(f"Transcripts: {'✅ PASS' if transcripts_ok else '❌ FAIL'}")
+    print(f"Blob Store: {'✅ PASS' if blobs_ok else '❌ FAIL'}")
+    print(f"Idle Closer: {'✅ PASS' if idle_ok else '❌ FAIL'}")
+    print(f"Activity Tracker: {'✅ PASS' if activity_ok else '❌ FAIL'}")
+    print(f"Category Resolver: {'✅ PASS' if categories_ok else '❌ FAIL'}")
     
-    all_passed = config_ok and db_manager and repo_ok and service_ok
+    all_passed = (config_ok and db_manager and repo_ok and service_ok
+                  and pool_ok and commit_ok and bulk_ok and migrations_ok and uow_ok
+                  and settings_ok and config_cache_ok and auth_ok and index_ok
+                  and mapping_ok and rest_ok and pool_channels_ok
+                  and deletion_ok and views_ok and sync_ok
+                  and cluster_ok and members_ok and dispatcher_ok and sessions_ok
+                  and pages_ok and transcripts_ok and blobs_ok and idle_ok
+                  and activity_ok and categories_ok)
     print(f"\nOverall: {'✅ ALL TESTS PASSED' if all_passed else '❌ SOME TESTS FAILED'}")
     
     if all_passed:
@@ -250,6 +2438,7 @@ async def main():
         print("\n⚠️ Please fix the failing tests before using the bot")
     
     # Cleanup
+    await db_manager.close()
     await cleanup_test_files()
 
 